@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Data Room Parquet Cache
+Converts CSV/XLSX inputs to typed Parquet the first time they are read, keyed
+by file content hash, and memory-maps the Parquet copy on later runs.
+
+Usage:
+    python dataroom_cache.py --warm data-room/raw test-data
+    python dataroom_cache.py --stats
+    python dataroom_cache.py --clear
+
+    # From a skill script
+    from dataroom_cache import read_table
+    df = read_table('test-data/sample-revenue.csv')
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+CACHE_DIR = Path(os.environ.get(
+    'DILIGENCE_CACHE_DIR',
+    Path(__file__).resolve().parents[1] / '.cache' / 'dataroom'
+))
+MANIFEST_DIR = 'manifest'
+SOURCE_SUFFIXES = ('.csv', '.xlsx', '.xls')
+
+
+def cache_enabled() -> bool:
+    """Caching needs pyarrow and can be switched off with DILIGENCE_NO_CACHE=1."""
+    return PYARROW_AVAILABLE and os.environ.get('DILIGENCE_NO_CACHE', '') != '1'
+
+
+def parse_source(path: str, **read_kwargs) -> pd.DataFrame:
+    """Parse a CSV or Excel file directly, bypassing the cache."""
+    if path.lower().endswith(('.xlsx', '.xls')):
+        return pd.read_excel(path, **read_kwargs)
+    return pd.read_csv(path, **read_kwargs)
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """Hash file contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _manifest_path(source: str, cache_dir: Path) -> Path:
+    # One small file per source, so parallel workers never rewrite each other's entries
+    return cache_dir / MANIFEST_DIR / f'{hashlib.sha256(source.encode()).hexdigest()[:32]}.json'
+
+
+def _load_manifest_entry(source: str, cache_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_manifest_path(source, cache_dir), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_atomic(path: Path, write) -> None:
+    """Write via a temp file and rename so concurrent readers never see partial files."""
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _save_manifest_entry(source: str, cache_dir: Path, entry: Dict[str, Any]) -> None:
+    def write(tmp_path: Path):
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f, sort_keys=True)
+    path = _manifest_path(source, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, write)
+
+
+def content_hash(path: str, cache_dir: Path = CACHE_DIR) -> str:
+    """Content hash of a source file, reusing the manifest entry while mtime and size match."""
+    source = str(Path(path).resolve())
+    stat = os.stat(source)
+
+    entry = _load_manifest_entry(source, cache_dir)
+    if entry and entry.get('mtime_ns') == stat.st_mtime_ns and entry.get('size') == stat.st_size:
+        return entry['sha256']
+
+    sha = file_sha256(source)
+    _save_manifest_entry(source, cache_dir, {
+        'source': source, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': sha
+    })
+    return sha
+
+
+def _parquet_path(sha: str, read_kwargs: Dict[str, Any], cache_dir: Path) -> Path:
+    kwargs_key = hashlib.sha256(
+        json.dumps(read_kwargs, sort_keys=True, default=str).encode()
+    ).hexdigest()[:12]
+    return cache_dir / f'{sha[:32]}-{kwargs_key}.parquet'
+
+
+def read_table(path: str, cache_dir: Optional[Path] = None, **read_kwargs) -> pd.DataFrame:
+    """Read a CSV/XLSX file through the Parquet cache.
+
+    `read_kwargs` are passed to pd.read_csv / pd.read_excel and are part of
+    the cache key. Files whose columns cannot be stored as Parquet (e.g.
+    mixed-type object columns) are parsed normally and not cached.
+    """
+    if not cache_enabled():
+        return parse_source(path, **read_kwargs)
+
+    cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    parquet_path = _parquet_path(content_hash(path, cache_dir), read_kwargs, cache_dir)
+    if parquet_path.exists():
+        try:
+            return pd.read_parquet(parquet_path, engine='pyarrow', memory_map=True)
+        except Exception:
+            parquet_path.unlink(missing_ok=True)
+
+    df = parse_source(path, **read_kwargs)
+    try:
+        write_atomic(parquet_path, lambda tmp: df.to_parquet(tmp, engine='pyarrow'))
+    except Exception:
+        pass
+    return df
+
+
+def warm_cache(roots: list, cache_dir: Path = CACHE_DIR) -> Dict[str, int]:
+    """Convert every CSV/XLSX file under `roots` to Parquet ahead of a run."""
+    stats = {'files': 0, 'cached': 0}
+    for root in roots:
+        root_path = Path(root)
+        candidates = [root_path] if root_path.is_file() else sorted(root_path.rglob('*'))
+        for candidate in candidates:
+            if candidate.is_file() and candidate.suffix.lower() in SOURCE_SUFFIXES:
+                stats['files'] += 1
+                try:
+                    read_table(str(candidate), cache_dir)
+                    stats['cached'] += 1
+                except Exception as e:
+                    print(f"  Skipped {candidate}: {e}")
+    return stats
+
+
+def cache_stats(cache_dir: Path = CACHE_DIR) -> Dict[str, Any]:
+    """Summarize cache contents."""
+    parquet_files = list(cache_dir.glob('*.parquet')) if cache_dir.exists() else []
+    return {
+        'cache_dir': str(cache_dir),
+        'sources': len(list((cache_dir / MANIFEST_DIR).glob('*.json'))) if cache_dir.exists() else 0,
+        'parquet_files': len(parquet_files),
+        'size_mb': round(sum(p.stat().st_size for p in parquet_files) / 1024 / 1024, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the data room Parquet cache')
+    parser.add_argument('--warm', nargs='+', metavar='PATH', help='Files or directories to pre-convert')
+    parser.add_argument('--clear', action='store_true', help='Delete all cached files')
+    parser.add_argument('--stats', action='store_true', help='Show cache statistics')
+    parser.add_argument('--cache-dir', default=str(CACHE_DIR), help='Cache directory')
+
+    args = parser.parse_args()
+    cache_dir = Path(args.cache_dir)
+
+    if not PYARROW_AVAILABLE:
+        print("pyarrow is not installed - inputs will be parsed directly on every run")
+
+    if args.clear and cache_dir.exists():
+        shutil.rmtree(cache_dir)
+        print(f"Cleared {cache_dir}")
+
+    if args.warm:
+        stats = warm_cache(args.warm, cache_dir)
+        print(f"Cached {stats['cached']}/{stats['files']} source files")
+
+    if args.stats or not (args.warm or args.clear):
+        print(json.dumps(cache_stats(cache_dir), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Diligence Library API
+In-process entry points for the skill scripts, taking and returning
+in-memory objects, so a whole diligence run happens in one interpreter with
+no intermediate JSON round-trips. The skill CLIs are thin wrappers around
+the same functions.
+
+Usage:
+    from diligence import compute_metrics, parse_cap_table, model_round, calculate_waterfall, score_risks
+    metrics = compute_metrics(revenue_df, customers_df)
+    parsed = parse_cap_table(captable_df)
+    round_model = model_round(parsed, investment=5_000_000, pre_money=20_000_000)
+    waterfall = calculate_waterfall(round_model, [50_000_000, 100_000_000])
+    risks = score_risks(metrics=metrics, parsed_captable=parsed, round_model=round_model)
+
+    # Whole run, writing only the final artifacts
+    python diligence.py --revenue revenue.csv --customers customers.csv --captable captable.csv \
+        --round-size 5000000 --pre-money 20000000 --company "Acme Corp" --data-room data-room
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+SKILLS_DIR = Path(__file__).resolve().parents[1] / 'skills'
+for _skill in ('saas-metrics', 'cap-table-modeling', 'risk-framework', 'data-room-templates', 'diligence-report'):
+    sys.path.append(str(SKILLS_DIR / _skill / 'scripts'))
+
+from dataroom_cache import read_table
+from ledger import read_revenue_ledger
+from calculate_metrics import compute_metrics, convert_numpy
+from parse_captable import parse_cap_table
+from model_round import model_round as _model_round, round_model_output
+from waterfall_analysis import generate_waterfall_scenarios, resolve_cap_table, scenarios_output
+from generate_scorecard import score_risks as _score_risks
+from generate_memo import generate_memo
+from generate_dashboard import generate_dashboard
+
+try:
+    from generate_report import render_report
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+    def render_report(*args, **kwargs):
+        raise ImportError("render_report needs reportlab (pip install reportlab)")
+
+
+def model_round(
+    cap_table: Dict[str, Any],
+    investment: float,
+    pre_money: float,
+    round_name: str = 'Series A',
+    target_option_pool: float = 0.0,
+    liquidation_pref: float = 1.0,
+    participating: bool = False
+) -> Dict[str, Any]:
+    """Model a round on a parsed cap table; returns the round_model.json payload."""
+    return round_model_output(_model_round(
+        cap_table, investment, pre_money, round_name, target_option_pool, liquidation_pref, participating
+    ))
+
+
+def calculate_waterfall(cap_table: Dict[str, Any], exit_values: Sequence[float]) -> Dict[str, Any]:
+    """Exit waterfall for a parsed cap table or round model; returns the waterfall.json payload."""
+    return scenarios_output(generate_waterfall_scenarios(resolve_cap_table(cap_table), list(exit_values)))
+
+
+def score_risks(
+    metrics: Optional[Dict[str, Any]] = None,
+    parsed_captable: Optional[Dict[str, Any]] = None,
+    round_model: Optional[Dict[str, Any]] = None,
+    **analysis: Any
+) -> Dict[str, Any]:
+    """11-risks scorecard from analysis payloads (extra ones keyed like load_analysis_data)."""
+    data = {key: value for key, value in (('metrics', metrics), ('parsed_captable', parsed_captable),
+                                          ('round_model', round_model)) if value is not None}
+    return _score_risks({**data, **analysis})
+
+
+def run_diligence(
+    revenue_df: pd.DataFrame,
+    customers_df: pd.DataFrame,
+    captable_df: Optional[pd.DataFrame] = None,
+    round_size: Optional[float] = None,
+    pre_money: Optional[float] = None,
+    exit_values: Sequence[float] = (25e6, 50e6, 100e6, 250e6, 500e6),
+    company: str = 'Target Company'
+) -> Dict[str, Any]:
+    """Run metrics through memo and dashboard in memory.
+
+    Returns each step's payload plus a `timings` dict of seconds per step.
+    """
+    results: Dict[str, Any] = {'timings': {}}
+
+    def timed(name: str, fn, *args, **kwargs):
+        started = time.perf_counter()
+        results[name] = fn(*args, **kwargs)
+        results['timings'][name] = time.perf_counter() - started
+        return results[name]
+
+    metrics = timed('metrics', compute_metrics, revenue_df, customers_df)
+    parsed = round_model = None
+    if captable_df is not None:
+        parsed = timed('parsed_captable', parse_cap_table, captable_df)
+        if round_size and pre_money:
+            round_model = timed('round_model', model_round, parsed, round_size, pre_money)
+        timed('waterfall', calculate_waterfall, round_model or parsed, exit_values)
+
+    analysis = {key: value for key, value in (('metrics', metrics), ('parsed_captable', parsed),
+                                              ('round_model', round_model)) if value is not None}
+    timed('risks', score_risks, **analysis)
+    timed('memo', generate_memo, analysis, company)
+    timed('dashboard', generate_dashboard, analysis)
+    return results
+
+
+def write_outputs(results: Dict[str, Any], data_room: str) -> List[str]:
+    """Write a run's artifacts to the usual data-room locations."""
+    analysis_dir = Path(data_room) / 'analysis'
+    output_dir = Path(data_room) / 'output'
+    os.makedirs(analysis_dir, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    written = []
+    for key, filename in (('metrics', 'metrics.json'), ('parsed_captable', 'parsed_captable.json'),
+                          ('round_model', 'round_model.json'), ('waterfall', 'waterfall.json')):
+        if key in results:
+            path = analysis_dir / filename
+            with open(path, 'w') as f:
+                json.dump(results[key], f, indent=2, default=convert_numpy if key == 'metrics' else str)
+            written.append(str(path))
+
+    for key, filename, text in (('risks', 'risk-scorecard.md', results['risks']['markdown']),
+                                ('memo', 'investment-memo.md', results['memo']),
+                                ('dashboard', 'metrics-dashboard.html', results['dashboard'])):
+        path = output_dir / filename
+        with open(path, 'w') as f:
+            f.write(text)
+        written.append(str(path))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the full diligence analysis in one process')
+    parser.add_argument('--revenue', required=True, help='Revenue CSV file')
+    parser.add_argument('--customers', required=True, help='Customers CSV file')
+    parser.add_argument('--captable', help='Cap table export')
+    parser.add_argument('--round-size', type=float, help='Proposed round size')
+    parser.add_argument('--pre-money', type=float, help='Pre-money valuation')
+    parser.add_argument('--exits', default='25000000,50000000,100000000,250000000,500000000',
+                        help='Comma-separated exit values for the waterfall')
+    parser.add_argument('--company', default='Target Company', help='Company name')
+    parser.add_argument('--data-room', default='data-room', help='Data room directory for outputs')
+    parser.add_argument('--report', help='Also render the PDF report to this path (needs reportlab)')
+
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    revenue_df = read_revenue_ledger(args.revenue)
+    customers_df = read_table(args.customers)
+    captable_df = read_table(args.captable) if args.captable else None
+    load_time = time.perf_counter() - started
+
+    results = run_diligence(
+        revenue_df, customers_df, captable_df,
+        round_size=args.round_size,
+        pre_money=args.pre_money,
+        exit_values=[float(x) for x in args.exits.split(',')],
+        company=args.company
+    )
+    written = write_outputs(results, args.data_room)
+
+    if args.report:
+        report_started = time.perf_counter()
+        render_report(args.company, {
+            'metrics': results['metrics'],
+            'cap_table': results.get('parsed_captable', {}),
+            'risk_markdown': results['risks']['markdown'],
+            'memo': results['memo']
+        }, args.report)
+        results['timings']['report'] = time.perf_counter() - report_started
+        written.append(args.report)
+
+    print(f"\n=== DILIGENCE SUMMARY ===")
+    print(f"ARR: ${results['metrics']['arr']:,.0f}")
+    print(f"Risk score: {results['risks']['weighted_score']:.1f}/10 ({results['risks']['recommendation']})")
+    print(f"\n{'Step':<16} {'Time':>8}")
+    print(f"{'load inputs':<16} {load_time:>7.3f}s")
+    for name, seconds in results['timings'].items():
+        print(f"{name:<16} {seconds:>7.3f}s")
+    print(f"\nWrote {len(written)} files under {args.data_room}")
+
+
+if __name__ == '__main__':
+    main()
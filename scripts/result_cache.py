@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Analysis Result Cache
+Content-addressed cache for skill script outputs. A run is keyed by the
+script version (hash of the script's directory and the shared modules the
+skills import from scripts/), the content hash of every
+input file and the command-line arguments; on a repeat run the stored output
+files and console summary are restored instead of recomputing. Entries are
+evicted least-recently-used first once the cache exceeds its size budget.
+
+Because downstream scripts take upstream outputs as inputs, a changed input
+only invalidates the steps whose input hashes actually change.
+
+Usage:
+    python result_cache.py --stats
+    python result_cache.py --evict --max-size-mb 256
+    python result_cache.py --clear
+
+    # From a skill script
+    if __name__ == '__main__':
+        cached_main(main, __file__, build_parser(),
+                    inputs=lambda args: [args.revenue, args.customers],
+                    outputs=lambda args: [args.output])
+
+    # Environment
+    DILIGENCE_NO_CACHE=1                 run scripts without the cache
+    DILIGENCE_RESULT_CACHE_MB=512        size budget before LRU eviction
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from dataroom_cache import CACHE_DIR as DATAROOM_CACHE_DIR, content_hash, write_atomic
+
+
+RESULT_CACHE_DIR = Path(os.environ.get(
+    'DILIGENCE_RESULT_CACHE_DIR',
+    DATAROOM_CACHE_DIR.parent / 'results'
+))
+MAX_SIZE_MB = float(os.environ.get('DILIGENCE_RESULT_CACHE_MB', 512))
+ENTRY_NAME = 'entry.json'
+# Repository modules the skill scripts import and whose changes alter their outputs
+SHARED_MODULES = [Path(__file__).resolve().parent / name for name in ('dataroom_cache.py', 'skill_support.py')]
+
+
+def result_cache_enabled() -> bool:
+    """Result caching can be switched off with DILIGENCE_NO_CACHE=1."""
+    return os.environ.get('DILIGENCE_NO_CACHE', '') != '1'
+
+
+def script_version(script: str) -> str:
+    """Hash of every Python module next to the script (the script and its sibling imports) and the shared modules."""
+    digest = hashlib.sha256()
+    for path in sorted(Path(script).resolve().parent.glob('*.py')) + SHARED_MODULES:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def input_hashes(paths: Sequence[str]) -> Dict[str, Optional[str]]:
+    """Content hash per input path; directories hash every file they contain, missing paths hash to None."""
+    hashes: Dict[str, Optional[str]] = {}
+    for path in paths:
+        p = Path(path)
+        if p.is_dir():
+            for child in sorted(c for c in p.rglob('*') if c.is_file()):
+                hashes[str(child)] = content_hash(str(child))
+        elif p.is_file():
+            hashes[path] = content_hash(path)
+        else:
+            hashes[path] = None
+    return hashes
+
+
+def result_key(script: str, argv: Sequence[str], inputs: Dict[str, Optional[str]], outputs: Sequence[str]) -> str:
+    """Cache key for one script run."""
+    payload = {
+        'script': Path(script).name,
+        'version': script_version(script),
+        'argv': list(argv),
+        'inputs': inputs,
+        'outputs': list(outputs)
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _entry_file(index: int, path: str) -> str:
+    return f'{index}-{Path(path).name}'
+
+
+def _load_entry(entry_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(entry_dir / ENTRY_NAME, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_entry(entry_dir: Path, entry: Dict[str, Any]) -> None:
+    def write(tmp_path: Path):
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f, indent=2)
+    write_atomic(entry_dir / ENTRY_NAME, write)
+
+
+class _Tee:
+    """Write-through stream that keeps a copy of everything printed."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        self.parts.append(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def getvalue(self) -> str:
+        return ''.join(self.parts)
+
+
+def restore(key: str, cache_dir: Path = RESULT_CACHE_DIR) -> Optional[Dict[str, Any]]:
+    """Copy a cached run's output files back to their paths; returns the entry or None on a miss."""
+    entry_dir = cache_dir / key
+    entry = _load_entry(entry_dir)
+    if entry is None or not all((entry_dir / _entry_file(i, path)).exists()
+                                for i, path in enumerate(entry['outputs'])):
+        return None
+
+    for i, path in enumerate(entry['outputs']):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(entry_dir / _entry_file(i, path), path)
+    entry['last_access'] = time.time()
+    entry['hits'] = entry.get('hits', 0) + 1
+    _save_entry(entry_dir, entry)
+    return entry
+
+
+def store(key: str, script: str, outputs: List[str], stdout: str,
+          cache_dir: Path = RESULT_CACHE_DIR, max_size_mb: float = MAX_SIZE_MB) -> None:
+    """Save a run's output files and console output, then evict down to the size budget."""
+    entry_dir = cache_dir / key
+    entry_dir.mkdir(parents=True, exist_ok=True)
+    size = 0
+    for i, path in enumerate(outputs):
+        target = entry_dir / _entry_file(i, path)
+        write_atomic(target, lambda tmp, path=path: shutil.copyfile(path, tmp))
+        size += target.stat().st_size
+
+    now = time.time()
+    _save_entry(entry_dir, {
+        'script': Path(script).name,
+        'outputs': outputs,
+        'stdout': stdout,
+        'size': size,
+        'created': now,
+        'last_access': now,
+        'hits': 0
+    })
+    evict(max_size_mb, cache_dir)
+
+
+def list_entries(cache_dir: Path = RESULT_CACHE_DIR) -> List[Dict[str, Any]]:
+    """All cache entries, each with its key."""
+    if not cache_dir.exists():
+        return []
+    entries = []
+    for entry_dir in cache_dir.iterdir():
+        entry = _load_entry(entry_dir) if entry_dir.is_dir() else None
+        if entry is not None:
+            entries.append({'key': entry_dir.name, **entry})
+    return entries
+
+
+def evict(max_size_mb: float = MAX_SIZE_MB, cache_dir: Path = RESULT_CACHE_DIR) -> int:
+    """Drop least-recently-used entries until the cache fits in `max_size_mb`; returns entries removed."""
+    entries = sorted(list_entries(cache_dir), key=lambda e: e['last_access'])
+    total = sum(e['size'] for e in entries)
+    budget = max_size_mb * 1024 * 1024
+    removed = 0
+    for entry in entries:
+        if total <= budget:
+            break
+        shutil.rmtree(cache_dir / entry['key'], ignore_errors=True)
+        total -= entry['size']
+        removed += 1
+    return removed
+
+
+def _parse_quietly(parser: argparse.ArgumentParser, argv: Sequence[str]) -> Optional[argparse.Namespace]:
+    """Parse argv with the script's parser; None if it is invalid (main() reports the error)."""
+    with contextlib.redirect_stderr(io.StringIO()):
+        try:
+            return parser.parse_args(argv)
+        except SystemExit:
+            return None
+
+
+def cached_main(
+    main: Callable[[], Any],
+    script: str,
+    parser: argparse.ArgumentParser,
+    inputs: Callable[[argparse.Namespace], Sequence[Optional[str]]],
+    outputs: Callable[[argparse.Namespace], Sequence[str]],
+    cache_dir: Optional[Path] = None
+) -> Any:
+    """Run a script's `main()` through the result cache.
+
+    The command line is parsed with the script's `parser`; `inputs` maps the
+    arguments to the files or directories the run reads, `outputs` to every
+    file it writes (the output file and companions such as a `--json`
+    export). Only those declared outputs are stored and restored, and only
+    when the run rewrote all of them.
+    """
+    argv = sys.argv[1:]
+    if not result_cache_enabled() or any(arg in ('-h', '--help') for arg in argv):
+        return main()
+
+    args = _parse_quietly(parser, argv)
+    if args is None:
+        return main()
+
+    cache_dir = Path(cache_dir) if cache_dir else RESULT_CACHE_DIR
+    try:
+        output_paths = list(dict.fromkeys(str(Path(path).resolve()) for path in outputs(args)))
+        input_paths = [path for path in inputs(args) if path]
+        key = result_key(script, argv, input_hashes(input_paths), output_paths)
+    except (OSError, ValueError, KeyError):
+        return main()
+
+    entry = restore(key, cache_dir)
+    if entry is not None:
+        sys.stdout.write(entry['stdout'])
+        print(f"[cache] {entry['script']}: restored {len(entry['outputs'])} output file(s)")
+        return None
+
+    before = {path: _mtime(path) for path in output_paths}
+    tee = _Tee(sys.stdout)
+    with contextlib.redirect_stdout(tee):
+        result = main()
+    rewritten = all(_mtime(path) not in (None, before[path]) for path in output_paths)
+    if output_paths and rewritten:
+        try:
+            store(key, script, output_paths, tee.getvalue(), cache_dir)
+        except OSError as e:
+            print(f"[cache] not stored: {e}")
+    return result
+
+
+def cache_stats(cache_dir: Path = RESULT_CACHE_DIR) -> Dict[str, Any]:
+    """Summarize cache contents."""
+    entries = list_entries(cache_dir)
+    by_script: Dict[str, int] = {}
+    for entry in entries:
+        by_script[entry['script']] = by_script.get(entry['script'], 0) + 1
+    return {
+        'cache_dir': str(cache_dir),
+        'entries': len(entries),
+        'hits': sum(e.get('hits', 0) for e in entries),
+        'size_mb': round(sum(e['size'] for e in entries) / 1024 / 1024, 2),
+        'max_size_mb': MAX_SIZE_MB,
+        'by_script': by_script
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the analysis result cache')
+    parser.add_argument('--stats', action='store_true', help='Show cache statistics')
+    parser.add_argument('--evict', action='store_true', help='Evict least-recently-used entries now')
+    parser.add_argument('--max-size-mb', type=float, default=MAX_SIZE_MB, help='Size budget for --evict')
+    parser.add_argument('--clear', action='store_true', help='Delete all cached results')
+    parser.add_argument('--cache-dir', default=str(RESULT_CACHE_DIR), help='Cache directory')
+
+    args = parser.parse_args()
+    cache_dir = Path(args.cache_dir)
+
+    if args.clear and cache_dir.exists():
+        shutil.rmtree(cache_dir)
+        print(f"Cleared {cache_dir}")
+
+    if args.evict:
+        print(f"Evicted {evict(args.max_size_mb, cache_dir)} entries")
+
+    if args.stats or not (args.evict or args.clear):
+        print(json.dumps(cache_stats(cache_dir), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Diligence Pipeline Runner
+Runs the data-room flow (metrics, cohorts, cap table, round, waterfall,
+scorecard, memo, dashboard, report, package) as a DAG. Each step declares
+its input and output files, steps whose inputs are ready run concurrently
+in a process pool, and steps whose inputs, arguments and script are
+unchanged since the last successful run are skipped.
+
+Usage:
+    python run_pipeline.py --revenue data-room/raw/financials/revenue.csv \
+        --customers data-room/raw/customers/customers.csv \
+        --captable data-room/raw/captable/captable.csv \
+        --round-size 5000000 --pre-money 20000000 --company "Acme Corp"
+    python run_pipeline.py --revenue revenue.csv --customers customers.csv --workers 4 --force
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import runpy
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dataroom_cache import write_atomic
+from result_cache import input_hashes, script_version
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SKILLS_DIR = REPO_ROOT / 'skills'
+STATE_NAME = '.pipeline-state.json'
+
+DEFAULT_EXITS = '25000000,50000000,100000000,250000000,500000000'
+
+# Files DiligenceReport._load_data reads, relative to the data room
+# (generate_report.py needs reportlab, so it is not imported here)
+REPORT_INPUTS = ['analysis/metrics.json', 'analysis/parsed_captable.json', 'analysis/flags.md',
+                 'output/risk-scorecard.md', 'output/investment-memo.md']
+
+
+@dataclass
+class Step:
+    """One script invocation in the pipeline."""
+    name: str
+    script: str
+    argv: List[str]
+    inputs: List[str]
+    outputs: List[str]
+    optional: bool = False  # failure does not block downstream steps
+    after: List[str] = field(default_factory=list)  # run after these steps even without a shared file
+    depends_on: List[str] = field(default_factory=list)
+
+
+def analysis_files(script: str) -> List[str]:
+    """ANALYSIS_FILES declared by a report script next to its load_analysis_data."""
+    spec = importlib.util.spec_from_file_location(Path(script).stem, script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return list(module.ANALYSIS_FILES)
+
+
+def build_steps(
+    base_path: str,
+    company: str,
+    revenue: Optional[str] = None,
+    customers: Optional[str] = None,
+    captable: Optional[str] = None,
+    round_size: Optional[str] = None,
+    pre_money: Optional[str] = None,
+    exits: str = DEFAULT_EXITS
+) -> List[Step]:
+    """Declare the pipeline steps for one data room; steps without their raw inputs are left out."""
+    data_room = Path(base_path) / 'data-room'
+    analysis = data_room / 'analysis'
+    output = data_room / 'output'
+
+    def a(name: str) -> str:
+        return str(analysis / name)
+
+    def o(name: str) -> str:
+        return str(output / name)
+
+    def script(skill: str, name: str) -> str:
+        return str(SKILLS_DIR / skill / 'scripts' / name)
+
+    steps = []
+    if revenue and customers:
+        steps.append(Step(
+            'metrics', script('saas-metrics', 'calculate_metrics.py'),
+            ['--revenue', revenue, '--customers', customers, '--output', a('metrics.json')],
+            inputs=[revenue, customers], outputs=[a('metrics.json')]
+        ))
+        steps.append(Step(
+            'cohorts', script('saas-metrics', 'cohort_analysis.py'),
+            ['--revenue', revenue, '--customers', customers, '--output', a('cohorts.xlsx'), '--json'],
+            inputs=[revenue, customers], outputs=[a('cohorts.xlsx'), a('cohorts.json')]
+        ))
+
+    if captable:
+        steps.append(Step(
+            'captable', script('cap-table-modeling', 'parse_captable.py'),
+            ['--input', captable, '--output', a('parsed_captable.json')],
+            inputs=[captable], outputs=[a('parsed_captable.json')]
+        ))
+        waterfall_input = a('parsed_captable.json')
+        if round_size and pre_money:
+            steps.append(Step(
+                'round', script('cap-table-modeling', 'model_round.py'),
+                ['--captable', a('parsed_captable.json'), '--round-size', round_size,
+                 '--pre-money', pre_money, '--output', a('round_model.json')],
+                inputs=[a('parsed_captable.json')], outputs=[a('round_model.json')]
+            ))
+            waterfall_input = a('round_model.json')
+        steps.append(Step(
+            'waterfall', script('cap-table-modeling', 'waterfall_analysis.py'),
+            ['--captable', waterfall_input, '--exits', exits, '--output', a('waterfall.xlsx'), '--json'],
+            inputs=[waterfall_input], outputs=[a('waterfall.xlsx'), a('waterfall.json')]
+        ))
+
+    scorecard = script('risk-framework', 'generate_scorecard.py')
+    memo = script('data-room-templates', 'generate_memo.py')
+    dashboard = script('data-room-templates', 'generate_dashboard.py')
+    steps.extend([
+        Step('scorecard', scorecard,
+             ['--analysis-dir', str(analysis), '--output', o('risk-scorecard.md')],
+             inputs=[a(f) for f in analysis_files(scorecard) + ['flags.md']],
+             outputs=[o('risk-scorecard.md')]),
+        Step('memo', memo,
+             ['--analysis-dir', str(analysis), '--output', o('investment-memo.md'), '--company', company],
+             inputs=[a(f) for f in analysis_files(memo)], outputs=[o('investment-memo.md')],
+             after=['scorecard']),
+        Step('dashboard', dashboard,
+             ['--analysis-dir', str(analysis), '--output', o('metrics-dashboard.html')],
+             inputs=[a(f) for f in analysis_files(dashboard)], outputs=[o('metrics-dashboard.html')],
+             after=['memo']),
+        Step('report', script('diligence-report', 'generate_report.py'),
+             ['--company', company, '--data-room', str(data_room), '--output', o('diligence-report.pdf')],
+             inputs=[str(data_room / f) for f in REPORT_INPUTS], outputs=[o('diligence-report.pdf')],
+             optional=True),
+        Step('package', str(REPO_ROOT / 'scripts' / 'package_dataroom.py'),
+             ['--company', company, '--output', str(data_room / 'exports'), '--base-path', str(base_path)],
+             inputs=[str(analysis), str(output), str(data_room / 'raw')],
+             outputs=[str(data_room / 'exports')])
+    ])
+
+    link_dependencies(steps)
+    return steps
+
+
+def link_dependencies(steps: List[Step]) -> None:
+    """A step depends on every earlier step producing one of its inputs (or a file inside an input
+    directory), and on the earlier steps named in its `after`."""
+    for i, step in enumerate(steps):
+        inputs = [Path(p).resolve() for p in step.inputs]
+        step.depends_on = [
+            upstream.name for upstream in steps[:i]
+            if upstream.name in step.after
+            or any(out == inp or inp in out.parents
+                   for out in (Path(p).resolve() for p in upstream.outputs) for inp in inputs)
+        ]
+
+
+def step_signature(step: Step) -> str:
+    """Hash of the step's script version, arguments and input contents."""
+    payload = {
+        'version': script_version(step.script),
+        'argv': step.argv,
+        'inputs': input_hashes(step.inputs)
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def load_state(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(path: Path, state: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(tmp_path: Path):
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+    write_atomic(path, write)
+
+
+def is_current(step: Step, signature: str, state: Dict[str, Any]) -> bool:
+    """Inputs unchanged since the last successful run and its outputs still in place."""
+    previous = state.get(step.name, {})
+    if previous.get('signature') != signature:
+        return False
+    return input_hashes(step.outputs) == previous.get('outputs')
+
+
+def run_step(script: str, argv: List[str]) -> Dict[str, Any]:
+    """Run a skill script's `__main__` in this worker process, capturing its console output."""
+    started = time.perf_counter()
+    log = io.StringIO()
+    saved_argv, saved_path = sys.argv, list(sys.path)
+    sys.argv = [script, *argv]
+    sys.path.insert(0, str(Path(script).parent))
+    error = None
+    try:
+        with redirect_stdout(log), redirect_stderr(log):
+            runpy.run_path(script, run_name='__main__')
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            error = f'exited with status {e.code}'
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+        log.write(traceback.format_exc())
+    finally:
+        sys.argv = saved_argv
+        sys.path[:] = saved_path
+    return {'error': error, 'seconds': time.perf_counter() - started, 'log': log.getvalue()}
+
+
+def run_pipeline(
+    steps: List[Step],
+    state_path: Path,
+    workers: int = 4,
+    force: bool = False,
+    verbose: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """Run steps as soon as their dependencies finish; returns status and timing per step."""
+    state = {} if force else load_state(state_path)
+    by_name = {step.name: step for step in steps}
+    pending = dict(by_name)
+    running = {}
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def satisfied(name: str) -> bool:
+        status = results[name]['status']
+        return status in ('ran', 'skipped') or (status == 'failed' and by_name[name].optional)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name, step in list(pending.items()):
+                if any(dep not in results for dep in step.depends_on):
+                    continue
+                del pending[name]
+                if not all(satisfied(dep) for dep in step.depends_on):
+                    results[name] = {'status': 'blocked', 'seconds': 0.0}
+                    print(f"  [blocked] {name}")
+                    continue
+                signature = step_signature(step)
+                if is_current(step, signature, state):
+                    results[name] = {'status': 'skipped', 'seconds': 0.0}
+                    print(f"  [skipped] {name} (unchanged)")
+                    continue
+                for out in step.outputs:
+                    Path(out).parent.mkdir(parents=True, exist_ok=True)
+                future = pool.submit(run_step, step.script, step.argv)
+                running[future] = (step, signature, time.perf_counter())
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step, signature, submitted = running.pop(future)
+                outcome = future.result()
+                wall = time.perf_counter() - submitted
+                if outcome['error']:
+                    results[step.name] = {'status': 'failed', 'seconds': outcome['seconds'],
+                                          'wall': wall, 'error': outcome['error']}
+                    print(f"  [failed]  {step.name}: {outcome['error']}")
+                    state.pop(step.name, None)
+                else:
+                    results[step.name] = {'status': 'ran', 'seconds': outcome['seconds'], 'wall': wall}
+                    print(f"  [ran]     {step.name} ({outcome['seconds']:.2f}s)")
+                    state[step.name] = {'signature': signature, 'outputs': input_hashes(step.outputs)}
+                if verbose or outcome['error']:
+                    print('\n'.join(f"    | {line}" for line in outcome['log'].rstrip().splitlines()[-20:]))
+                save_state(state_path, state)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the diligence pipeline as a DAG of skill scripts')
+    parser.add_argument('--base-path', default='.', help='Directory containing data-room/')
+    parser.add_argument('--company', default='Target Company', help='Company name')
+    parser.add_argument('--revenue', help='Revenue CSV (metrics and cohort steps)')
+    parser.add_argument('--customers', help='Customers CSV (metrics and cohort steps)')
+    parser.add_argument('--captable', help='Cap table export (cap table and waterfall steps)')
+    parser.add_argument('--round-size', help='Proposed round size (round step)')
+    parser.add_argument('--pre-money', help='Pre-money valuation (round step)')
+    parser.add_argument('--exits', default=DEFAULT_EXITS, help='Exit values for the waterfall step')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help='Process pool size')
+    parser.add_argument('--force', action='store_true', help='Run every step even if unchanged')
+    parser.add_argument('--verbose', action='store_true', help='Show each step\'s console output')
+
+    args = parser.parse_args()
+
+    steps = build_steps(args.base_path, args.company, args.revenue, args.customers, args.captable,
+                        args.round_size, args.pre_money, args.exits)
+    state_path = Path(args.base_path) / 'data-room' / STATE_NAME
+
+    print(f"Running {len(steps)} steps with {args.workers} workers...")
+    started = time.perf_counter()
+    results = run_pipeline(steps, state_path, args.workers, args.force, args.verbose)
+    total = time.perf_counter() - started
+
+    print(f"\n=== PIPELINE SUMMARY ===")
+    print(f"{'Step':<12} {'Status':<9} {'Time':>8}  Depends on")
+    for step in steps:
+        result = results[step.name]
+        print(f"{step.name:<12} {result['status']:<9} {result['seconds']:>7.2f}s  "
+              f"{', '.join(step.depends_on) or '-'}")
+    step_time = sum(r['seconds'] for r in results.values())
+    print(f"\nWall time: {total:.2f}s (step time {step_time:.2f}s)")
+
+    if any(results[step.name]['status'] in ('failed', 'blocked') and not step.optional for step in steps):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
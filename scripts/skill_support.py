@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Skill Support
+The repository services the skill scripts share: read_table (the data-room
+Parquet cache) and cached_main (the analysis result cache), plus fold_chunks
+for the streaming parsers. Each service falls back to plain behaviour when
+its module is unavailable, and each skill script guards its import of this
+module with the same fallbacks, so a skill copied out of the repository
+still runs, just without the caches.
+
+Usage:
+    # From a skill script
+    sys.path.append(str(Path(__file__).resolve().parents[3] / 'scripts'))
+    from skill_support import cached_main, read_table
+
+    partials = fold_chunks((aggregate(chunk) for chunk in reader), merge, chunksize)
+"""
+
+from typing import Callable, Iterable, List
+
+import pandas as pd
+
+# Fold the buffered partials once those added since the last fold reach this
+# many chunk sizes (and at least the folded aggregate's size)
+FOLD_FACTOR = 4
+
+try:
+    from dataroom_cache import read_table
+except ImportError:
+    def read_table(path: str, **read_kwargs) -> pd.DataFrame:
+        """Parse a CSV or Excel file directly."""
+        if path.lower().endswith(('.xlsx', '.xls')):
+            return pd.read_excel(path, **read_kwargs)
+        return pd.read_csv(path, **read_kwargs)
+
+try:
+    from result_cache import cached_main
+except ImportError:
+    def cached_main(main, *args, **kwargs):
+        """Run `main()` uncached."""
+        return main()
+
+
+def fold_chunks(
+    parts: Iterable[pd.DataFrame],
+    fold: Callable[[List[pd.DataFrame]], pd.DataFrame],
+    chunksize: int,
+    factor: int = FOLD_FACTOR
+) -> List[pd.DataFrame]:
+    """Fold per-chunk aggregates as they arrive; returns the partials left to fold.
+
+    A fold waits until the partials buffered since the previous one are at
+    least as large as the aggregate it produced, so every fold is paid for by
+    as many new rows and the total work stays linear in the input, while
+    memory stays bounded by the aggregate rather than the rows read.
+    """
+    partials: List[pd.DataFrame] = []
+    buffered = 0
+    folded = 0
+    for part in parts:
+        partials.append(part)
+        buffered += len(part)
+        if buffered > max(factor * chunksize, folded) and len(partials) > 1:
+            partials = [fold(partials)]
+            folded = len(partials[0])
+            buffered = 0
+    return partials
@@ -12,15 +12,23 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'scripts'))
+try:
+    from skill_support import read_table
+except ImportError:  # skill used outside the repository
+    def read_table(path: str, **read_kwargs) -> pd.DataFrame:
+        if path.lower().endswith(('.xlsx', '.xls')):
+            return pd.read_excel(path, **read_kwargs)
+        return pd.read_csv(path, **read_kwargs)
+
+
 def load_data(filepath: str) -> pd.DataFrame:
     """Load financial data from CSV or Excel."""
     path = Path(filepath)
-    if path.suffix == '.csv':
-        df = pd.read_csv(filepath)
-    elif path.suffix in ['.xlsx', '.xls']:
-        df = pd.read_excel(filepath)
-    else:
+    if path.suffix not in ['.csv', '.xlsx', '.xls']:
         raise ValueError(f"Unsupported file type: {path.suffix}")
+
+    df = read_table(filepath)
     
     # Normalize columns
     df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_')
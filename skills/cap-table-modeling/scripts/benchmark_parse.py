@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Cap Table Parser Benchmark
+Times the column-wise generic parser against the original iterrows parser on
+a synthetic grant-level export and checks that both produce the same CapTable.
+With --carta-rows, also streams a synthetic Carta certificate ledger and
+reports parse time and peak memory against reading the whole file.
+
+Usage:
+    python benchmark_parse.py --grants 100000
+    python benchmark_parse.py --grants 0 --carta-rows 200000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from dataclasses import asdict
+from datetime import datetime
+
+from parse_captable import (
+    CapTable, Holder, ShareClass, normalize_columns, infer_holder_type, parse_generic_captable,
+    parse_carta_export
+)
+
+
+def generate_grant_export(grants: int, seed: int = 11, with_types: bool = False) -> pd.DataFrame:
+    """Generate a Carta-style grant ledger: a few founders and funds, many option grants."""
+    rng = np.random.default_rng(seed)
+    n_investors = max(grants // 500, 4)
+
+    names = np.array([f'Employee {i:06d}' for i in range(grants)], dtype=object)
+    classes = np.full(grants, 'Common Options', dtype=object)
+    prices = rng.choice([0.05, 0.25, 0.80, 1.40], size=grants)
+
+    names[:2] = ['Founder A', 'Founder B']
+    classes[:2] = 'Common'
+    names[2] = 'ESOP Pool (unallocated)'
+    classes[2] = 'Common'
+
+    investor_rows = np.arange(3, 3 + n_investors)
+    names[investor_rows] = [f'{label} {i}' for i, label in
+                            zip(range(n_investors), np.resize(['Ventures', 'Capital', 'Partners', 'Angel'], n_investors))]
+    classes[investor_rows] = np.resize(['Preferred Seed', 'Preferred Series A', 'Preferred Series B'], n_investors)
+    prices[investor_rows] = np.resize([1.0, 3.2, 7.5], n_investors)
+
+    shares = rng.integers(1_000, 50_000, grants)
+    shares[:2] = 4_000_000
+    shares[investor_rows] = rng.integers(200_000, 2_000_000, n_investors)
+
+    df = pd.DataFrame({
+        'Stakeholder': names,
+        'Security Type': classes,
+        'Quantity': shares,
+        'Share Price': prices,
+        'Cost Basis': np.round(shares * prices, 2)
+    })
+    if with_types:
+        df['Type'] = [infer_holder_type(n, c) for n, c in zip(df['Stakeholder'], df['Security Type'])]
+    return df
+
+
+def generate_carta_ledger(rows: int, seed: int = 13) -> pd.DataFrame:
+    """Generate a Carta-style certificate ledger with formatted numbers and mixed statuses."""
+    rng = np.random.default_rng(seed)
+    n_employees = max(rows // 4, 1)
+
+    kind = rng.choice(['Options', 'Common', 'Preferred', 'RSU'], size=rows, p=[0.7, 0.1, 0.15, 0.05])
+    employee = rng.integers(0, n_employees, rows)
+    names = np.char.add('Employee ', employee.astype(str)).astype(object)
+    fund = rng.integers(0, 40, rows)
+    names[kind == 'Preferred'] = np.char.add('Fund Partners ', fund[kind == 'Preferred'].astype(str))
+    founders = (kind == 'Common') & (rng.random(rows) < 0.1)
+    names[founders] = np.where(rng.random(founders.sum()) < 0.5, 'Founder A', 'Founder B')
+
+    series = rng.choice(['Series Seed Preferred', 'Series A Preferred', 'Series B Preferred'], size=rows)
+    share_class = np.where(kind == 'Preferred', series, 'Common')
+    price = np.where(kind == 'Preferred', rng.choice([1.0, 3.2, 7.5], size=rows),
+                     rng.choice([0.05, 0.25, 0.80], size=rows))
+    quantity = rng.integers(100, 20_000, rows)
+    status = rng.choice(['Outstanding', 'Cancelled', 'Exercised', 'Transferred'], size=rows,
+                        p=[0.85, 0.08, 0.05, 0.02])
+    vest_start = pd.Timestamp('2019-01-01') + pd.to_timedelta(rng.integers(0, 2000, rows), unit='D')
+    is_grant = np.isin(kind, ['Options', 'RSU'])
+
+    return pd.DataFrame({
+        'Stakeholder Name': names,
+        'Certificate ID': [f'CS-{i:07d}' for i in range(rows)],
+        'Security Type': kind,
+        'Share Class': share_class,
+        'Quantity Outstanding': [f'{q:,}' for q in quantity],
+        'Issue Price': [f'${p:,.2f}' for p in price],
+        'Cost Basis': np.where(is_grant, '', [f'${c:,.2f}' for c in quantity * price]),
+        'Status': status,
+        'Vesting Start Date': np.where(is_grant, vest_start.strftime('%Y-%m-%d'), ''),
+        'Vesting Schedule': np.where(is_grant, '1/48 monthly, 1yr cliff', ''),
+        'Vested Quantity': np.where(is_grant, [f'{q // 2:,}' for q in quantity], '')
+    })
+
+
+def time_carta_streaming(rows: int, chunksize: int) -> None:
+    """Stream-parse a synthetic Carta ledger and compare with a whole-file read."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'carta_ledger.csv')
+        generate_carta_ledger(rows).to_csv(path, index=False)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+
+        def measure(func):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            # Peak memory is measured on a second, traced run so tracing does not skew timings
+            tracemalloc.start()
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return result, elapsed, peak
+
+        arrays, stream_time, stream_peak = measure(lambda: parse_carta_export(path, chunksize=chunksize))
+        _, read_time, read_peak = measure(lambda: len(pd.read_csv(path)))
+
+    print(f"\nCarta ledger: {rows:,} rows ({size_mb:.1f} MB) -> {len(arrays):,} stakeholder positions")
+    print(f"Streamed parse ({chunksize:,}-row chunks): {stream_time:.3f}s, peak {stream_peak / 1e6:.1f} MB")
+    print(f"Whole-file read_csv only:        {read_time:.3f}s, peak {read_peak / 1e6:.1f} MB")
+
+
+def parse_generic_captable_loop(df: pd.DataFrame) -> CapTable:
+    """Original row-by-row parser, kept as the reference."""
+    df = normalize_columns(df)
+
+    # Calculate totals
+    total_shares = df['shares'].sum() if 'shares' in df.columns else 0
+
+    # Parse holders
+    holders = []
+    for _, row in df.iterrows():
+        holder_name = str(row.get('holder', 'Unknown'))
+        share_class = str(row.get('share_class', 'common'))
+        shares = int(row.get('shares', 0))
+        price = float(row.get('price_per_share', 0))
+        invested = float(row.get('invested', 0))
+
+        # Infer holder type if not provided
+        holder_type = row.get('holder_type', infer_holder_type(holder_name, share_class))
+
+        # Calculate ownership
+        ownership = float(row.get('ownership_pct', 0))
+        if ownership == 0 and total_shares > 0:
+            ownership = (shares / total_shares) * 100
+
+        holder = Holder(
+            name=holder_name,
+            holder_type=str(holder_type),
+            share_class=share_class,
+            shares=shares,
+            price_per_share=price,
+            invested=invested,
+            ownership_pct=round(ownership, 2),
+            fully_diluted_pct=round(ownership, 2)
+        )
+        holders.append(holder)
+
+    # Identify share classes
+    share_class_names = df['share_class'].unique() if 'share_class' in df.columns else ['common']
+    share_classes = []
+    for class_name in share_class_names:
+        class_df = df[df['share_class'] == class_name] if 'share_class' in df.columns else df
+        class_shares = class_df['shares'].sum()
+
+        share_type = 'common'
+        if 'preferred' in str(class_name).lower():
+            share_type = 'preferred'
+        elif 'option' in str(class_name).lower():
+            share_type = 'options'
+
+        sc = ShareClass(
+            name=str(class_name),
+            share_type=share_type,
+            issued=int(class_shares),
+            outstanding=int(class_shares)
+        )
+        share_classes.append(sc)
+
+    # Calculate option pool
+    pool_holders = [h for h in holders if h.holder_type == 'pool']
+    option_pool_shares = sum(h.shares for h in pool_holders)
+    option_pool_pct = (option_pool_shares / total_shares * 100) if total_shares > 0 else 0
+
+    return CapTable(
+        company_name='Unknown',
+        as_of_date=datetime.now().strftime('%Y-%m-%d'),
+        total_shares_authorized=int(total_shares),
+        total_shares_outstanding=int(total_shares),
+        fully_diluted_shares=int(total_shares),
+        share_classes=share_classes,
+        holders=holders,
+        option_pool_shares=int(option_pool_shares),
+        option_pool_pct=round(option_pool_pct, 2)
+    )
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cap table parsers')
+    parser.add_argument('--grants', type=int, default=100000, help='Number of grant rows')
+    parser.add_argument('--with-types', action='store_true', help='Include an explicit holder type column')
+    parser.add_argument('--carta-rows', type=int, default=0, help='Also stream a Carta ledger of this many rows')
+    parser.add_argument('--chunksize', type=int, default=50000, help='Chunk size for the Carta ledger')
+
+    args = parser.parse_args()
+    if args.carta_rows:
+        time_carta_streaming(args.carta_rows, args.chunksize)
+    if not args.grants:
+        return
+
+    df = generate_grant_export(args.grants, with_types=args.with_types)
+
+    started = time.perf_counter()
+    loop_table = parse_generic_captable_loop(df)
+    loop_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vector_table = parse_generic_captable(df)
+    vector_time = time.perf_counter() - started
+
+    match = asdict(loop_table) == asdict(vector_table)
+
+    print(f"Grants: {args.grants:,}  Share classes: {len(vector_table.share_classes)}")
+    print(f"iterrows:    {loop_time:8.3f}s")
+    print(f"Column-wise: {vector_time:8.3f}s  ({loop_time / vector_time:.1f}x)")
+    print(f"CapTable identical: {'yes' if match else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
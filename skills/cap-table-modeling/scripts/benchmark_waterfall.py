@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Waterfall Engine Benchmark
+Times the vectorized multi-exit waterfall against the per-exit loop on a
+synthetic cap table and checks that both produce the same ExitScenario output.
+
+Usage:
+    python benchmark_waterfall.py --exits 10000 --holders 200
+"""
+
+import argparse
+import time
+import numpy as np
+from dataclasses import asdict
+from typing import Any, Dict
+
+from waterfall_analysis import (
+    calculate_waterfall, calculate_waterfall_matrix, matrix_to_scenarios
+)
+
+
+def generate_cap_table(holders: int, seed: int = 7) -> Dict[str, Any]:
+    """Generate a synthetic cap table with common holders and four preferred series."""
+    rng = np.random.default_rng(seed)
+    classes = [
+        ('common', 0.0001),
+        ('preferred_seed', 1.0),
+        ('preferred_series_a', 2.5),
+        ('preferred_series_b', 6.0),
+        ('preferred_series_c', 12.0)
+    ]
+
+    rows = []
+    for i in range(holders):
+        class_name, price = classes[i % len(classes)]
+        shares = int(rng.integers(10_000, 2_000_000))
+        rows.append({
+            'name': f'Holder {i:04d}',
+            'holder_type': 'founder' if class_name == 'common' else 'investor',
+            'share_class': class_name,
+            'shares': shares,
+            'price_per_share': price,
+            'invested': round(shares * price, 2)
+        })
+
+    total = sum(r['shares'] for r in rows)
+    return {'fully_diluted_shares': total, 'holders': rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark waterfall engines')
+    parser.add_argument('--exits', type=int, default=10000, help='Number of exit values')
+    parser.add_argument('--holders', type=int, default=200, help='Number of cap table rows')
+    parser.add_argument('--max-exit', type=float, default=2e9, help='Largest exit value')
+
+    args = parser.parse_args()
+
+    cap_table = generate_cap_table(args.holders)
+    exit_values = np.linspace(0, args.max_exit, args.exits).tolist()
+
+    started = time.perf_counter()
+    loop_scenarios = [calculate_waterfall(cap_table, ev) for ev in exit_values]
+    loop_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matrix = calculate_waterfall_matrix(cap_table, np.asarray(exit_values))
+    matrix_time = time.perf_counter() - started
+    vector_scenarios = matrix_to_scenarios(matrix)
+    vector_time = time.perf_counter() - started
+
+    holder_match = all(
+        [asdict(hp) for hp in a.holders_proceeds] == [asdict(hp) for hp in b.holders_proceeds]
+        for a, b in zip(loop_scenarios, vector_scenarios)
+    )
+    class_diff = max(
+        abs(a.share_class_proceeds[name] - b.share_class_proceeds[name])
+        for a, b in zip(loop_scenarios, vector_scenarios)
+        for name in a.share_class_proceeds
+    )
+
+    print(f"Exits: {args.exits:,}  Holders: {args.holders:,}")
+    print(f"Loop:       {loop_time:8.3f}s")
+    print(f"Matrix:     {matrix_time:8.3f}s  ({loop_time / matrix_time:.0f}x)")
+    print(f"Matrix + ExitScenario objects: {vector_time:.3f}s  ({loop_time / vector_time:.1f}x)")
+    print(f"Holder proceeds identical: {'yes' if holder_match else 'NO'}")
+    print(f"Max class proceeds difference: ${class_diff:.6f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Columnar Cap Table
+Struct-of-arrays cap table shared by the cap-table-modeling scripts: one NumPy
+array per holder field, with holder names, share classes and holder types
+interned into small lookup tables and referenced by integer codes.
+
+Usage:
+    from cap_table_arrays import CapTableArrays
+    arrays = CapTableArrays.from_cap_table(cap_table)
+    class_totals = arrays.class_shares()
+    holders = arrays.to_holders()  # list of dicts, same keys as parse_captable.Holder
+
+    # Functions taking either form
+    arrays = as_arrays(cap_table_or_arrays)
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+from dataclasses import dataclass, field
+
+HOLDER_FIELDS = [
+    'name', 'holder_type', 'share_class', 'shares', 'price_per_share', 'invested',
+    'ownership_pct', 'fully_diluted_pct', 'vesting_start', 'vesting_end', 'vested_shares',
+    'vesting_schedule'
+]
+
+
+def intern(values: Sequence[Any]) -> Tuple[np.ndarray, List[str]]:
+    """Intern values as (int32 codes, lookup table) in order of first appearance."""
+    codes, uniques = pd.factorize(np.array([str(v) for v in values], dtype=object), sort=False)
+    return codes.astype(np.int32), [str(u) for u in uniques]
+
+
+def to_dates(values: Optional[Sequence[Any]], size: int) -> np.ndarray:
+    """Convert optional date values to datetime64[D], NaT where missing."""
+    if values is None:
+        return np.full(size, np.datetime64('NaT'), dtype='datetime64[D]')
+    return pd.to_datetime(pd.Series(values, dtype=object), errors='coerce').to_numpy().astype('datetime64[D]')
+
+
+def to_texts(values: Optional[Sequence[Any]], size: int) -> np.ndarray:
+    """Convert optional text values to an object array, None where missing or blank."""
+    if values is None:
+        return np.full(size, None, dtype=object)
+    texts = np.empty(size, dtype=object)
+    texts[:] = [None if pd.isna(v) or not str(v).strip() else str(v).strip() for v in values]
+    return texts
+
+
+@dataclass
+class CapTableArrays:
+    """Holder table as parallel arrays.
+
+    Row i is one cap table line (a holder may appear on several lines, e.g.
+    once per share class). `name_idx`, `class_idx` and `type_code` index into
+    `names`, `class_names` and `type_names`.
+    """
+    names: List[str]
+    class_names: List[str]
+    type_names: List[str]
+    name_idx: np.ndarray
+    class_idx: np.ndarray
+    type_code: np.ndarray
+    shares: np.ndarray
+    price_per_share: np.ndarray
+    invested: np.ndarray
+    ownership_pct: np.ndarray
+    fully_diluted_pct: np.ndarray
+    vesting_start: np.ndarray
+    vesting_end: np.ndarray
+    vested_shares: np.ndarray
+    vesting_schedule: np.ndarray  # schedule description per row, None where not stated
+    fully_diluted_shares: int = 0
+    option_pool_shares: int = 0
+    option_pool_pct: float = 0.0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_columns(
+        cls,
+        names: Sequence[str],
+        holder_types: Sequence[str],
+        share_classes: Sequence[str],
+        shares: Sequence[int],
+        price_per_share: Sequence[float],
+        invested: Sequence[float],
+        ownership_pct: Optional[Sequence[float]] = None,
+        fully_diluted_pct: Optional[Sequence[float]] = None,
+        vesting_start: Optional[Sequence[Any]] = None,
+        vesting_end: Optional[Sequence[Any]] = None,
+        vested_shares: Optional[Sequence[int]] = None,
+        vesting_schedule: Optional[Sequence[Any]] = None,
+        fully_diluted_shares: Optional[int] = None,
+        option_pool_shares: int = 0,
+        option_pool_pct: float = 0.0,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> 'CapTableArrays':
+        """Build from per-field columns."""
+        name_idx, name_table = intern(names)
+        class_idx, class_table = intern(share_classes)
+        type_code, type_table = intern(holder_types)
+        shares = np.asarray(shares, dtype=np.int64)
+        size = len(shares)
+
+        if ownership_pct is None:
+            total = shares.sum()
+            ownership_pct = shares / total * 100 if total > 0 else np.zeros(size)
+        ownership_pct = np.asarray(ownership_pct, dtype=np.float64)
+
+        return cls(
+            names=name_table,
+            class_names=class_table,
+            type_names=type_table,
+            name_idx=name_idx,
+            class_idx=class_idx,
+            type_code=type_code.astype(np.int8) if len(type_table) < 128 else type_code,
+            shares=shares,
+            price_per_share=np.asarray(price_per_share, dtype=np.float64),
+            invested=np.asarray(invested, dtype=np.float64),
+            ownership_pct=ownership_pct,
+            fully_diluted_pct=(ownership_pct.copy() if fully_diluted_pct is None
+                               else np.asarray(fully_diluted_pct, dtype=np.float64)),
+            vesting_start=to_dates(vesting_start, size),
+            vesting_end=to_dates(vesting_end, size),
+            vested_shares=(np.zeros(size, dtype=np.int64) if vested_shares is None
+                           else np.asarray(vested_shares, dtype=np.int64)),
+            vesting_schedule=to_texts(vesting_schedule, size),
+            fully_diluted_shares=int(shares.sum() if fully_diluted_shares is None else fully_diluted_shares),
+            option_pool_shares=int(option_pool_shares),
+            option_pool_pct=float(option_pool_pct),
+            metadata=dict(metadata or {})
+        )
+
+    @classmethod
+    def from_cap_table(cls, cap_table: Dict[str, Any]) -> 'CapTableArrays':
+        """Build from a cap table dict (parsed cap table or post-money cap table)."""
+        cap_data = cap_table.get('cap_table', cap_table)
+        holders = cap_data.get('holders', [])
+
+        def column(key: str, default: Any) -> List[Any]:
+            return [h.get(key, default) for h in holders]
+
+        shares = column('shares', 0)
+        fully_diluted_shares = cap_data.get('fully_diluted_shares',
+                                            cap_data.get('total_shares_outstanding', sum(shares)))
+        metadata = {k: v for k, v in cap_data.items()
+                    if k not in ('holders', 'fully_diluted_shares', 'option_pool_shares', 'option_pool_pct')}
+
+        ownership = column('ownership_pct', None)
+        if any(pct is None for pct in ownership):
+            ownership = None
+        fully_diluted = column('fully_diluted_pct', None)
+        if any(pct is None for pct in fully_diluted):
+            fully_diluted = None
+
+        return cls.from_columns(
+            names=[h['name'] for h in holders],
+            holder_types=column('holder_type', 'other'),
+            share_classes=column('share_class', 'common'),
+            shares=shares,
+            price_per_share=column('price_per_share', 0.0),
+            invested=column('invested', 0.0),
+            ownership_pct=ownership,
+            fully_diluted_pct=fully_diluted,
+            vesting_start=column('vesting_start', None),
+            vesting_end=column('vesting_end', None),
+            vested_shares=column('vested_shares', 0),
+            vesting_schedule=column('vesting_schedule', None),
+            fully_diluted_shares=fully_diluted_shares,
+            option_pool_shares=cap_data.get('option_pool_shares', 0),
+            option_pool_pct=cap_data.get('option_pool_pct', 0.0),
+            metadata=metadata
+        )
+
+    def __len__(self) -> int:
+        return len(self.shares)
+
+    @property
+    def holder_names(self) -> np.ndarray:
+        """Holder name per row."""
+        return np.asarray(self.names, dtype=object)[self.name_idx]
+
+    @property
+    def share_class(self) -> np.ndarray:
+        """Share class name per row."""
+        return np.asarray(self.class_names, dtype=object)[self.class_idx]
+
+    @property
+    def holder_type(self) -> np.ndarray:
+        """Holder type per row."""
+        return np.asarray(self.type_names, dtype=object)[self.type_code]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the arrays (interned tables excluded)."""
+        return sum(getattr(self, name).nbytes for name in (
+            'name_idx', 'class_idx', 'type_code', 'shares', 'price_per_share', 'invested',
+            'ownership_pct', 'fully_diluted_pct', 'vesting_start', 'vesting_end', 'vested_shares'
+        ))
+
+    def type_mask(self, holder_type: str) -> np.ndarray:
+        """Boolean mask of rows with the given holder type."""
+        if holder_type not in self.type_names:
+            return np.zeros(len(self), dtype=bool)
+        return self.type_code == self.type_names.index(holder_type)
+
+    def class_shares(self) -> np.ndarray:
+        """Total shares per share class, aligned with class_names."""
+        return np.bincount(self.class_idx, weights=self.shares,
+                           minlength=len(self.class_names)).astype(np.int64)
+
+    def class_invested(self) -> np.ndarray:
+        """Total invested per share class, summed in row order."""
+        return np.bincount(self.class_idx, weights=self.invested, minlength=len(self.class_names))
+
+    def class_first_row(self) -> np.ndarray:
+        """Index of the first row of each share class."""
+        first = np.empty(len(self.class_names), dtype=np.int64)
+        rows = np.arange(len(self))
+        first[self.class_idx[::-1]] = rows[::-1]
+        return first
+
+    def rows(self) -> List[Tuple[Any, ...]]:
+        """Row tuples of plain Python values in HOLDER_FIELDS order."""
+        def dates(values: np.ndarray) -> List[Optional[str]]:
+            out = values.astype(str).astype(object)
+            out[np.isnat(values)] = None
+            return out.tolist()
+
+        columns = [
+            self.holder_names.tolist(),
+            self.holder_type.tolist(),
+            self.share_class.tolist(),
+            self.shares.tolist(),
+            self.price_per_share.tolist(),
+            self.invested.tolist(),
+            self.ownership_pct.tolist(),
+            self.fully_diluted_pct.tolist(),
+            dates(self.vesting_start),
+            dates(self.vesting_end),
+            self.vested_shares.tolist(),
+            self.vesting_schedule.tolist()
+        ]
+        return list(zip(*columns))
+
+    def to_holders(self) -> List[Dict[str, Any]]:
+        """Holder dicts with the parse_captable.Holder keys, built column-wise."""
+        return [dict(zip(HOLDER_FIELDS, row)) for row in self.rows()]
+
+    def to_cap_table(self) -> Dict[str, Any]:
+        """Cap table dict in the parsed_captable.json layout."""
+        return {
+            **self.metadata,
+            'fully_diluted_shares': self.fully_diluted_shares,
+            'option_pool_shares': self.option_pool_shares,
+            'option_pool_pct': self.option_pool_pct,
+            'holders': self.to_holders()
+        }
+
+
+def as_arrays(cap_table: Union[Dict[str, Any], CapTableArrays]) -> CapTableArrays:
+    """Accept either a cap table dict or an already columnar cap table."""
+    if isinstance(cap_table, CapTableArrays):
+        return cap_table
+    return CapTableArrays.from_cap_table(cap_table)
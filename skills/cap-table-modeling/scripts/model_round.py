@@ -5,13 +5,31 @@ Models new investment rounds and their dilutive impact.
 
 Usage:
     python model_round.py --captable captable.json --round-size 5000000 --pre-money 20000000 --output round_model.json
+
+    # Term-sheet sensitivity grid (axes are VALUE, V1,V2,... or MIN:MAX:POINTS)
+    python model_round.py --captable captable.json --grid --pre-money 10000000:60000000:50 \
+        --round-size 2000000:12000000:20 --option-pool 10,12,15,18,20 --output round_grid.parquet
 """
 
 import argparse
 import json
+import sys
+import numpy as np
+import pandas as pd
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, Any, List, Optional
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, asdict, field, replace
+
+from cap_table_arrays import CapTableArrays
+from vesting import STANDARD_SCHEDULE, vested_view
+
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'scripts'))
+try:
+    from skill_support import cached_main
+except ImportError:  # skill used outside the repository
+    def cached_main(main, *args, **kwargs):
+        return main()
 
 
 @dataclass
@@ -54,6 +72,27 @@ class RoundModel:
     option_pool_post: float
 
 
+@dataclass
+class RoundGrid:
+    """Round outcomes over a (pre-money x round size x pool target) grid.
+
+    Every array is indexed [pre_money, investment, pool_target]; holder_pct
+    has a trailing holder axis in cap table order.
+    """
+    pre_money: np.ndarray
+    investment: np.ndarray
+    pool_target: np.ndarray
+    holders: CapTableArrays
+    post_money: np.ndarray
+    price_per_share: np.ndarray
+    pool_increase_shares: np.ndarray
+    new_shares: np.ndarray
+    total_shares_post: np.ndarray
+    new_investor_pct: np.ndarray
+    option_pool_post: np.ndarray
+    holder_pct: np.ndarray
+
+
 def load_cap_table(path: str) -> Dict[str, Any]:
     """Load parsed cap table JSON."""
     with open(path, 'r') as f:
@@ -106,6 +145,7 @@ def model_round(
     current_shares = cap_data['fully_diluted_shares']
     current_pool_pct = cap_data.get('option_pool_pct', 0)
     holders = cap_data.get('holders', [])
+    arrays = CapTableArrays.from_cap_table(cap_data)
 
     # Handle option pool shuffle if needed
     pool_shuffle = calculate_option_pool_shuffle(
@@ -145,32 +185,32 @@ def model_round(
         participating=participating
     )
 
+    # Shares don't change, but percentage does
+    post_pct = (arrays.shares / total_shares_post * 100).tolist()
+    dilution = (arrays.ownership_pct - arrays.shares / total_shares_post * 100).tolist()
+
     # Calculate dilution impacts
-    dilution_impacts = []
-    for holder in holders:
-        pre_shares = holder['shares']
-        pre_pct = holder['ownership_pct']
-
-        # Shares don't change, but percentage does
-        post_pct = (pre_shares / total_shares_post) * 100
-        dilution = pre_pct - post_pct
-
-        impact = DilutionImpact(
-            holder_name=holder['name'],
-            holder_type=holder['holder_type'],
+    dilution_impacts = [
+        DilutionImpact(
+            holder_name=name,
+            holder_type=holder_type,
             pre_round_shares=pre_shares,
             pre_round_pct=round(pre_pct, 2),
             post_round_shares=pre_shares,
-            post_round_pct=round(post_pct, 2),
-            dilution_pct=round(dilution, 2)
+            post_round_pct=round(post, 2),
+            dilution_pct=round(diluted, 2)
         )
-        dilution_impacts.append(impact)
+        for name, holder_type, pre_shares, pre_pct, post, diluted in zip(
+            arrays.holder_names.tolist(), arrays.holder_type.tolist(), arrays.shares.tolist(),
+            arrays.ownership_pct.tolist(), post_pct, dilution
+        )
+    ]
 
     # Build post-money cap table
     post_holders = []
-    for holder in holders:
+    for holder, post in zip(holders, post_pct):
         post_holder = holder.copy()
-        post_holder['ownership_pct'] = round((holder['shares'] / total_shares_post) * 100, 2)
+        post_holder['ownership_pct'] = round(post, 2)
         post_holder['fully_diluted_pct'] = post_holder['ownership_pct']
         post_holders.append(post_holder)
 
@@ -209,6 +249,118 @@ def model_round(
     )
 
 
+def model_round_grid(
+    cap_table: Dict[str, Any],
+    investments: np.ndarray,
+    pre_moneys: np.ndarray,
+    target_option_pools: np.ndarray
+) -> RoundGrid:
+    """Model every combination of round terms in one broadcast pass.
+
+    Matches model_round() point for point, including its integer truncation
+    of pool and investor shares.
+    """
+    cap_data = cap_table.get('cap_table', cap_table)
+    current_shares = cap_data['fully_diluted_shares']
+    current_pool_pct = cap_data.get('option_pool_pct', 0)
+    holders = CapTableArrays.from_cap_table(cap_data)
+
+    pre_money = np.asarray(pre_moneys, dtype=np.float64)
+    investment = np.asarray(investments, dtype=np.float64)
+    pool_target = np.asarray(target_option_pools, dtype=np.float64)
+
+    # Broadcast axes: [pre_money, investment, pool_target]
+    pre = pre_money[:, None, None]
+    inv = investment[None, :, None]
+    pool = pool_target[None, None, :]
+
+    # Option pool shuffle depends only on the pool target
+    additional_pool_pct = pool - current_pool_pct
+    pool_increase_shares = np.where(
+        pool > current_pool_pct,
+        np.trunc(current_shares * (additional_pool_pct / 100)),
+        0
+    ).astype(np.int64)
+    shares_after_pool = current_shares + pool_increase_shares
+
+    price_per_share = pre / shares_after_pool
+    new_shares = np.trunc(inv / price_per_share).astype(np.int64)
+    total_shares_post = shares_after_pool + new_shares
+
+    new_investor_pct = new_shares / total_shares_post * 100
+    pool_shares = cap_data.get('option_pool_shares', 0) + pool_increase_shares
+    option_pool_post = pool_shares / total_shares_post * 100
+
+    holder_shares = holders.shares.astype(np.float64)
+    holder_pct = holder_shares / total_shares_post[..., None] * 100
+
+    return RoundGrid(
+        pre_money=pre_money,
+        investment=investment,
+        pool_target=pool_target,
+        holders=holders,
+        post_money=pre + inv + np.zeros_like(pool),
+        price_per_share=np.broadcast_to(price_per_share, new_shares.shape),
+        pool_increase_shares=np.broadcast_to(pool_increase_shares, new_shares.shape),
+        new_shares=new_shares,
+        total_shares_post=total_shares_post,
+        new_investor_pct=new_investor_pct,
+        option_pool_post=np.broadcast_to(option_pool_post, new_shares.shape),
+        holder_pct=holder_pct
+    )
+
+
+def grid_to_frame(grid: RoundGrid) -> pd.DataFrame:
+    """Flatten a RoundGrid to one row per term combination, one column per holder."""
+    shape = grid.new_shares.shape
+    pre, inv, pool = np.meshgrid(grid.pre_money, grid.investment, grid.pool_target, indexing='ij')
+
+    df = pd.DataFrame({
+        'pre_money': pre.ravel(),
+        'round_size': inv.ravel(),
+        'pool_target_pct': pool.ravel(),
+        'post_money': grid.post_money.ravel(),
+        'price_per_share': grid.price_per_share.ravel(),
+        'pool_increase_shares': grid.pool_increase_shares.ravel(),
+        'new_shares': grid.new_shares.ravel(),
+        'new_investor_pct': grid.new_investor_pct.ravel(),
+        'option_pool_post_pct': grid.option_pool_post.ravel()
+    })
+
+    # float32 keeps the per-holder block compact; percentages need no more precision
+    holder_block = pd.DataFrame(
+        grid.holder_pct.reshape(int(np.prod(shape)), -1).astype(np.float32),
+        columns=[f"{name} %" for name in grid.holders.holder_names.tolist()]
+    )
+    return pd.concat([df, holder_block], axis=1)
+
+
+def export_grid(grid: RoundGrid, output_path: str) -> None:
+    """Write the grid table to Parquet (.parquet) or Excel (anything else)."""
+    df = grid_to_frame(grid)
+    if output_path.endswith('.parquet'):
+        df.to_parquet(output_path, index=False)
+        return
+
+    with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
+        df.to_excel(writer, sheet_name='Round Grid', index=False)
+        money_format = writer.book.add_format({'num_format': '$#,##0'})
+        pct_format = writer.book.add_format({'num_format': '0.00'})
+        sheet = writer.sheets['Round Grid']
+        sheet.set_column(0, 1, 15, money_format)
+        sheet.set_column(2, 2, 12, pct_format)
+        sheet.set_column(3, 3, 15, money_format)
+        sheet.set_column(4, len(df.columns) - 1, 14, pct_format)
+
+
+def parse_axis(spec: str) -> np.ndarray:
+    """Parse a grid axis given as VALUE, V1,V2,... or MIN:MAX:POINTS."""
+    if ':' in spec:
+        low, high, points = [x.strip() for x in spec.split(':')]
+        return np.linspace(float(low), float(high), int(points))
+    return np.array([float(x) for x in spec.split(',')])
+
+
 def format_summary(model: RoundModel) -> str:
     """Format round model as summary text."""
     terms = model.round_terms
@@ -236,47 +388,93 @@ Option Pool Post-Round: {model.option_pool_post:.1f}%
     return summary
 
 
-def main():
+def round_model_output(model: RoundModel) -> Dict[str, Any]:
+    """The round_model.json payload for a modeled round."""
+    return {
+        'round_terms': asdict(model.round_terms),
+        'new_investor_ownership': model.new_investor_ownership,
+        'option_pool_post': model.option_pool_post,
+        'dilution_impacts': [asdict(d) for d in model.dilution_impacts],
+        'post_money_cap_table': model.post_money_cap_table,
+        'modeled_at': datetime.now().isoformat()
+    }
+
+
+def grid_output_path(output: str) -> str:
+    """Where --grid writes: the --output path, as Parquet unless it already names a .parquet or .xlsx file."""
+    if output.endswith(('.parquet', '.xlsx')):
+        return output
+    return str(Path(output).with_suffix('.parquet'))
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description='Model investment round')
     parser.add_argument('--captable', required=True, help='Parsed cap table JSON')
-    parser.add_argument('--round-size', type=float, required=True, help='Investment amount')
-    parser.add_argument('--pre-money', type=float, required=True, help='Pre-money valuation')
+    parser.add_argument('--round-size', required=True, help='Investment amount (grid axis with --grid)')
+    parser.add_argument('--pre-money', required=True, help='Pre-money valuation (grid axis with --grid)')
     parser.add_argument('--round-name', default='Series A', help='Round name')
-    parser.add_argument('--option-pool', type=float, default=0, help='Target option pool %')
+    parser.add_argument('--option-pool', default='0', help='Target option pool %% (grid axis with --grid)')
+    parser.add_argument('--grid', action='store_true',
+                        help='Sweep every combination of --pre-money, --round-size and --option-pool')
     parser.add_argument('--liq-pref', type=float, default=1.0, help='Liquidation preference')
     parser.add_argument('--participating', action='store_true', help='Participating preferred')
-    parser.add_argument('--output', default='round_model.json', help='Output file')
+    parser.add_argument('--output', default='round_model.json',
+                        help='Output file (with --grid: .parquet or .xlsx, other suffixes become .parquet)')
+    parser.add_argument('--vested-as-of', metavar='DATE',
+                        help='Count only shares vested on this date (unallocated pool excluded)')
+    parser.add_argument('--exit-date', metavar='DATE',
+                        help='Count shares vested at this exit date, after --acceleration')
+    parser.add_argument('--acceleration', type=float, default=0.0,
+                        help='Fraction of unvested shares accelerated on exit (with --exit-date)')
+    return parser
+
 
-    args = parser.parse_args()
+def main():
+    args = build_parser().parse_args()
 
     # Load cap table
     print(f"Loading cap table from {args.captable}...")
     cap_table = load_cap_table(args.captable)
 
+    if args.vested_as_of or args.exit_date:
+        schedule = replace(STANDARD_SCHEDULE, acceleration=args.acceleration)
+        view = vested_view(cap_table, as_of=args.vested_as_of, exit_date=args.exit_date, schedule=schedule)
+        print(f"Using vested shares only: {view.fully_diluted_shares:,} fully diluted")
+        cap_table = view.to_cap_table()
+
+    if args.grid:
+        grid = model_round_grid(
+            cap_table=cap_table,
+            investments=parse_axis(args.round_size),
+            pre_moneys=parse_axis(args.pre_money),
+            target_option_pools=parse_axis(args.option_pool)
+        )
+        output_path = grid_output_path(args.output)
+        print(f"Exporting {grid.new_shares.size:,} term combinations to {output_path}...")
+        export_grid(grid, output_path)
+
+        print(f"\n=== {args.round_name} TERM GRID ===\n")
+        print(f"Pre-money:   ${grid.pre_money.min():,.0f} - ${grid.pre_money.max():,.0f} ({len(grid.pre_money)} values)")
+        print(f"Round size:  ${grid.investment.min():,.0f} - ${grid.investment.max():,.0f} ({len(grid.investment)} values)")
+        print(f"Pool target: {grid.pool_target.min():.1f}% - {grid.pool_target.max():.1f}% ({len(grid.pool_target)} values)")
+        print(f"New investor ownership: {grid.new_investor_pct.min():.1f}% - {grid.new_investor_pct.max():.1f}%")
+        print(f"\nOutput saved to {output_path}")
+        return
+
     # Model round
     print(f"Modeling {args.round_name}...")
     model = model_round(
         cap_table=cap_table,
-        investment=args.round_size,
-        pre_money=args.pre_money,
+        investment=float(args.round_size),
+        pre_money=float(args.pre_money),
         round_name=args.round_name,
-        target_option_pool=args.option_pool,
+        target_option_pool=float(args.option_pool),
         liquidation_pref=args.liq_pref,
         participating=args.participating
     )
 
-    # Output
-    output = {
-        'round_terms': asdict(model.round_terms),
-        'new_investor_ownership': model.new_investor_ownership,
-        'option_pool_post': model.option_pool_post,
-        'dilution_impacts': [asdict(d) for d in model.dilution_impacts],
-        'post_money_cap_table': model.post_money_cap_table,
-        'modeled_at': datetime.now().isoformat()
-    }
-
     with open(args.output, 'w') as f:
-        json.dump(output, f, indent=2, default=str)
+        json.dump(round_model_output(model), f, indent=2, default=str)
 
     # Print summary
     print(format_summary(model))
@@ -284,4 +482,6 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    cached_main(main, __file__, build_parser(),
+                inputs=lambda args: [args.captable],
+                outputs=lambda args: [grid_output_path(args.output) if args.grid else args.output])
@@ -5,16 +5,39 @@ Parses cap table exports from Carta, Pulley, or standard CSV format.
 
 Usage:
     python parse_captable.py --input captable.csv --output parsed_captable.json
+    python parse_captable.py --input carta_ledger.csv --format carta --chunksize 50000
+
+    # In-process (DataFrame or path)
+    from parse_captable import parse_cap_table
+    parsed = parse_cap_table(df)
 """
 
 import argparse
 import json
+import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict, field
 
+from cap_table_arrays import CapTableArrays
+from vesting import apply_vesting
+
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'scripts'))
+try:
+    from skill_support import cached_main, fold_chunks, read_table
+except ImportError:  # skill used outside the repository
+    def cached_main(main, *args, **kwargs):
+        return main()
+    def fold_chunks(parts, fold, chunksize, factor=None):
+        return list(parts)  # folded once by the caller, without bounding memory
+    def read_table(path: str, **read_kwargs) -> pd.DataFrame:
+        if path.lower().endswith(('.xlsx', '.xls')):
+            return pd.read_excel(path, **read_kwargs)
+        return pd.read_csv(path, **read_kwargs)
+
 
 @dataclass
 class ShareClass:
@@ -45,6 +68,7 @@ class Holder:
     vesting_start: Optional[str] = None
     vesting_end: Optional[str] = None
     vested_shares: int = 0
+    vesting_schedule: Optional[str] = None
 
 
 @dataclass
@@ -126,170 +150,482 @@ def infer_holder_type(holder_name: str, share_class: str) -> str:
     return 'other'
 
 
-def parse_generic_captable(df: pd.DataFrame) -> CapTable:
-    """Parse generic CSV cap table format."""
+def infer_holder_types(holder_names: List[str], share_classes: List[str]) -> np.ndarray:
+    """Vectorized infer_holder_type over whole columns (same rules, same precedence)."""
+    names = pd.Series(holder_names, dtype=str).str.lower()
+    classes = pd.Series(share_classes, dtype=str).fillna('').str.lower()
+
+    conditions = [
+        names.str.contains('founder', regex=False),
+        names.str.contains('pool|esop|option'),
+        names.str.contains('ventures|capital|partners|fund|investor'),
+        classes.str.contains('preferred', regex=False),
+        classes.str.contains('common', regex=False) & names.str.contains('employee', regex=False)
+    ]
+    choices = ['founder', 'pool', 'investor', 'investor', 'employee']
+    return np.select([c.to_numpy(dtype=bool) for c in conditions], choices, default='other').astype(object)
+
+
+def parse_generic_arrays(df: pd.DataFrame) -> CapTableArrays:
+    """Parse generic CSV cap table format into columnar arrays."""
     df = normalize_columns(df)
 
+    def column(name: str, default) -> pd.Series:
+        return df[name] if name in df.columns else pd.Series(default, index=df.index)
+
     # Calculate totals
     total_shares = df['shares'].sum() if 'shares' in df.columns else 0
 
-    # Parse holders
-    holders = []
-    for _, row in df.iterrows():
-        holder_name = str(row.get('holder', 'Unknown'))
-        share_class = str(row.get('share_class', 'common'))
-        shares = int(row.get('shares', 0))
-        price = float(row.get('price_per_share', 0))
-        invested = float(row.get('invested', 0))
-
-        # Infer holder type if not provided
-        holder_type = row.get('holder_type', infer_holder_type(holder_name, share_class))
-
-        # Calculate ownership
-        ownership = float(row.get('ownership_pct', 0))
-        if ownership == 0 and total_shares > 0:
-            ownership = (shares / total_shares) * 100
-
-        holder = Holder(
-            name=holder_name,
-            holder_type=str(holder_type),
-            share_class=share_class,
-            shares=shares,
-            price_per_share=price,
-            invested=invested,
-            ownership_pct=round(ownership, 2),
-            fully_diluted_pct=round(ownership, 2)
-        )
-        holders.append(holder)
+    holder_names = [str(x) for x in column('holder', 'Unknown').tolist()]
+    share_class_values = [str(x) for x in column('share_class', 'common').tolist()]
+    shares = column('shares', 0).to_numpy().astype(np.int64)
+
+    # Infer holder type if not provided
+    if 'holder_type' in df.columns:
+        holder_types = np.array([str(x) for x in df['holder_type'].tolist()], dtype=object)
+    else:
+        holder_types = infer_holder_types(holder_names, share_class_values)
+
+    # Calculate ownership where the export does not state it
+    ownership = column('ownership_pct', 0).to_numpy().astype(np.float64)
+    if total_shares > 0:
+        ownership = np.where(ownership == 0, shares / total_shares * 100, ownership)
+    ownership = [round(x, 2) for x in ownership.tolist()]
+
+    # Calculate option pool
+    option_pool_shares = int(shares[holder_types == 'pool'].sum())
+    option_pool_pct = (option_pool_shares / total_shares * 100) if total_shares > 0 else 0
+
+    return CapTableArrays.from_columns(
+        names=holder_names,
+        holder_types=holder_types,
+        share_classes=share_class_values,
+        shares=shares,
+        price_per_share=column('price_per_share', 0).to_numpy().astype(np.float64),
+        invested=column('invested', 0).to_numpy().astype(np.float64),
+        ownership_pct=ownership,
+        fully_diluted_shares=int(total_shares),
+        option_pool_shares=option_pool_shares,
+        option_pool_pct=round(option_pool_pct, 2),
+        metadata={
+            'company_name': 'Unknown',
+            'as_of_date': datetime.now().strftime('%Y-%m-%d'),
+            'total_shares_authorized': int(total_shares),
+            'total_shares_outstanding': int(total_shares)
+        }
+    )
 
-    # Identify share classes
-    share_class_names = df['share_class'].unique() if 'share_class' in df.columns else ['common']
-    share_classes = []
-    for class_name in share_class_names:
-        class_df = df[df['share_class'] == class_name] if 'share_class' in df.columns else df
-        class_shares = class_df['shares'].sum()
 
+def build_share_classes(arrays: CapTableArrays) -> List[ShareClass]:
+    """Per-class totals in order of first appearance."""
+    share_classes = []
+    for class_name, class_shares in zip(arrays.class_names, arrays.class_shares().tolist()):
         share_type = 'common'
-        if 'preferred' in str(class_name).lower():
+        if 'preferred' in class_name.lower():
             share_type = 'preferred'
-        elif 'option' in str(class_name).lower():
+        elif 'option' in class_name.lower():
             share_type = 'options'
 
         sc = ShareClass(
-            name=str(class_name),
+            name=class_name,
             share_type=share_type,
-            issued=int(class_shares),
-            outstanding=int(class_shares)
+            issued=class_shares,
+            outstanding=class_shares
         )
         share_classes.append(sc)
+    return share_classes
 
-    # Calculate option pool
-    pool_holders = [h for h in holders if h.holder_type == 'pool']
-    option_pool_shares = sum(h.shares for h in pool_holders)
-    option_pool_pct = (option_pool_shares / total_shares * 100) if total_shares > 0 else 0
+
+def parse_generic_captable(df: pd.DataFrame) -> CapTable:
+    """Parse generic CSV cap table format."""
+    arrays = parse_generic_arrays(df)
+    holders = [Holder(*row) for row in arrays.rows()]
 
     return CapTable(
-        company_name='Unknown',
-        as_of_date=datetime.now().strftime('%Y-%m-%d'),
-        total_shares_authorized=int(total_shares),
-        total_shares_outstanding=int(total_shares),
-        fully_diluted_shares=int(total_shares),
-        share_classes=share_classes,
+        company_name=arrays.metadata['company_name'],
+        as_of_date=arrays.metadata['as_of_date'],
+        total_shares_authorized=arrays.metadata['total_shares_authorized'],
+        total_shares_outstanding=arrays.metadata['total_shares_outstanding'],
+        fully_diluted_shares=arrays.fully_diluted_shares,
+        share_classes=build_share_classes(arrays),
         holders=holders,
-        option_pool_shares=int(option_pool_shares),
-        option_pool_pct=round(option_pool_pct, 2)
+        option_pool_shares=arrays.option_pool_shares,
+        option_pool_pct=arrays.option_pool_pct
     )
 
 
-def generate_summary(cap_table: CapTable) -> Dict[str, Any]:
-    """Generate summary statistics from cap table."""
+@dataclass
+class ExportLayout:
+    """Column aliases and row rules for a cap table platform export."""
+    name: str
+    columns: Dict[str, List[str]]  # canonical field -> header aliases, first match wins
+    inactive_statuses: List[str] = field(default_factory=lambda: list(INACTIVE_STATUSES))
+
+
+# Certificates/grants no longer held by the stakeholder
+INACTIVE_STATUSES = ['cancelled', 'canceled', 'transferred', 'repurchased', 'expired',
+                     'exercised', 'forfeited', 'converted', 'retired']
+
+# Security types that have not been paid for (no cost basis, options-style vesting)
+GRANT_SECURITY_PATTERN = 'option|rsu|restricted stock unit|warrant|iso|nso|sar'
+
+VESTING_COLUMNS = {
+    'vesting_start': ['vesting start date', 'vesting start', 'vesting commencement date', 'vest start date'],
+    'vesting_end': ['vesting end date', 'vesting end', 'fully vested date', 'final vest date'],
+    'vested_shares': ['vested quantity', 'vested shares', 'vested', 'vested to date'],
+    'vesting_schedule': ['vesting schedule', 'vesting schedule name', 'vesting plan', 'vesting terms']
+}
+
+CARTA_LAYOUT = ExportLayout(
+    name='carta',
+    columns={
+        'holder': ['stakeholder name', 'stakeholder', 'shareholder', 'holder name', 'name'],
+        'security_type': ['security type', 'security'],
+        'share_class': ['share class', 'stock class', 'share class name', 'class'],
+        'shares': ['quantity outstanding', 'shares outstanding', 'outstanding', 'quantity',
+                   'shares', 'number of shares'],
+        'price_per_share': ['issue price', 'price per share', 'original issue price', 'exercise price'],
+        'invested': ['cost basis', 'cash paid', 'amount paid', 'consideration'],
+        'status': ['status', 'certificate status'],
+        **VESTING_COLUMNS
+    }
+)
+
+PULLEY_LAYOUT = ExportLayout(
+    name='pulley',
+    columns={
+        'holder': ['stakeholder', 'stakeholder name', 'holder name', 'name'],
+        'security_type': ['grant type', 'security type', 'security'],
+        'share_class': ['security class', 'share class', 'stock class', 'class'],
+        'shares': ['quantity', 'shares', 'number of shares', 'granted', 'shares granted'],
+        'price_per_share': ['exercise price', 'strike price', 'price per share', 'issue price'],
+        'invested': ['cash paid', 'amount paid', 'cost basis', 'purchase price'],
+        'status': ['status', 'grant status'],
+        **VESTING_COLUMNS
+    }
+)
+
+EXPORT_LAYOUTS = {'carta': CARTA_LAYOUT, 'pulley': PULLEY_LAYOUT}
+
+
+def resolve_layout_columns(headers: List[str], layout: ExportLayout) -> Dict[str, str]:
+    """Map each canonical field to the export header that provides it."""
+    by_lower = {str(h).lower().strip(): h for h in headers}
+    resolved = {}
+    for canonical, aliases in layout.columns.items():
+        for alias in aliases:
+            if alias in by_lower and by_lower[alias] not in resolved.values():
+                resolved[canonical] = by_lower[alias]
+                break
+
+    missing = [c for c in ('holder', 'shares') if c not in resolved]
+    if missing:
+        raise ValueError(f"{layout.name} export is missing required columns: {', '.join(missing)}")
+    return resolved
+
+
+def _numeric(series: pd.Series) -> pd.Series:
+    """Parse money/quantity columns that may carry $ signs, commas or blanks."""
+    if series.dtype == object or pd.api.types.is_string_dtype(series):
+        series = series.astype(str).str.replace(r'[$,\s]', '', regex=True)
+    return pd.to_numeric(series, errors='coerce').fillna(0)
+
+
+def aggregate_export_chunk(chunk: pd.DataFrame, columns: Dict[str, str], layout: ExportLayout) -> pd.DataFrame:
+    """Reduce raw export rows to one row per (stakeholder, share class)."""
+    chunk = chunk.rename(columns={header: canonical for canonical, header in columns.items()})
+
+    if 'status' in chunk.columns:
+        status = chunk['status'].astype(str).str.lower().str.strip()
+        chunk = chunk[~status.isin(layout.inactive_statuses)]
+
+    holder = chunk['holder'].astype(str).str.strip()
+    security = (chunk['security_type'].fillna('').astype(str).str.strip()
+                if 'security_type' in chunk.columns else pd.Series('', index=chunk.index))
+    is_grant = security.str.lower().str.contains(GRANT_SECURITY_PATTERN)
+
+    # Grants are their own class; issued stock uses the stated class, then the security type
+    share_class = (chunk['share_class'].astype(str).str.strip() if 'share_class' in chunk.columns
+                   else pd.Series('', index=chunk.index))
+    share_class = share_class.where(~share_class.isin(['', 'nan', 'None']), security)
+    share_class = share_class.where(~is_grant, security)
+    share_class = share_class.where(share_class != '', 'common')
+
+    shares = _numeric(chunk['shares'])
+    price = _numeric(chunk['price_per_share']) if 'price_per_share' in chunk.columns else shares * 0.0
+    if 'invested' in chunk.columns:
+        invested = _numeric(chunk['invested'])
+    else:
+        invested = (shares * price).where(~is_grant, 0.0)
+
+    frame = pd.DataFrame({
+        'holder': holder,
+        'share_class': share_class,
+        'security_type': security,
+        'is_grant': is_grant,
+        'shares': shares,
+        'price_x_shares': price * shares,
+        'max_price': price,
+        'invested': invested,
+        'vested_shares': _numeric(chunk['vested_shares']) if 'vested_shares' in chunk.columns else shares * 0,
+        'vesting_start': (pd.to_datetime(chunk['vesting_start'], errors='coerce')
+                          if 'vesting_start' in chunk.columns else pd.NaT),
+        'vesting_end': (pd.to_datetime(chunk['vesting_end'], errors='coerce')
+                        if 'vesting_end' in chunk.columns else pd.NaT),
+        'vesting_schedule': (chunk['vesting_schedule'].replace(r'^\s*$', np.nan, regex=True)
+                             if 'vesting_schedule' in chunk.columns else None),
+        'rows': 1
+    })
+    return fold_export_aggregates([frame])
+
+
+def fold_export_aggregates(partials: List[pd.DataFrame]) -> pd.DataFrame:
+    """Merge per-chunk aggregates; associative, so chunks can be folded in any grouping."""
+    frame = pd.concat(partials, ignore_index=True) if len(partials) > 1 else partials[0]
+    return frame.groupby(['holder', 'share_class'], sort=False, as_index=False).agg(
+        security_type=('security_type', 'first'),
+        is_grant=('is_grant', 'any'),
+        shares=('shares', 'sum'),
+        price_x_shares=('price_x_shares', 'sum'),
+        max_price=('max_price', 'max'),
+        invested=('invested', 'sum'),
+        vested_shares=('vested_shares', 'sum'),
+        vesting_start=('vesting_start', 'min'),
+        vesting_end=('vesting_end', 'max'),
+        vesting_schedule=('vesting_schedule', 'first'),
+        rows=('rows', 'sum')
+    )
+
+
+def iter_export_chunks(source, chunksize: int, usecols: List[str]):
+    """Yield DataFrame chunks from a CSV path (streamed), an Excel path or a DataFrame."""
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize][usecols]
+    elif str(source).lower().endswith(('.xlsx', '.xls')):
+        df = read_table(str(source))[usecols]
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    else:
+        yield from pd.read_csv(source, usecols=usecols, chunksize=chunksize, thousands=',',
+                               skipinitialspace=True)
+
+
+def read_export_headers(source) -> List[str]:
+    """Column headers of an export without reading its rows."""
+    if isinstance(source, pd.DataFrame):
+        return list(source.columns)
+    if str(source).lower().endswith(('.xlsx', '.xls')):
+        return list(read_table(str(source)).columns)
+    return list(pd.read_csv(source, nrows=0).columns)
+
+
+def parse_platform_export(source, layout: ExportLayout, chunksize: int = 100_000) -> CapTableArrays:
+    """Parse a Carta or Pulley export, aggregating per stakeholder and class as it streams.
+
+    Only the layout's columns are read, chunk by chunk; each chunk is reduced
+    to per-(stakeholder, share class) totals before the next is read, so
+    memory is bounded by the number of stakeholders rather than ledger rows.
+    Cancelled/transferred/exercised rows are dropped. Price per share is the
+    share-weighted average across a stakeholder's certificates or grants.
+    """
+    columns = resolve_layout_columns(read_export_headers(source), layout)
+    usecols = list(columns.values())
+
+    source_rows = 0
+
+    def aggregates():
+        nonlocal source_rows
+        for chunk in iter_export_chunks(source, chunksize, usecols):
+            source_rows += len(chunk)
+            yield aggregate_export_chunk(chunk, columns, layout)
+
+    partials = fold_chunks(aggregates(), fold_export_aggregates, chunksize)
+    agg = fold_export_aggregates(partials) if partials else aggregate_export_chunk(
+        pd.DataFrame(columns=usecols), columns, layout)
+    agg = agg[agg['shares'] > 0]
+
+    shares = agg['shares'].to_numpy().round().astype(np.int64)
+    total_shares = int(shares.sum())
+    price = np.divide(agg['price_x_shares'].to_numpy(), agg['shares'].to_numpy(),
+                      out=agg['max_price'].to_numpy(dtype=np.float64).copy(),
+                      where=agg['shares'].to_numpy() > 0)
+
+    holder_names = agg['holder'].tolist()
+    share_class_values = agg['share_class'].tolist()
+    holder_types = infer_holder_types(holder_names, share_class_values)
+    # Unattributed grants belong to employees; the unallocated pool is already 'pool'
+    holder_types[(holder_types == 'other') & agg['is_grant'].to_numpy()] = 'employee'
+
+    ownership = shares / total_shares * 100 if total_shares > 0 else np.zeros(len(shares))
+    ownership = [round(x, 2) for x in ownership.tolist()]
+    option_pool_shares = int(shares[holder_types == 'pool'].sum())
+    option_pool_pct = (option_pool_shares / total_shares * 100) if total_shares > 0 else 0
+
+    return CapTableArrays.from_columns(
+        names=holder_names,
+        holder_types=holder_types,
+        share_classes=share_class_values,
+        shares=shares,
+        price_per_share=price,
+        invested=agg['invested'].to_numpy(dtype=np.float64),
+        ownership_pct=ownership,
+        vesting_start=agg['vesting_start'].tolist(),
+        vesting_end=agg['vesting_end'].tolist(),
+        vesting_schedule=agg['vesting_schedule'].tolist(),
+        vested_shares=agg['vested_shares'].to_numpy().round().astype(np.int64),
+        fully_diluted_shares=total_shares,
+        option_pool_shares=option_pool_shares,
+        option_pool_pct=round(option_pool_pct, 2),
+        metadata={
+            'company_name': 'Unknown',
+            'as_of_date': datetime.now().strftime('%Y-%m-%d'),
+            'total_shares_authorized': total_shares,
+            'total_shares_outstanding': total_shares,
+            'source_format': layout.name,
+            'source_rows': source_rows
+        }
+    )
+
+
+def parse_carta_export(source, chunksize: int = 100_000) -> CapTableArrays:
+    """Parse a Carta certificate/grant ledger export."""
+    return parse_platform_export(source, CARTA_LAYOUT, chunksize)
+
+
+def parse_pulley_export(source, chunksize: int = 100_000) -> CapTableArrays:
+    """Parse a Pulley stakeholder/grant export."""
+    return parse_platform_export(source, PULLEY_LAYOUT, chunksize)
+
+
+def generate_arrays_summary(arrays: CapTableArrays, share_class_count: int) -> Dict[str, Any]:
+    """Summary statistics of a parsed cap table (totals, ownership by type, implied valuation)."""
     summary = {
-        'total_shares': cap_table.total_shares_outstanding,
-        'fully_diluted': cap_table.fully_diluted_shares,
-        'option_pool_pct': cap_table.option_pool_pct,
-        'share_class_count': len(cap_table.share_classes),
-        'holder_count': len(cap_table.holders)
+        'total_shares': arrays.metadata.get('total_shares_outstanding', arrays.fully_diluted_shares),
+        'fully_diluted': arrays.fully_diluted_shares,
+        'option_pool_pct': arrays.option_pool_pct,
+        'share_class_count': share_class_count,
+        'holder_count': len(arrays)
     }
 
-    # Ownership by type
-    ownership_by_type = {}
-    for holder in cap_table.holders:
-        if holder.holder_type not in ownership_by_type:
-            ownership_by_type[holder.holder_type] = 0
-        ownership_by_type[holder.holder_type] += holder.ownership_pct
-    summary['ownership_by_type'] = ownership_by_type
+    # Ownership by type, summed in row order
+    type_totals = np.bincount(arrays.type_code, weights=arrays.ownership_pct, minlength=len(arrays.type_names))
+    summary['ownership_by_type'] = dict(zip(arrays.type_names, type_totals.tolist()))
 
-    # Total invested
-    total_invested = sum(h.invested for h in cap_table.holders)
-    summary['total_invested'] = total_invested
+    summary['total_invested'] = float(arrays.invested.sum())
 
     # Implied valuation (if we have price per share for preferred)
-    preferred_holders = [h for h in cap_table.holders if 'preferred' in h.share_class.lower()]
-    if preferred_holders:
-        latest_price = max(h.price_per_share for h in preferred_holders)
+    preferred_classes = [i for i, name in enumerate(arrays.class_names) if 'preferred' in name.lower()]
+    preferred = np.isin(arrays.class_idx, preferred_classes)
+    if preferred.any():
+        latest_price = float(arrays.price_per_share[preferred].max())
         if latest_price > 0:
-            summary['implied_valuation'] = latest_price * cap_table.fully_diluted_shares
+            summary['implied_valuation'] = latest_price * arrays.fully_diluted_shares
 
     return summary
 
 
-def main():
+def resolve_format(source, source_format: str = 'auto') -> str:
+    """Detect the export format from the header row unless one is given."""
+    if source_format != 'auto':
+        return source_format
+    return detect_format(pd.DataFrame(columns=read_export_headers(source)))
+
+
+def parse_cap_table_arrays(
+    source,
+    source_format: str = 'auto',
+    chunksize: int = 100_000,
+    vesting_as_of: Optional[str] = None
+) -> CapTableArrays:
+    """Parse a cap table DataFrame or file path into columnar form."""
+    source_format = resolve_format(source, source_format)
+    if source_format in EXPORT_LAYOUTS:
+        arrays = parse_platform_export(source, EXPORT_LAYOUTS[source_format], chunksize)
+    else:
+        df = source if isinstance(source, pd.DataFrame) else read_table(str(source))
+        arrays = parse_generic_arrays(df)
+
+    if vesting_as_of:
+        arrays = apply_vesting(arrays, vesting_as_of)
+    return arrays
+
+
+def cap_table_output(arrays: CapTableArrays) -> Dict[str, Any]:
+    """The parsed_captable.json payload for a parsed cap table."""
+    share_classes = build_share_classes(arrays)
+    return {
+        'cap_table': {
+            'company_name': arrays.metadata['company_name'],
+            'as_of_date': arrays.metadata['as_of_date'],
+            'total_shares_authorized': arrays.metadata['total_shares_authorized'],
+            'total_shares_outstanding': arrays.metadata['total_shares_outstanding'],
+            'fully_diluted_shares': arrays.fully_diluted_shares,
+            'option_pool_shares': arrays.option_pool_shares,
+            'option_pool_pct': arrays.option_pool_pct,
+            'share_classes': [asdict(sc) for sc in share_classes],
+            'holders': arrays.to_holders()
+        },
+        'summary': generate_arrays_summary(arrays, len(share_classes)),
+        'parsed_at': datetime.now().isoformat()
+    }
+
+
+def parse_cap_table(
+    source,
+    source_format: str = 'auto',
+    chunksize: int = 100_000,
+    vesting_as_of: Optional[str] = None
+) -> Dict[str, Any]:
+    """Parse a cap table DataFrame or file path into the parsed_captable.json payload."""
+    return cap_table_output(parse_cap_table_arrays(source, source_format, chunksize, vesting_as_of))
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description='Parse cap table CSV/Excel files')
     parser.add_argument('--input', required=True, help='Input cap table file')
     parser.add_argument('--output', default='parsed_captable.json', help='Output JSON file')
     parser.add_argument('--format', choices=['carta', 'pulley', 'generic', 'auto'],
                         default='auto', help='Input format')
 
-    args = parser.parse_args()
+    parser.add_argument('--chunksize', type=int, default=100000,
+                        help='Rows per streamed chunk for Carta/Pulley CSV exports')
+    parser.add_argument('--vesting-as-of', metavar='DATE',
+                        help='Fill vesting_end and vested_shares as of this date (4y/1y cliff default schedule)')
+    return parser
 
-    # Load file
-    print(f"Loading cap table from {args.input}...")
-    if args.input.endswith('.xlsx') or args.input.endswith('.xls'):
-        df = pd.read_excel(args.input)
-    else:
-        df = pd.read_csv(args.input)
 
-    print(f"Found {len(df)} rows, {len(df.columns)} columns")
+def main():
+    args = build_parser().parse_args()
 
-    # Detect format
+    # Detect format from the header row
+    print(f"Loading cap table from {args.input}...")
+    detected_format = resolve_format(args.input, args.format)
     if args.format == 'auto':
-        detected_format = detect_format(df)
         print(f"Detected format: {detected_format}")
-    else:
-        detected_format = args.format
 
     # Parse based on format
-    cap_table = parse_generic_captable(df)
-
-    # Generate summary
-    summary = generate_summary(cap_table)
+    if detected_format in EXPORT_LAYOUTS:
+        source = args.input
+    else:
+        source = read_table(args.input)
+        print(f"Found {len(source)} rows, {len(source.columns)} columns")
+    arrays = parse_cap_table_arrays(source, detected_format, args.chunksize, args.vesting_as_of)
+    if detected_format in EXPORT_LAYOUTS:
+        print(f"Streamed {arrays.metadata['source_rows']} rows into {len(arrays)} stakeholder positions")
 
-    # Output
-    output = {
-        'cap_table': {
-            'company_name': cap_table.company_name,
-            'as_of_date': cap_table.as_of_date,
-            'total_shares_authorized': cap_table.total_shares_authorized,
-            'total_shares_outstanding': cap_table.total_shares_outstanding,
-            'fully_diluted_shares': cap_table.fully_diluted_shares,
-            'option_pool_shares': cap_table.option_pool_shares,
-            'option_pool_pct': cap_table.option_pool_pct,
-            'share_classes': [asdict(sc) for sc in cap_table.share_classes],
-            'holders': [asdict(h) for h in cap_table.holders]
-        },
-        'summary': summary,
-        'parsed_at': datetime.now().isoformat()
-    }
+    output = cap_table_output(arrays)
+    summary = output['summary']
 
     with open(args.output, 'w') as f:
         json.dump(output, f, indent=2, default=str)
 
     # Print summary
     print("\n=== CAP TABLE SUMMARY ===")
-    print(f"Total Shares: {cap_table.total_shares_outstanding:,}")
-    print(f"Holders: {len(cap_table.holders)}")
-    print(f"Share Classes: {len(cap_table.share_classes)}")
-    print(f"Option Pool: {cap_table.option_pool_pct:.1f}%")
+    print(f"Total Shares: {summary['total_shares']:,}")
+    print(f"Holders: {summary['holder_count']}")
+    print(f"Share Classes: {summary['share_class_count']}")
+    print(f"Option Pool: {arrays.option_pool_pct:.1f}%")
     print(f"\nOwnership by Type:")
     for holder_type, pct in summary['ownership_by_type'].items():
         print(f"  {holder_type}: {pct:.1f}%")
@@ -301,4 +637,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    cached_main(main, __file__, build_parser(),
+                inputs=lambda args: [args.input], outputs=lambda args: [args.output])
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Multi-Round Financing Simulator
+Chains financing rounds (e.g. Seed -> A -> B) in memory, applying option pool
+shuffles, pro-rata participation and anti-dilution adjustments. Every
+intermediate cap table is memoized by a hash of the terms that produced it,
+so branching financing paths reuse their shared prefixes.
+
+Usage:
+    python round_sequence.py --captable parsed_captable.json --rounds rounds.json --output sequence.json
+
+    # rounds.json: a list of rounds, or {"paths": {"name": [rounds], ...}}
+    [
+      {"round_name": "Series A", "investment": 8000000, "pre_money": 32000000, "option_pool": 15},
+      {"round_name": "Series B", "investment": 15000000, "pre_money": 20000000,
+       "anti_dilution": "full_ratchet", "pro_rata_participation": 0.5}
+    ]
+"""
+
+import argparse
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, asdict, field
+
+from model_round import RoundTerms, load_cap_table, calculate_option_pool_shuffle
+
+ANTI_DILUTION_TYPES = ('broad_weighted_average', 'full_ratchet', 'none')
+
+
+@dataclass
+class RoundStep:
+    """One round applied on top of the previous cap table."""
+    key: str
+    round_terms: RoundTerms
+    cap_table: Dict[str, Any]
+    pro_rata_shares: Dict[str, int] = field(default_factory=dict)
+    anti_dilution_shares: Dict[str, int] = field(default_factory=dict)
+    pool_increase_shares: int = 0
+    cache_hit: bool = False
+
+
+def canonical_hash(payload: Any) -> str:
+    """Stable hash of JSON-serializable data."""
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def series_class_name(round_name: str) -> str:
+    """Share class used for a round's preferred stock (matches model_round)."""
+    return f'preferred_{round_name.lower().replace(" ", "_")}'
+
+
+def series_registry(cap_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Preferred series with their conversion prices and protective terms.
+
+    Cap tables produced by this module carry the registry under `series`;
+    for a parsed cap table it is derived from the preferred holders, using
+    RoundTerms defaults for anti-dilution and pro-rata rights.
+    """
+    if 'series' in cap_data:
+        return cap_data['series']
+
+    defaults = RoundTerms(round_name='', investment_amount=0, pre_money_valuation=0)
+    prices: Dict[str, float] = {}
+    for holder in cap_data.get('holders', []):
+        class_name = holder.get('share_class', 'common')
+        if 'preferred' in class_name.lower():
+            prices[class_name] = max(prices.get(class_name, 0.0), holder.get('price_per_share', 0.0))
+
+    return [
+        {
+            'share_class': class_name,
+            'original_price': price,
+            'conversion_price': price,
+            'anti_dilution': defaults.anti_dilution,
+            'pro_rata_rights': defaults.pro_rata_rights
+        }
+        for class_name, price in prices.items()
+    ]
+
+
+def adjusted_conversion_price(
+    series: Dict[str, Any],
+    new_price: float,
+    shares_before: float,
+    investment: float,
+    new_shares: float
+) -> float:
+    """Conversion price after a round priced at `new_price`.
+
+    Broad-based weighted average: CP2 = CP1 * (A + B) / (A + C), with A the
+    fully diluted shares before the round, B the shares the new money would
+    buy at CP1 and C the shares actually issued. Full ratchet: CP2 = new price.
+    """
+    current = series['conversion_price']
+    if current <= 0 or new_price >= current:
+        return current
+
+    if series['anti_dilution'] == 'full_ratchet':
+        return new_price
+    if series['anti_dilution'] == 'broad_weighted_average':
+        return current * (shares_before + investment / current) / (shares_before + new_shares)
+    return current
+
+
+def round_terms_from_spec(spec: Dict[str, Any]) -> RoundTerms:
+    """Build RoundTerms from a rounds-file entry."""
+    anti_dilution = spec.get('anti_dilution', 'broad_weighted_average')
+    if anti_dilution not in ANTI_DILUTION_TYPES:
+        raise ValueError(f"Unknown anti-dilution type '{anti_dilution}' "
+                         f"(expected one of {', '.join(ANTI_DILUTION_TYPES)})")
+
+    investment = float(spec['investment'])
+    pre_money = float(spec['pre_money'])
+    return RoundTerms(
+        round_name=spec.get('round_name', 'New Round'),
+        investment_amount=investment,
+        pre_money_valuation=pre_money,
+        post_money_valuation=pre_money + investment,
+        option_pool_increase=float(spec.get('option_pool', 0.0)),
+        liquidation_preference=float(spec.get('liq_pref', 1.0)),
+        participating=bool(spec.get('participating', False)),
+        participation_cap=float(spec.get('participation_cap', 0.0)),
+        anti_dilution=anti_dilution,
+        pro_rata_rights=bool(spec.get('pro_rata_rights', True))
+    )
+
+
+def apply_round(
+    cap_data: Dict[str, Any],
+    terms: RoundTerms,
+    pro_rata_participation: float = 1.0
+) -> RoundStep:
+    """Apply one round to a cap table without modifying it.
+
+    `terms.option_pool_increase` is read as the target post-shuffle pool %.
+    The round is priced on the pre-money, post-shuffle share count (as in
+    model_round); anti-dilution shares for earlier series are then issued on
+    top of that price, and existing holders with pro-rata rights take
+    `pro_rata_participation` of their pro-rata slice of the new money, with
+    the lead investor taking the rest.
+    """
+    current_shares = cap_data['fully_diluted_shares']
+    holders = [holder.copy() for holder in cap_data.get('holders', [])]
+    series = [s.copy() for s in series_registry(cap_data)]
+
+    # Option pool shuffle, credited to the pool holder
+    pool_shuffle = calculate_option_pool_shuffle(
+        pre_money=terms.pre_money_valuation,
+        investment=terms.investment_amount,
+        current_pool_pct=cap_data.get('option_pool_pct', 0),
+        target_pool_pct=terms.option_pool_increase,
+        fully_diluted_shares=current_shares
+    )
+    pool_increase = pool_shuffle['pool_increase_shares']
+    if pool_increase:
+        pool_holder = next((h for h in holders if h.get('holder_type') == 'pool'), None)
+        if pool_holder is None:
+            pool_holder = {'name': 'Option Pool', 'holder_type': 'pool', 'share_class': 'common',
+                           'shares': 0, 'price_per_share': 0.0, 'invested': 0.0}
+            holders.append(pool_holder)
+        pool_holder['shares'] += pool_increase
+
+    shares_after_pool = current_shares + pool_increase
+    price_per_share = terms.pre_money_valuation / shares_after_pool
+    round_shares = terms.investment_amount / price_per_share
+
+    # Anti-dilution: reprice earlier series and issue the as-converted difference
+    anti_dilution_shares: Dict[str, int] = {}
+    for s in series:
+        new_cp = adjusted_conversion_price(s, price_per_share, shares_after_pool,
+                                           terms.investment_amount, round_shares)
+        if new_cp >= s['conversion_price']:
+            continue
+        ratio = s['conversion_price'] / new_cp
+        for holder in holders:
+            if holder.get('share_class') == s['share_class']:
+                extra = int(holder['shares'] * ratio) - holder['shares']
+                holder['shares'] += extra
+                anti_dilution_shares[holder['name']] = anti_dilution_shares.get(holder['name'], 0) + extra
+        s['conversion_price'] = new_cp
+
+    # Pro-rata: existing rights holders keep their pre-round ownership
+    rights_classes = {s['share_class'] for s in series if s['pro_rata_rights']}
+    holdings: Dict[str, int] = {}
+    for holder in cap_data.get('holders', []):
+        holdings[holder['name']] = holdings.get(holder['name'], 0) + holder['shares']
+    entitled = {holder['name'] for holder in cap_data.get('holders', [])
+                if holder.get('share_class') in rights_classes}
+
+    class_name = series_class_name(terms.round_name)
+    pro_rata_shares: Dict[str, int] = {}
+    pro_rata_amount = 0.0
+    for name in sorted(entitled):
+        amount = terms.investment_amount * holdings[name] / current_shares * pro_rata_participation
+        amount = min(amount, terms.investment_amount - pro_rata_amount)
+        shares = int(amount / price_per_share)
+        if shares <= 0:
+            continue
+        pro_rata_amount += amount
+        pro_rata_shares[name] = shares
+        holders.append({
+            'name': name,
+            'holder_type': 'investor',
+            'share_class': class_name,
+            'shares': shares,
+            'price_per_share': price_per_share,
+            'invested': amount
+        })
+
+    lead_amount = terms.investment_amount - pro_rata_amount
+    lead_shares = int(lead_amount / price_per_share)
+    holders.append({
+        'name': f'{terms.round_name} Investor',
+        'holder_type': 'investor',
+        'share_class': class_name,
+        'shares': lead_shares,
+        'price_per_share': price_per_share,
+        'invested': lead_amount
+    })
+
+    new_shares = lead_shares + sum(pro_rata_shares.values())
+    total_shares_post = sum(holder['shares'] for holder in holders)
+    for holder in holders:
+        holder['ownership_pct'] = round(holder['shares'] / total_shares_post * 100, 2)
+        holder['fully_diluted_pct'] = holder['ownership_pct']
+
+    series.append({
+        'share_class': class_name,
+        'original_price': price_per_share,
+        'conversion_price': price_per_share,
+        'anti_dilution': terms.anti_dilution,
+        'pro_rata_rights': terms.pro_rata_rights
+    })
+
+    pool_shares = cap_data.get('option_pool_shares', 0) + pool_increase
+    post_cap_table = {
+        'total_shares_outstanding': total_shares_post,
+        'fully_diluted_shares': total_shares_post,
+        'option_pool_shares': pool_shares,
+        'option_pool_pct': round(pool_shares / total_shares_post * 100, 2),
+        'holders': holders,
+        'series': series
+    }
+
+    applied_terms = RoundTerms(**{
+        **asdict(terms),
+        'price_per_share': price_per_share,
+        'new_shares_issued': new_shares,
+        'option_pool_increase': pool_shuffle['pool_increase_pct']
+    })
+
+    return RoundStep(
+        key='',
+        round_terms=applied_terms,
+        cap_table=post_cap_table,
+        pro_rata_shares=pro_rata_shares,
+        anti_dilution_shares=anti_dilution_shares,
+        pool_increase_shares=pool_increase
+    )
+
+
+class RoundSequenceSimulator:
+    """Applies round sequences to a base cap table, memoizing every prefix.
+
+    The key of a step hashes its parent's key together with the round terms,
+    so two paths that share their first k rounds share their first k cap
+    tables. Cached cap tables are shared between paths and must not be
+    mutated by callers.
+    """
+
+    def __init__(self, cap_table: Dict[str, Any]):
+        self.base = cap_table.get('cap_table', cap_table)
+        self.base_key = canonical_hash(self.base)
+        self._cache: Dict[str, RoundStep] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def step(self, parent_key: str, parent: Dict[str, Any], spec: Dict[str, Any]) -> RoundStep:
+        """Apply one round spec, reusing the cached result when available."""
+        key = canonical_hash([parent_key, spec])
+        if key in self._cache:
+            self.hits += 1
+            cached = self._cache[key]
+            return RoundStep(**{**cached.__dict__, 'cache_hit': True})
+
+        self.misses += 1
+        result = apply_round(parent, round_terms_from_spec(spec),
+                             float(spec.get('pro_rata_participation', 1.0)))
+        result.key = key
+        self._cache[key] = result
+        return result
+
+    def run(self, specs: List[Dict[str, Any]]) -> List[RoundStep]:
+        """Apply a sequence of rounds and return every intermediate step."""
+        steps = []
+        key, cap_data = self.base_key, self.base
+        for spec in specs:
+            result = self.step(key, cap_data, spec)
+            steps.append(result)
+            key, cap_data = result.key, result.cap_table
+        return steps
+
+    def explore(self, paths: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[RoundStep]]:
+        """Run several financing paths, sharing common prefixes."""
+        return {name: self.run(specs) for name, specs in paths.items()}
+
+
+def ownership_by_holder(cap_data: Dict[str, Any]) -> Dict[str, float]:
+    """Fully diluted ownership per holder name, across share classes."""
+    total = cap_data['fully_diluted_shares']
+    ownership: Dict[str, float] = {}
+    for holder in cap_data['holders']:
+        ownership[holder['name']] = ownership.get(holder['name'], 0.0) + holder['shares'] / total * 100
+    return {name: round(pct, 2) for name, pct in ownership.items()}
+
+
+def step_to_dict(step: RoundStep) -> Dict[str, Any]:
+    """Serialize a step for JSON output."""
+    return {
+        'key': step.key[:16],
+        'round_terms': asdict(step.round_terms),
+        'pool_increase_shares': step.pool_increase_shares,
+        'pro_rata_shares': step.pro_rata_shares,
+        'anti_dilution_shares': step.anti_dilution_shares,
+        'ownership': ownership_by_holder(step.cap_table),
+        'cap_table': step.cap_table
+    }
+
+
+def format_summary(paths: Dict[str, List[RoundStep]], simulator: RoundSequenceSimulator) -> str:
+    """Format path results as summary text."""
+    summary = "\n=== ROUND SEQUENCE SUMMARY ===\n"
+    for name, steps in paths.items():
+        summary += f"\nPath: {name}\n" + "-" * 50 + "\n"
+        for step in steps:
+            terms = step.round_terms
+            cached = ' (cached)' if step.cache_hit else ''
+            summary += (f"{terms.round_name}: ${terms.investment_amount:,.0f} at "
+                        f"${terms.pre_money_valuation:,.0f} pre, ${terms.price_per_share:.4f}/share{cached}\n")
+            if step.anti_dilution_shares:
+                summary += f"  Anti-dilution shares: {sum(step.anti_dilution_shares.values()):,}\n"
+            if step.pro_rata_shares:
+                summary += f"  Pro-rata shares: {sum(step.pro_rata_shares.values()):,}\n"
+
+        if steps:
+            final = ownership_by_holder(steps[-1].cap_table)
+            summary += "Final ownership:\n"
+            for holder_name, pct in sorted(final.items(), key=lambda x: -x[1]):
+                summary += f"  {holder_name}: {pct:.1f}%\n"
+
+    summary += f"\nCap tables computed: {simulator.misses}  reused: {simulator.hits}\n"
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate a sequence of financing rounds')
+    parser.add_argument('--captable', required=True, help='Parsed cap table or round model JSON')
+    parser.add_argument('--rounds', required=True,
+                        help='JSON file with a list of rounds or {"paths": {name: [rounds]}}')
+    parser.add_argument('--output', default='round_sequence.json', help='Output file')
+
+    args = parser.parse_args()
+
+    print(f"Loading cap table from {args.captable}...")
+    data = load_cap_table(args.captable)
+    cap_table = data.get('post_money_cap_table', data)
+
+    with open(args.rounds, 'r') as f:
+        rounds = json.load(f)
+    paths = rounds['paths'] if isinstance(rounds, dict) else {'base': rounds}
+
+    print(f"Simulating {len(paths)} financing path(s)...")
+    simulator = RoundSequenceSimulator(cap_table)
+    results = simulator.explore(paths)
+
+    output = {
+        'paths': {name: [step_to_dict(step) for step in steps] for name, steps in results.items()},
+        'cache': {'computed': simulator.misses, 'reused': simulator.hits},
+        'modeled_at': datetime.now().isoformat()
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2, default=str)
+
+    print(format_summary(results, simulator))
+    print(f"Output saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Vesting Schedule Engine
+Computes vested shares for every grant in a cap table at one or many as-of
+dates in a single vectorized pass, supports cliff/monthly and custom tranche
+schedules, and builds vested-only or acceleration-on-exit cap table views for
+round modeling and waterfalls.
+
+Usage:
+    python vesting.py --captable parsed_captable.json --as-of 2026-06-30,2027-06-30
+    python vesting.py --captable parsed_captable.json --as-of 2026-06-30 --schedule "4y/1y cliff" --update
+    python vesting.py --captable parsed_captable.json --exit-date 2027-03-31 --acceleration 1.0
+
+    # Schedules: "4y/1y cliff", "1/48 monthly, 1yr cliff", "36 months quarterly",
+    # "custom:12=0.25,24=0.5,36=0.75,48=1", "immediate"
+"""
+
+import argparse
+import json
+import re
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from cap_table_arrays import CapTableArrays, as_arrays
+
+
+@dataclass(frozen=True)
+class VestingSchedule:
+    """Vesting terms shared by a group of grants.
+
+    Parametric schedules vest `frequency_months` at a time over
+    `total_months`, with nothing vested before `cliff_months`; `tranches`
+    overrides that with explicit (month offset, cumulative fraction) steps.
+    `acceleration` is the fraction of unvested shares that vests on exit,
+    only for terminated holders when `double_trigger` is set.
+    """
+    total_months: int = 48
+    cliff_months: int = 12
+    frequency_months: int = 1
+    tranches: Optional[Tuple[Tuple[int, float], ...]] = None
+    acceleration: float = 0.0
+    double_trigger: bool = False
+
+    def tranche_table(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(month offsets, cumulative vested fraction) of each vesting event."""
+        if self.tranches:
+            offsets = np.array([t[0] for t in self.tranches], dtype=np.int64)
+            fractions = np.array([t[1] for t in self.tranches], dtype=np.float64)
+            order = np.argsort(offsets, kind='stable')
+            return offsets[order], np.maximum.accumulate(fractions[order])
+
+        if self.total_months <= 0:
+            return np.array([0]), np.array([1.0])
+
+        step = max(self.frequency_months, 1)
+        offsets = np.arange(step, self.total_months + step, step)
+        offsets = np.minimum(offsets, self.total_months)
+        offsets = np.unique(np.maximum(offsets, min(self.cliff_months, self.total_months)))
+        return offsets, offsets / self.total_months
+
+
+STANDARD_SCHEDULE = VestingSchedule()
+
+
+def _duration_months(text: str) -> Optional[int]:
+    """'4y', '1 yr', '18 months', '2 years' -> months."""
+    match = re.search(r'(\d+(?:\.\d+)?)\s*(y|yr|yrs|year|years|m|mo|mos|month|months)\b', text)
+    if not match:
+        return None
+    value = float(match.group(1))
+    return int(round(value * 12)) if match.group(2).startswith('y') else int(round(value))
+
+
+def parse_schedule(spec: Optional[str], default: VestingSchedule = STANDARD_SCHEDULE) -> VestingSchedule:
+    """Parse a schedule description as found in Carta/Pulley exports.
+
+    Terms the description does not state, including acceleration and
+    double trigger, are taken from `default`.
+    """
+    if spec is None or not str(spec).strip() or str(spec).strip().lower() == 'nan':
+        return default
+    text = str(spec).strip().lower()
+
+    if text in ('immediate', 'fully vested', 'none', 'no vesting'):
+        return replace(default, total_months=0, cliff_months=0, tranches=None)
+
+    if text.startswith('custom:'):
+        tranches = []
+        for part in text[len('custom:'):].split(','):
+            month, fraction = part.split('=')
+            tranches.append((int(month), float(fraction)))
+        return replace(default, tranches=tuple(tranches))
+
+    total = default.total_months
+    cliff = default.cliff_months
+    frequency = default.frequency_months
+    if 'quarter' in text:
+        frequency = 3
+    elif 'annual' in text or 'yearly' in text:
+        frequency = 12
+    elif 'monthly' in text:
+        frequency = 1
+
+    fraction_form = re.search(r'1\s*/\s*(\d+)', text)
+    if fraction_form:
+        # '1/48 monthly': 48 vesting events of `frequency` months each
+        total = int(fraction_form.group(1)) * frequency
+    else:
+        # The first duration is the total; a duration next to 'cliff' is the cliff
+        head = text.split('cliff')[0].split('/')[0]
+        total = _duration_months(head) or total
+
+    if 'no cliff' in text:
+        cliff = 0
+    elif 'cliff' in text:
+        around = re.search(r'(\d+(?:\.\d+)?\s*(?:y|yr|yrs|year|years|m|mo|mos|month|months))\s*cliff|'
+                           r'cliff\D{0,5}(\d+(?:\.\d+)?\s*(?:y|yr|yrs|year|years|m|mo|mos|month|months))', text)
+        if around:
+            cliff = _duration_months(around.group(1) or around.group(2))
+
+    return replace(default, total_months=total, cliff_months=min(cliff, total), frequency_months=frequency,
+                   tranches=None)
+
+
+def to_day_array(dates: Any) -> np.ndarray:
+    """Dates (strings, datetimes or datetime64) -> datetime64[D] array."""
+    if isinstance(dates, str):
+        dates = [d.strip() for d in dates.split(',')]
+    return np.atleast_1d(np.asarray(dates, dtype='datetime64[D]'))
+
+
+def month_diff(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Whole months from start to end, elementwise with broadcasting.
+
+    A month is complete on the same day-of-month as the start date, or on
+    the last day of shorter months: a grant starting Jan 15 completes its
+    first month on Feb 15, one starting Jan 31 on Feb 28.
+    """
+    start = start.astype('datetime64[D]')
+    as_of = end.astype('datetime64[D]')
+    start_month = start.astype('datetime64[M]')
+    as_of_month = as_of.astype('datetime64[M]')
+
+    months = (as_of_month - start_month).astype(np.int64)
+    start_day = (start - start_month.astype('datetime64[D]')).astype(np.int64)
+    as_of_day = (as_of - as_of_month.astype('datetime64[D]')).astype(np.int64)
+    month_end = (as_of + 1).astype('datetime64[M]') != as_of_month
+    return months - ((as_of_day < start_day) & ~month_end)
+
+
+def months_elapsed(start: np.ndarray, as_of: np.ndarray) -> np.ndarray:
+    """Whole months from each start date to each as-of date, shape (starts x dates)."""
+    return month_diff(start[:, None], as_of[None, :])
+
+
+@dataclass
+class GrantSchedules:
+    """Grants with their vesting start date and schedule, as parallel arrays.
+
+    Grants with no start date (NaT) are treated as fully vested.
+    """
+    shares: np.ndarray
+    vesting_start: np.ndarray  # datetime64[D]
+    schedule_idx: np.ndarray
+    schedules: List[VestingSchedule] = field(default_factory=lambda: [STANDARD_SCHEDULE])
+
+    def vesting_end(self) -> np.ndarray:
+        """Date on which each grant is fully vested (NaT where not vesting)."""
+        total = np.array([s.tranche_table()[0][-1] for s in self.schedules], dtype=np.int64)
+        months = total[self.schedule_idx]
+        start_month = self.vesting_start.astype('datetime64[M]')
+        day = self.vesting_start - start_month.astype('datetime64[D]')
+        end_month = start_month + months.astype('timedelta64[M]')
+        # Same day-of-month, clipped to the last day of shorter months
+        end = np.minimum(end_month.astype('datetime64[D]') + day,
+                         (end_month + 1).astype('datetime64[D]') - 1)
+        return np.where(np.isnat(self.vesting_start), np.datetime64('NaT'), end).astype('datetime64[D]')
+
+
+def vested_fraction(grants: GrantSchedules, as_of_dates: Any) -> np.ndarray:
+    """Vested fraction of every grant at every date, shape (grants x dates)."""
+    as_of = to_day_array(as_of_dates)
+    fraction = np.ones((len(grants.shares), len(as_of)), dtype=np.float64)
+
+    vesting = ~np.isnat(grants.vesting_start)
+    for s, schedule in enumerate(grants.schedules):
+        rows = np.flatnonzero(vesting & (grants.schedule_idx == s))
+        if not len(rows):
+            continue
+        offsets, cumulative = schedule.tranche_table()
+        months = months_elapsed(grants.vesting_start[rows], as_of)
+        steps = np.searchsorted(offsets, months, side='right')
+        fraction[rows] = np.concatenate([[0.0], cumulative])[steps]
+
+    return fraction
+
+
+def vested_shares(grants: GrantSchedules, as_of_dates: Any) -> np.ndarray:
+    """Vested shares of every grant at every date, shape (grants x dates)."""
+    fraction = vested_fraction(grants, as_of_dates)
+    return np.floor(grants.shares[:, None] * fraction + 1e-9).astype(np.int64)
+
+
+def vested_on_exit(grants: GrantSchedules, exit_date: Any, terminated: bool = True) -> np.ndarray:
+    """Vested shares at an exit date after each schedule's change-of-control acceleration."""
+    vested = vested_shares(grants, exit_date)[:, 0]
+    acceleration = np.array([
+        s.acceleration if (terminated or not s.double_trigger) else 0.0 for s in grants.schedules
+    ])[grants.schedule_idx]
+    unvested = grants.shares - vested
+    return vested + np.floor(unvested * acceleration + 1e-9).astype(np.int64)
+
+
+def grants_from_arrays(
+    arrays: CapTableArrays,
+    schedule: VestingSchedule = STANDARD_SCHEDULE
+) -> GrantSchedules:
+    """Grant schedules for a cap table's rows.
+
+    Rows with a vesting schedule description use it, parsed once per
+    distinct description with `schedule` supplying what it leaves out. Other
+    rows with a vesting end date vest over the months between start and end
+    (one schedule per distinct length, keeping `schedule`'s cliff, frequency
+    and acceleration); the rest use `schedule` as is.
+    """
+    spec_codes, specs = pd.factorize(pd.Series(arrays.vesting_schedule, dtype=object))
+    has_start = ~np.isnat(arrays.vesting_start)
+    has_end = has_start & ~np.isnat(arrays.vesting_end) & (spec_codes < 0)
+
+    schedules = [schedule]
+    schedule_idx = np.zeros(len(arrays), dtype=np.int64)
+    for code, spec in enumerate(specs.tolist()):
+        schedules.append(parse_schedule(spec, schedule))
+        schedule_idx[spec_codes == code] = len(schedules) - 1
+
+    if has_end.any() and not schedule.tranches:
+        end_rows = np.flatnonzero(has_end)
+        lengths = np.maximum(month_diff(arrays.vesting_start[end_rows], arrays.vesting_end[end_rows]), 0)
+        for length in np.unique(lengths).tolist():
+            if length == schedule.total_months:
+                continue
+            schedules.append(replace(schedule, total_months=length,
+                                     cliff_months=min(schedule.cliff_months, length)))
+            schedule_idx[end_rows[lengths == length]] = len(schedules) - 1
+
+    return GrantSchedules(
+        shares=arrays.shares,
+        vesting_start=arrays.vesting_start,
+        schedule_idx=schedule_idx,
+        schedules=schedules
+    )
+
+
+def apply_vesting(
+    cap_table: Any,
+    as_of: Any,
+    schedule: VestingSchedule = STANDARD_SCHEDULE
+) -> CapTableArrays:
+    """Copy of the cap table with vesting_end and vested_shares filled in as of a date."""
+    arrays = as_arrays(cap_table)
+    grants = grants_from_arrays(arrays, schedule)
+    vesting_end = np.where(np.isnat(arrays.vesting_end), grants.vesting_end(), arrays.vesting_end)
+    return replace(
+        arrays,
+        vesting_end=vesting_end.astype('datetime64[D]'),
+        vested_shares=vested_shares(grants, as_of)[:, 0]
+    )
+
+
+def vested_view(
+    cap_table: Any,
+    as_of: Optional[Any] = None,
+    exit_date: Optional[Any] = None,
+    schedule: VestingSchedule = STANDARD_SCHEDULE,
+    terminated: bool = True,
+    exclude_pool: bool = True
+) -> CapTableArrays:
+    """Cap table counting only vested shares.
+
+    With `exit_date`, shares are those vested at exit after acceleration;
+    otherwise those vested at `as_of`. The unallocated option pool is
+    dropped unless `exclude_pool` is False. Ownership is recomputed on the
+    vested share count.
+    """
+    arrays = as_arrays(cap_table)
+    grants = grants_from_arrays(arrays, schedule)
+    if exit_date is not None:
+        shares = vested_on_exit(grants, exit_date, terminated)
+    else:
+        shares = vested_shares(grants, as_of if as_of is not None else np.datetime64('today'))[:, 0]
+
+    keep = shares > 0
+    if exclude_pool:
+        keep &= ~arrays.type_mask('pool')
+
+    total = int(shares[keep].sum())
+    ownership = np.round(shares / total * 100, 2) if total > 0 else np.zeros(len(shares))
+    pool_shares = int(shares[keep & arrays.type_mask('pool')].sum())
+
+    rows = np.flatnonzero(keep)
+    return replace(
+        arrays,
+        name_idx=arrays.name_idx[rows],
+        class_idx=arrays.class_idx[rows],
+        type_code=arrays.type_code[rows],
+        shares=shares[rows],
+        price_per_share=arrays.price_per_share[rows],
+        invested=arrays.invested[rows],
+        ownership_pct=ownership[rows],
+        fully_diluted_pct=ownership[rows],
+        vesting_start=arrays.vesting_start[rows],
+        vesting_end=arrays.vesting_end[rows],
+        vested_shares=shares[rows],
+        vesting_schedule=arrays.vesting_schedule[rows],
+        fully_diluted_shares=total,
+        option_pool_shares=pool_shares,
+        option_pool_pct=round(pool_shares / total * 100, 2) if total > 0 else 0.0
+    )
+
+
+def vesting_summary(grants: GrantSchedules, as_of_dates: Any) -> List[Dict[str, Any]]:
+    """Total vested/unvested shares of vesting grants at each date."""
+    as_of = to_day_array(as_of_dates)
+    vesting = ~np.isnat(grants.vesting_start)
+    vested = vested_shares(grants, as_of)[vesting].sum(axis=0)
+    total = int(grants.shares[vesting].sum())
+    return [
+        {'as_of': str(date), 'vested_shares': int(v), 'unvested_shares': total - int(v),
+         'vested_pct': round(v / total * 100, 2) if total > 0 else 0.0}
+        for date, v in zip(as_of, vested.tolist())
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute vested shares for cap table grants')
+    parser.add_argument('--captable', required=True, help='Parsed cap table JSON')
+    parser.add_argument('--as-of', default=datetime.now().strftime('%Y-%m-%d'),
+                        help='Comma-separated as-of dates (YYYY-MM-DD)')
+    parser.add_argument('--schedule', default='4y/1y cliff monthly',
+                        help='Default schedule for grants without a vesting schedule or end date')
+    parser.add_argument('--acceleration', type=float, default=0.0,
+                        help='Fraction of unvested shares accelerated on exit')
+    parser.add_argument('--double-trigger', action='store_true',
+                        help='Acceleration requires termination after the exit')
+    parser.add_argument('--exit-date', help='Report vested shares at this exit date after acceleration')
+    parser.add_argument('--update', action='store_true',
+                        help='Write vesting_end and vested_shares (first as-of date) back to the cap table')
+    parser.add_argument('--output', default='vesting.json', help='Output file')
+
+    args = parser.parse_args()
+
+    print(f"Loading cap table from {args.captable}...")
+    with open(args.captable, 'r') as f:
+        data = json.load(f)
+    cap_data = data.get('cap_table', data)
+    arrays = CapTableArrays.from_cap_table(cap_data)
+
+    schedule = replace(parse_schedule(args.schedule), acceleration=args.acceleration,
+                       double_trigger=args.double_trigger)
+    grants = grants_from_arrays(arrays, schedule)
+    as_of = to_day_array(args.as_of)
+
+    print(f"Vesting {int((~np.isnat(grants.vesting_start)).sum()):,} grants at {len(as_of)} date(s)...")
+    output = {
+        'schedule': {**schedule.__dict__, 'tranches': list(schedule.tranches or [])},
+        'as_of': vesting_summary(grants, as_of),
+        'computed_at': datetime.now().isoformat()
+    }
+
+    if args.exit_date:
+        exit_view = vested_view(arrays, exit_date=args.exit_date, schedule=schedule)
+        output['exit'] = {
+            'exit_date': args.exit_date,
+            'vested_fully_diluted_shares': exit_view.fully_diluted_shares,
+            'accelerated_shares': int(vested_on_exit(grants, args.exit_date).sum()
+                                      - vested_shares(grants, args.exit_date)[:, 0].sum())
+        }
+
+    if args.update:
+        updated = apply_vesting(arrays, as_of[:1], schedule)
+        cap_data['holders'] = [
+            {**holder, 'vesting_start': row['vesting_start'], 'vesting_end': row['vesting_end'],
+             'vested_shares': row['vested_shares']}
+            for holder, row in zip(cap_data['holders'], updated.to_holders())
+        ]
+        with open(args.captable, 'w') as f:
+            json.dump(data, f, indent=2, default=str)
+        print(f"Updated vesting fields in {args.captable}")
+
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2, default=str)
+
+    print("\n=== VESTING SUMMARY ===\n")
+    for row in output['as_of']:
+        print(f"{row['as_of']}: {row['vested_shares']:,} vested / {row['unvested_shares']:,} unvested "
+              f"({row['vested_pct']:.1f}%)")
+    if 'exit' in output:
+        print(f"\nAt exit {args.exit_date}: {output['exit']['accelerated_shares']:,} shares accelerated, "
+              f"{output['exit']['vested_fully_diluted_shares']:,} vested fully diluted")
+
+    print(f"\nOutput saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,16 +5,36 @@ Models exit proceeds distribution across different valuations.
 
 Usage:
     python waterfall_analysis.py --captable captable.json --exits 10000000,50000000,100000000 --output waterfall.xlsx
+    python waterfall_analysis.py --captable captable.json --curve 0,500000000,10000 --output waterfall_curve.xlsx
+    python waterfall_analysis.py --captable captable.json --breakpoints --output waterfall_breakpoints.json
+    python waterfall_analysis.py --captable captable.json --simulate 1000000 \
+        --distribution lognormal:median=150000000,sigma=1.0,zero_prob=0.3 --exit-years 3,8 --output simulation.xlsx
 """
 
 import argparse
 import json
+import sys
 import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, List, Tuple
-from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+from dataclasses import dataclass, asdict, field, replace
 import xlsxwriter
 
+from cap_table_arrays import CapTableArrays, as_arrays
+from vesting import STANDARD_SCHEDULE, vested_view
+
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'scripts'))
+try:
+    from skill_support import cached_main
+except ImportError:  # skill used outside the repository
+    def cached_main(main, *args, **kwargs):
+        return main()
+
+CapTableInput = Union[Dict[str, Any], CapTableArrays]
+
 
 @dataclass
 class ShareClass:
@@ -53,11 +73,25 @@ class ExitScenario:
     remaining: float
 
 
+@dataclass
+class WaterfallMatrix:
+    """Waterfall proceeds for a vector of exit values."""
+    exit_values: np.ndarray
+    holders: CapTableArrays
+    class_names: List[str]
+    proceeds: np.ndarray  # (exits x holders), one column per cap table row
+    class_proceeds: np.ndarray  # (exits x share classes)
+    remaining: np.ndarray
+
+
 def load_cap_table(path: str) -> Dict[str, Any]:
     """Load parsed cap table JSON or round model JSON."""
     with open(path, 'r') as f:
-        data = json.load(f)
+        return resolve_cap_table(json.load(f))
 
+
+def resolve_cap_table(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Cap table inside a parsed cap table or round model payload."""
     # Handle round model output
     if 'post_money_cap_table' in data:
         return data['post_money_cap_table']
@@ -69,48 +103,47 @@ def load_cap_table(path: str) -> Dict[str, Any]:
     return data
 
 
-def extract_share_classes(cap_table: Dict[str, Any]) -> List[ShareClass]:
+def extract_share_classes(cap_table: CapTableInput) -> List[ShareClass]:
     """Extract share classes with their terms from cap table."""
-    holders = cap_table.get('holders', [])
-    classes = {}
-
-    for holder in holders:
-        class_name = holder.get('share_class', 'common')
-        if class_name not in classes:
-            # Determine share type and seniority
-            share_type = 'common'
-            seniority = 0
-            liq_pref = 0.0
-            participating = False
-
-            if 'preferred' in class_name.lower():
-                share_type = 'preferred'
-                seniority = 1  # Base preferred seniority
-                liq_pref = 1.0  # 1x default
-
-                # Series hierarchy (higher letter = more senior)
-                if 'series_b' in class_name.lower() or 'series b' in class_name.lower():
-                    seniority = 2
-                elif 'series_c' in class_name.lower() or 'series c' in class_name.lower():
-                    seniority = 3
-                elif 'series_d' in class_name.lower() or 'series d' in class_name.lower():
-                    seniority = 4
-
-            classes[class_name] = ShareClass(
-                name=class_name,
-                share_type=share_type,
-                shares=0,
-                price_per_share=holder.get('price_per_share', 0),
-                liquidation_preference=liq_pref,
-                participating=participating,
-                participation_cap=0,
-                seniority=seniority
-            )
-
-        classes[class_name].shares += holder.get('shares', 0)
-        classes[class_name].total_invested += holder.get('invested', 0)
-
-    return list(classes.values())
+    arrays = as_arrays(cap_table)
+    first_row = arrays.class_first_row()
+    class_shares = arrays.class_shares().tolist()
+    class_invested = arrays.class_invested().tolist()
+
+    classes = []
+    for c, class_name in enumerate(arrays.class_names):
+        # Determine share type and seniority
+        share_type = 'common'
+        seniority = 0
+        liq_pref = 0.0
+        participating = False
+
+        if 'preferred' in class_name.lower():
+            share_type = 'preferred'
+            seniority = 1  # Base preferred seniority
+            liq_pref = 1.0  # 1x default
+
+            # Series hierarchy (higher letter = more senior)
+            if 'series_b' in class_name.lower() or 'series b' in class_name.lower():
+                seniority = 2
+            elif 'series_c' in class_name.lower() or 'series c' in class_name.lower():
+                seniority = 3
+            elif 'series_d' in class_name.lower() or 'series d' in class_name.lower():
+                seniority = 4
+
+        classes.append(ShareClass(
+            name=class_name,
+            share_type=share_type,
+            shares=class_shares[c],
+            price_per_share=float(arrays.price_per_share[first_row[c]]),
+            liquidation_preference=liq_pref,
+            participating=participating,
+            participation_cap=0,
+            seniority=seniority,
+            total_invested=class_invested[c]
+        ))
+
+    return classes
 
 
 def calculate_waterfall(
@@ -190,12 +223,474 @@ def calculate_waterfall(
     )
 
 
+@dataclass
+class WaterfallTerms:
+    """Cap table reduced to the arrays the vectorized waterfall needs."""
+    holders: CapTableArrays
+    class_names: List[str]
+    liq_amounts: np.ndarray  # preference amount per preferred class, senior first
+    pref_weights: np.ndarray  # (preferred classes x holders) share of each class payment
+    pro_rata: np.ndarray  # (holders,) share of the residual
+    membership: np.ndarray  # (holders x share classes) one-hot class membership
+
+
+def build_waterfall_terms(cap_table: CapTableInput) -> WaterfallTerms:
+    """Extract preference stack and pro-rata weights from a cap table."""
+    holders = as_arrays(cap_table)
+    share_classes = extract_share_classes(holders)
+    total_shares = holders.fully_diluted_shares
+
+    class_names = holders.class_names
+    class_pos = {name: i for i, name in enumerate(class_names)}
+    shares = holders.shares.astype(np.float64)
+    holder_class = holders.class_idx
+
+    # Preference stack, senior to junior
+    preferred = [sc for sc in sorted(share_classes, key=lambda x: -x.seniority)
+                 if sc.share_type == 'preferred']
+    liq_amounts = np.array([sc.total_invested * sc.liquidation_preference for sc in preferred],
+                           dtype=np.float64)
+
+    # Holder share of each preferred class payment
+    pref_weights = np.zeros((len(preferred), len(holders)))
+    for j, sc in enumerate(preferred):
+        in_class = holder_class == class_pos[sc.name]
+        if sc.shares > 0:
+            pref_weights[j, in_class] = shares[in_class] / sc.shares
+
+    pro_rata = shares / total_shares if total_shares > 0 else np.zeros(len(holders))
+
+    membership = np.zeros((len(holders), len(class_names)))
+    membership[np.arange(len(holders)), holder_class] = 1.0
+
+    return WaterfallTerms(
+        holders=holders,
+        class_names=class_names,
+        liq_amounts=liq_amounts,
+        pref_weights=pref_weights,
+        pro_rata=pro_rata,
+        membership=membership
+    )
+
+
+def calculate_waterfall_matrix(
+    cap_table: CapTableInput,
+    exit_values: np.ndarray
+) -> WaterfallMatrix:
+    """Calculate the waterfall for many exit values in one pass.
+
+    Same distribution rules as calculate_waterfall: liquidation preferences
+    are paid senior to junior, then whatever remains is shared pro-rata
+    across all holders.
+    """
+    exits = np.atleast_1d(np.asarray(exit_values, dtype=np.float64))
+    terms = build_waterfall_terms(cap_table)
+
+    # Step 1: class j is paid whatever is left after the classes ahead of
+    # it, up to its preference amount
+    liq_amounts = terms.liq_amounts
+    paid_ahead = np.concatenate([[0.0], np.cumsum(liq_amounts)[:-1]]) if len(liq_amounts) else liq_amounts
+    class_paid = np.clip(exits[:, None] - paid_ahead[None, :], 0, liq_amounts[None, :])
+
+    # Step 2: remainder pro-rata across all holders
+    remaining = np.maximum(exits - class_paid.sum(axis=1), 0)
+    proceeds = class_paid @ terms.pref_weights + remaining[:, None] * terms.pro_rata[None, :]
+
+    return WaterfallMatrix(
+        exit_values=exits,
+        holders=terms.holders,
+        class_names=terms.class_names,
+        proceeds=proceeds,
+        class_proceeds=proceeds @ terms.membership,
+        remaining=np.zeros_like(exits)
+    )
+
+
+@dataclass
+class WaterfallBreakpoints:
+    """Exact piecewise-linear waterfall curve for one cap table.
+
+    Segment i covers exits in [breakpoints[i], breakpoints[i + 1]) (the last
+    segment is open-ended); proceeds there are values[i] + slopes[i] * (exit
+    - breakpoints[i]).
+    """
+    holders: CapTableArrays
+    class_names: List[str]
+    breakpoints: np.ndarray  # (segments,) segment start exit values, ascending from 0
+    values: np.ndarray  # (segments x holders) proceeds at each segment start
+    slopes: np.ndarray  # (segments x holders) proceeds per $1 of exit within the segment
+    membership: np.ndarray
+
+    def evaluate(self, exit_values: np.ndarray) -> WaterfallMatrix:
+        """Proceeds at arbitrary exit values via binary search over the segments."""
+        exits = np.atleast_1d(np.asarray(exit_values, dtype=np.float64))
+        x = np.maximum(exits, 0)
+        segment = np.searchsorted(self.breakpoints, x, side='right') - 1
+        proceeds = self.values[segment] + self.slopes[segment] * (x - self.breakpoints[segment])[:, None]
+
+        return WaterfallMatrix(
+            exit_values=exits,
+            holders=self.holders,
+            class_names=self.class_names,
+            proceeds=proceeds,
+            class_proceeds=proceeds @ self.membership,
+            remaining=np.zeros_like(exits)
+        )
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Segments as JSON-friendly records for charting."""
+        ends = list(self.breakpoints[1:].tolist()) + [None]
+        names = self.holders.holder_names.tolist()
+        return [
+            {
+                'start': start,
+                'end': end,
+                'holders': {
+                    name: {'proceeds_at_start': value, 'slope': slope}
+                    for name, value, slope in zip(names, values.tolist(), slopes.tolist())
+                }
+            }
+            for start, end, values, slopes in zip(self.breakpoints.tolist(), ends, self.values, self.slopes)
+        ]
+
+
+def solve_waterfall_breakpoints(cap_table: CapTableInput) -> WaterfallBreakpoints:
+    """Compute the kink points of the waterfall analytically.
+
+    Proceeds only change slope where a preferred class's liquidation
+    preference is exhausted: while class j is being paid, each $1 of exit
+    goes to that class's holders by share weight; once the whole stack is
+    paid, each $1 is split pro-rata across all holders.
+    """
+    terms = build_waterfall_terms(cap_table)
+
+    # Zero-size preferences collapse into their neighbours
+    paying = terms.liq_amounts > 0
+    lengths = terms.liq_amounts[paying]
+    slopes = np.vstack([terms.pref_weights[paying], terms.pro_rata[None, :]])
+
+    breakpoints = np.concatenate([[0.0], np.cumsum(lengths)])
+    values = np.vstack([
+        np.zeros((1, len(terms.holders))),
+        np.cumsum(slopes[:-1] * lengths[:, None], axis=0)
+    ])
+
+    return WaterfallBreakpoints(
+        holders=terms.holders,
+        class_names=terms.class_names,
+        breakpoints=breakpoints,
+        values=values,
+        slopes=slopes,
+        membership=terms.membership
+    )
+
+
+def matrix_to_scenarios(matrix: WaterfallMatrix) -> List[ExitScenario]:
+    """Expand a WaterfallMatrix into per-exit ExitScenario objects."""
+    holders = matrix.holders
+    proceeds = matrix.proceeds
+
+    # Holders are keyed by name in calculate_waterfall, so rows sharing a
+    # name report their combined proceeds
+    if len(holders.names) < len(holders):
+        merged = np.zeros((proceeds.shape[0], len(holders.names)))
+        np.add.at(merged.T, holders.name_idx, proceeds.T)
+        proceeds = merged[:, holders.name_idx]
+
+    rows = list(zip(
+        holders.holder_names.tolist(),
+        holders.holder_type.tolist(),
+        holders.share_class.tolist(),
+        holders.shares.tolist(),
+        holders.invested.tolist()
+    ))
+
+    scenarios = []
+    for i, exit_value in enumerate(matrix.exit_values.tolist()):
+        proceeds_list = []
+        for (name, holder_type, share_class, shares, invested), value in zip(rows, proceeds[i].tolist()):
+            roi = (value / invested - 1) if invested > 0 else 0
+
+            proceeds_list.append(HolderProceeds(
+                holder_name=name,
+                holder_type=holder_type,
+                share_class=share_class,
+                shares=shares,
+                invested=invested,
+                proceeds=round(value, 2),
+                roi=round(roi, 2),
+                proceeds_pct=round(value / exit_value * 100, 2) if exit_value > 0 else 0
+            ))
+
+        remaining = float(matrix.remaining[i])
+        scenarios.append(ExitScenario(
+            exit_value=exit_value,
+            holders_proceeds=proceeds_list,
+            share_class_proceeds=dict(zip(matrix.class_names, matrix.class_proceeds[i].tolist())),
+            total_distributed=exit_value - remaining,
+            remaining=remaining
+        ))
+
+    return scenarios
+
+
+def scenarios_output(scenarios: List[ExitScenario]) -> Dict[str, Any]:
+    """The waterfall.json payload for a list of exit scenarios."""
+    return {
+        'scenarios': [
+            {
+                'exit_value': s.exit_value,
+                'holders_proceeds': [asdict(hp) for hp in s.holders_proceeds],
+                'share_class_proceeds': s.share_class_proceeds,
+                'total_distributed': s.total_distributed
+            }
+            for s in scenarios
+        ],
+        'generated_at': datetime.now().isoformat()
+    }
+
+
 def generate_waterfall_scenarios(
     cap_table: Dict[str, Any],
     exit_values: List[float]
 ) -> List[ExitScenario]:
     """Generate waterfall analysis for multiple exit scenarios."""
-    return [calculate_waterfall(cap_table, ev) for ev in exit_values]
+    return matrix_to_scenarios(calculate_waterfall_matrix(cap_table, np.asarray(exit_values)))
+
+
+@dataclass
+class ExitDistribution:
+    """Distribution of exit values (and optionally years to exit) to simulate."""
+    kind: str = 'lognormal'  # lognormal, uniform, triangular
+    params: Dict[str, float] = field(default_factory=dict)
+    zero_prob: float = 0.0  # probability the company returns nothing
+    years: Optional[Tuple[float, float]] = None  # (low, high) years to exit, uniform
+
+
+SIMULATION_PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def parse_distribution(spec: str, exit_years: Optional[str] = None) -> ExitDistribution:
+    """Parse KIND:key=value,... (e.g. lognormal:median=1.5e8,sigma=1.0,zero_prob=0.3)."""
+    kind, _, param_str = spec.partition(':')
+    params = {}
+    for item in filter(None, param_str.split(',')):
+        key, _, value = item.partition('=')
+        params[key.strip()] = float(value)
+
+    required = {
+        'lognormal': ['median', 'sigma'],
+        'uniform': ['low', 'high'],
+        'triangular': ['low', 'mode', 'high']
+    }
+    if kind not in required:
+        raise ValueError(f"Unknown distribution '{kind}' (expected one of {', '.join(required)})")
+    missing = [k for k in required[kind] if k not in params]
+    if missing:
+        raise ValueError(f"{kind} distribution needs: {', '.join(missing)}")
+
+    years = None
+    if exit_years:
+        bounds = [float(x) for x in exit_years.split(',')]
+        years = (bounds[0], bounds[-1])
+
+    return ExitDistribution(kind=kind, params=params, zero_prob=params.pop('zero_prob', 0.0), years=years)
+
+
+def draw_exits(
+    distribution: ExitDistribution,
+    draws: int,
+    seed: int
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Draw exit values (and years to exit) reproducibly from `seed`."""
+    rng = np.random.default_rng(seed)
+    p = distribution.params
+
+    if distribution.kind == 'lognormal':
+        exits = rng.lognormal(np.log(p['median']), p['sigma'], draws)
+    elif distribution.kind == 'uniform':
+        exits = rng.uniform(p['low'], p['high'], draws)
+    else:
+        exits = rng.triangular(p['low'], p['mode'], p['high'], draws)
+
+    if distribution.zero_prob > 0:
+        exits[rng.random(draws) < distribution.zero_prob] = 0.0
+
+    years = None
+    if distribution.years:
+        years = rng.uniform(distribution.years[0], distribution.years[1], draws)
+
+    return exits, years
+
+
+def _summarize_curves(
+    solved: WaterfallBreakpoints,
+    curves: List[Tuple[str, str, np.ndarray, np.ndarray, float]],
+    distribution: ExitDistribution,
+    draws: int,
+    seed: int
+) -> List[Dict[str, Any]]:
+    """Summarize simulated proceeds for a batch of (kind, name, values, slopes, invested) curves.
+
+    Draws are regenerated from the seed, so every worker sees the same
+    scenarios. Proceeds are non-decreasing in exit value, so their
+    percentiles are the curve evaluated at the exit-value order statistics,
+    and mean/std follow from per-segment sums of the draws; only the IRR
+    (which also depends on exit timing) needs a full pass per curve.
+    """
+    exits, years = draw_exits(distribution, draws, seed)
+    x = np.maximum(exits, 0)
+    segment = np.searchsorted(solved.breakpoints, x, side='right') - 1
+    offset = x - solved.breakpoints[segment]
+
+    k = len(solved.breakpoints)
+    seg_count = np.bincount(segment, minlength=k).astype(np.float64)
+    seg_sum = np.bincount(segment, weights=offset, minlength=k)
+    seg_sum_sq = np.bincount(segment, weights=offset * offset, minlength=k)
+
+    # Order statistics bracketing each percentile (numpy's default linear method)
+    positions = np.array(SIMULATION_PERCENTILES) / 100 * (draws - 1)
+    lower, upper = np.floor(positions).astype(int), np.ceil(positions).astype(int)
+    ranked = np.partition(x, np.unique(np.concatenate([lower, upper])))
+    frac = positions - lower
+
+    def curve_at(values: np.ndarray, slopes: np.ndarray, at: np.ndarray) -> np.ndarray:
+        seg = np.searchsorted(solved.breakpoints, at, side='right') - 1
+        return values[seg] + slopes[seg] * (at - solved.breakpoints[seg])
+
+    def percentiles(lo: np.ndarray, hi: np.ndarray) -> Dict[str, float]:
+        return dict(zip([f'p{q}' for q in SIMULATION_PERCENTILES], (lo + (hi - lo) * frac).tolist()))
+
+    summaries = []
+    for kind, name, values, slopes, invested in curves:
+        mean = (seg_count @ values + seg_sum @ slopes) / draws
+        mean_sq = (seg_count @ values ** 2 + 2 * seg_sum @ (values * slopes) + seg_sum_sq @ slopes ** 2) / draws
+        at_lower = curve_at(values, slopes, ranked[lower])
+        at_upper = curve_at(values, slopes, ranked[upper])
+
+        summary = {
+            'type': kind,
+            'name': name,
+            'invested': invested,
+            'expected_proceeds': float(mean),
+            'proceeds_std': float(np.sqrt(max(mean_sq - mean ** 2, 0.0))),
+            'proceeds_percentiles': percentiles(at_lower, at_upper)
+        }
+
+        if invested > 0:
+            # Smallest exit value at which proceeds reach the amount invested
+            seg_end_values = np.append(values[1:], np.inf)
+            first = int(np.argmax(seg_end_values >= invested))
+            if values[first] >= invested:
+                break_even = solved.breakpoints[first]
+            elif slopes[first] > 0:
+                break_even = solved.breakpoints[first] + (invested - values[first]) / slopes[first]
+            else:
+                break_even = np.inf
+
+            summary['expected_moic'] = float(mean / invested)
+            summary['prob_loss'] = float((x < break_even).mean())
+            summary['moic_percentiles'] = percentiles(at_lower / invested, at_upper / invested)
+
+            if years is not None:
+                moic = (values[segment] + slopes[segment] * offset) / invested
+                irr = np.power(moic, 1 / years) - 1
+                summary['irr_percentiles'] = dict(zip(
+                    [f'p{q}' for q in SIMULATION_PERCENTILES],
+                    np.percentile(irr, SIMULATION_PERCENTILES).tolist()
+                ))
+
+        summaries.append(summary)
+
+    return summaries
+
+
+def simulate_exits(
+    cap_table: CapTableInput,
+    distribution: ExitDistribution,
+    draws: int = 100_000,
+    seed: int = 42,
+    workers: int = 1
+) -> Dict[str, Any]:
+    """Monte Carlo exit simulation per holder and per share class.
+
+    Proceeds are evaluated from the exact breakpoint curve, one holder or
+    class at a time. With `workers` > 1 the holders/classes are sharded
+    across a process pool; results do not depend on the worker count.
+    """
+    solved = solve_waterfall_breakpoints(cap_table)
+
+    # Contiguous columns keep results bit-identical whether or not they are
+    # pickled to a worker
+    holder_values = np.asfortranarray(solved.values)
+    holder_slopes = np.asfortranarray(solved.slopes)
+    class_values = np.asfortranarray(solved.values @ solved.membership)
+    class_slopes = np.asfortranarray(solved.slopes @ solved.membership)
+    class_invested = solved.holders.class_invested()
+
+    curves = []
+    for j, (name, invested) in enumerate(zip(solved.holders.holder_names.tolist(),
+                                             solved.holders.invested.tolist())):
+        curves.append(('holder', name, holder_values[:, j], holder_slopes[:, j], invested))
+    for c, class_name in enumerate(solved.class_names):
+        curves.append(('share_class', class_name, class_values[:, c], class_slopes[:, c],
+                       float(class_invested[c])))
+
+    if workers > 1 and len(curves) > 1:
+        shards = [curves[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_summarize_curves, solved, shard, distribution, draws, seed)
+                       for shard in shards if shard]
+            by_name = {(r['type'], r['name']): r for f in futures for r in f.result()}
+        summaries = [by_name[(kind, name)] for kind, name, *_ in curves]
+    else:
+        summaries = _summarize_curves(solved, curves, distribution, draws, seed)
+
+    exits, _ = draw_exits(distribution, draws, seed)
+
+    return {
+        'draws': draws,
+        'seed': seed,
+        'distribution': asdict(distribution),
+        'exit_value_mean': float(exits.mean()),
+        'exit_value_percentiles': dict(zip(
+            [f'p{q}' for q in SIMULATION_PERCENTILES],
+            np.percentile(exits, SIMULATION_PERCENTILES).tolist()
+        )),
+        'holders': [s for s in summaries if s['type'] == 'holder'],
+        'share_classes': [s for s in summaries if s['type'] == 'share_class']
+    }
+
+
+def export_simulation_to_excel(result: Dict[str, Any], output_path: str):
+    """Export simulation summaries to Excel."""
+    rows = []
+    for summary in result['holders'] + result['share_classes']:
+        row = {
+            'Type': summary['type'],
+            'Name': summary['name'],
+            'Invested': summary['invested'],
+            'Expected Proceeds': summary['expected_proceeds'],
+            'Std Dev': summary['proceeds_std']
+        }
+        for key, value in summary['proceeds_percentiles'].items():
+            row[f'Proceeds {key.upper()}'] = value
+        row['Expected MOIC'] = summary.get('expected_moic')
+        row['P(Loss)'] = summary.get('prob_loss')
+        for key, value in summary.get('moic_percentiles', {}).items():
+            row[f'MOIC {key.upper()}'] = value
+        for key, value in summary.get('irr_percentiles', {}).items():
+            row[f'IRR {key.upper()}'] = value
+        rows.append(row)
+
+    with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
+        pd.DataFrame(rows).to_excel(writer, sheet_name='Simulation', index=False)
+        pd.DataFrame([
+            {'metric': 'draws', 'value': result['draws']},
+            {'metric': 'seed', 'value': result['seed']},
+            {'metric': 'distribution', 'value': json.dumps(result['distribution'])},
+            {'metric': 'exit_value_mean', 'value': result['exit_value_mean']}
+        ]).to_excel(writer, sheet_name='Assumptions', index=False)
 
 
 def export_to_excel(
@@ -259,23 +754,139 @@ def export_to_excel(
         roi_df.to_excel(writer, sheet_name='ROI Comparison', index=False)
 
 
-def main():
+def export_curve_to_excel(
+    matrix: WaterfallMatrix,
+    output_path: str
+):
+    """Export a dense exit curve (one row per exit value) to Excel."""
+    with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
+        workbook = writer.book
+        money_format = workbook.add_format({'num_format': '$#,##0'})
+
+        holder_df = pd.DataFrame(matrix.proceeds, columns=matrix.holders.holder_names.tolist())
+        holder_df.insert(0, 'Exit Value', matrix.exit_values)
+        holder_df.to_excel(writer, sheet_name='Holder Curve', index=False)
+
+        class_df = pd.DataFrame(matrix.class_proceeds, columns=matrix.class_names)
+        class_df.insert(0, 'Exit Value', matrix.exit_values)
+        class_df.to_excel(writer, sheet_name='Class Curve', index=False)
+
+        for sheet_name, df in [('Holder Curve', holder_df), ('Class Curve', class_df)]:
+            writer.sheets[sheet_name].set_column(0, len(df.columns) - 1, 15, money_format)
+
+
+def parse_curve(spec: str) -> np.ndarray:
+    """Parse a MIN,MAX,POINTS curve spec into evenly spaced exit values."""
+    low, high, points = [x.strip() for x in spec.split(',')]
+    return np.linspace(float(low), float(high), int(points))
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description='Generate exit waterfall analysis')
     parser.add_argument('--captable', required=True, help='Cap table or round model JSON')
-    parser.add_argument('--exits', required=True,
-                        help='Comma-separated exit values (e.g., 10000000,50000000,100000000)')
+    exits_group = parser.add_mutually_exclusive_group(required=True)
+    exits_group.add_argument('--exits',
+                             help='Comma-separated exit values (e.g., 10000000,50000000,100000000)')
+    exits_group.add_argument('--curve',
+                             help='Dense exit curve as MIN,MAX,POINTS (e.g., 0,500000000,10000)')
+    exits_group.add_argument('--breakpoints', action='store_true',
+                             help='Solve the exact piecewise-linear curve and save its segments as JSON')
+    exits_group.add_argument('--simulate', type=int, metavar='DRAWS',
+                             help='Monte Carlo simulation with this many exit draws')
+    parser.add_argument('--distribution', default='lognormal:median=100000000,sigma=1.0',
+                        help='Exit distribution for --simulate, KIND:key=value,... '
+                             '(lognormal: median,sigma; uniform: low,high; triangular: low,mode,high; '
+                             'optional zero_prob)')
+    parser.add_argument('--exit-years', help='Years to exit for IRR, fixed (5) or uniform range (3,8)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for --simulate')
+    parser.add_argument('--workers', type=int, default=1, help='Process pool size for --simulate')
     parser.add_argument('--output', default='waterfall.xlsx', help='Output Excel file')
     parser.add_argument('--json', action='store_true', help='Also output JSON')
+    parser.add_argument('--vested-as-of', metavar='DATE',
+                        help='Count only shares vested on this date (unallocated pool excluded)')
+    parser.add_argument('--exit-date', metavar='DATE',
+                        help='Count shares vested at this exit date, after --acceleration')
+    parser.add_argument('--acceleration', type=float, default=0.0,
+                        help='Fraction of unvested shares accelerated on exit (with --exit-date)')
+    return parser
 
-    args = parser.parse_args()
 
-    # Parse exit values
-    exit_values = [float(x.strip()) for x in args.exits.split(',')]
+def output_files(args: argparse.Namespace) -> List[str]:
+    """Every file main() writes for these arguments."""
+    if args.breakpoints:
+        return [args.output if args.output.endswith('.json') else args.output.replace('.xlsx', '.json')]
+    if args.json and not args.curve:
+        return [args.output, args.output.replace('.xlsx', '.json')]
+    return [args.output]
+
+
+def main():
+    args = build_parser().parse_args()
 
     # Load cap table
     print(f"Loading cap table from {args.captable}...")
     cap_table = load_cap_table(args.captable)
 
+    if args.vested_as_of or args.exit_date:
+        schedule = replace(STANDARD_SCHEDULE, acceleration=args.acceleration)
+        view = vested_view(cap_table, as_of=args.vested_as_of, exit_date=args.exit_date, schedule=schedule)
+        print(f"Using vested shares only: {view.fully_diluted_shares:,} fully diluted")
+        cap_table = view.to_cap_table()
+
+    if args.breakpoints:
+        solved = solve_waterfall_breakpoints(cap_table)
+        json_path = args.output if args.output.endswith('.json') else args.output.replace('.xlsx', '.json')
+        with open(json_path, 'w') as f:
+            json.dump({
+                'breakpoints': solved.breakpoints.tolist(),
+                'segments': solved.segments(),
+                'generated_at': datetime.now().isoformat()
+            }, f, indent=2)
+
+        print(f"\n=== WATERFALL BREAKPOINTS ({len(solved.breakpoints)} segments) ===\n")
+        for start in solved.breakpoints:
+            print(f"  ${start:,.0f}")
+        print(f"\nOutput saved to {json_path}")
+        return
+
+    if args.simulate:
+        distribution = parse_distribution(args.distribution, args.exit_years)
+        print(f"Simulating {args.simulate:,} exits ({distribution.kind}, seed {args.seed})...")
+        result = simulate_exits(cap_table, distribution, args.simulate, args.seed, args.workers)
+        result['generated_at'] = datetime.now().isoformat()
+
+        print(f"Exporting to {args.output}...")
+        export_simulation_to_excel(result, args.output)
+        if args.json:
+            json_path = args.output.replace('.xlsx', '.json')
+            with open(json_path, 'w') as f:
+                json.dump(result, f, indent=2)
+            print(f"JSON saved to {json_path}")
+
+        print("\n=== SIMULATION SUMMARY ===\n")
+        print(f"Mean exit: ${result['exit_value_mean']:,.0f}  "
+              f"(P50 ${result['exit_value_percentiles']['p50']:,.0f})")
+        print("-" * 50)
+        for summary in sorted(result['holders'], key=lambda x: -x['expected_proceeds'])[:5]:
+            moic_str = f"{summary['expected_moic']:.2f}x" if 'expected_moic' in summary else "N/A"
+            print(f"  {summary['name']}: E[${summary['expected_proceeds']:,.0f}]  "
+                  f"P50 ${summary['proceeds_percentiles']['p50']:,.0f}  MOIC: {moic_str}")
+        print(f"\nOutput saved to {args.output}")
+        return
+
+    if args.curve:
+        exit_curve = parse_curve(args.curve)
+        print(f"Computing {len(exit_curve):,}-point exit curve...")
+        matrix = solve_waterfall_breakpoints(cap_table).evaluate(exit_curve)
+
+        print(f"Exporting to {args.output}...")
+        export_curve_to_excel(matrix, args.output)
+        print(f"Output saved to {args.output}")
+        return
+
+    # Parse exit values
+    exit_values = [float(x.strip()) for x in args.exits.split(',')]
+
     # Generate scenarios
     print(f"Analyzing {len(exit_values)} exit scenarios...")
     scenarios = generate_waterfall_scenarios(cap_table, exit_values)
@@ -287,20 +898,8 @@ def main():
     # Optional JSON output
     if args.json:
         json_path = args.output.replace('.xlsx', '.json')
-        json_output = {
-            'scenarios': [
-                {
-                    'exit_value': s.exit_value,
-                    'holders_proceeds': [asdict(hp) for hp in s.holders_proceeds],
-                    'share_class_proceeds': s.share_class_proceeds,
-                    'total_distributed': s.total_distributed
-                }
-                for s in scenarios
-            ],
-            'generated_at': datetime.now().isoformat()
-        }
         with open(json_path, 'w') as f:
-            json.dump(json_output, f, indent=2)
+            json.dump(scenarios_output(scenarios), f, indent=2)
         print(f"JSON saved to {json_path}")
 
     # Print summary
@@ -317,4 +916,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    cached_main(main, __file__, build_parser(), inputs=lambda args: [args.captable], outputs=output_files)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Carta Portfolio Pull Benchmark
+Times pull_portfolio_summary against the mock Carta server: the old
+unpooled serial pull (a new connection per request) versus the pooled
+client at increasing max-in-flight limits. Checks that every run returns
+the same summary, including the per-item errors. With --cache, also times
+a cold, warm, revalidating (TTL 0, answered with 304s) and offline pull
+through the response cache. With --rate-limit / --throttle-rate the mock
+answers with 429s; the runs then retry through them (the unpooled
+baseline, which has no retries, is skipped) and a final run with retries
+off shows how many items the pull would have lost. With --sync, also times
+an incremental sync into a fresh snapshot: cold, unchanged, and after
+--rounds companies raise a new round.
+
+Usage:
+    python benchmark_carta.py --funds 20 --investments 20 --latency-ms 20
+    python benchmark_carta.py --in-flight 1,4,16,32 --error-rate 0.05
+    python benchmark_carta.py --in-flight 16 --skip-unpooled --cache
+    python benchmark_carta.py --investments 200 --max-page-size 25 --page-size 25
+    python benchmark_carta.py --in-flight 16 --skip-unpooled --sync --rounds 10
+    python benchmark_carta.py --in-flight 4,16 --rate-limit 100 --throttle-rate 0.05 --retry-after 0.2
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import requests
+from pathlib import Path
+from typing import Any, Dict
+
+from carta_client import CartaClient, CartaConfig
+from carta_sync import PortfolioSnapshot, sync_portfolio
+from mock_carta_server import MAX_PAGE_SIZE, MockCartaServer, issue_rounds, start_mock_server
+from response_cache import DEFAULT_TTLS, ResponseCache
+
+
+class UnpooledCartaClient(CartaClient):
+    """The pre-pooling client: bare requests.get per call, one call at a time."""
+
+    def _get(self, endpoint: str) -> Dict:
+        response = requests.get(f"{self.config.base_url}{endpoint}", headers=self.headers,
+                                timeout=self.config.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+def comparable(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary without the pull timestamp."""
+    return {key: value for key, value in summary.items() if key != "pulled_at"}
+
+
+def count_errors(summary: Dict[str, Any]) -> int:
+    """Performance and cap table fetches recorded as failed."""
+    errors = sum(1 for fund in summary["funds"] for inv in fund["investments"] if "cap_table_error" in inv)
+    return errors + sum(1 for fund in summary["funds"] if "performance_error" in fund)
+
+
+def time_syncs(server: MockCartaServer, url: str, in_flight: int, page_size: int, rounds: int) -> None:
+    """Cold, unchanged and post-round syncs into a temporary snapshot."""
+    fd, db = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    print(f"\n{'Sync':<18} {'Time':>8} {'Requests':>9} {'Fetched':>8} {'Changed':>8}")
+    try:
+        for label in ("cold", "unchanged", f"{rounds} new rounds"):
+            if label.endswith("rounds"):
+                issue_rounds(server.portfolio, rounds)
+                server.touch()
+            config = CartaConfig("bench", "bench", "firm-001", api_url=url, max_in_flight=in_flight,
+                                 page_size=page_size)
+            server.reset_stats()
+            with CartaClient(config) as client, PortfolioSnapshot(db) as snapshot:
+                started = time.perf_counter()
+                counts = sync_portfolio(client, snapshot)["counts"]
+                elapsed = time.perf_counter() - started
+            print(f"{label:<18} {elapsed:>7.2f}s {server.stats['requests']:>9} {counts['fetched']:>8} "
+                  f"{counts['changed']:>8}")
+    finally:
+        os.unlink(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Carta portfolio pull against the mock server")
+    parser.add_argument("--funds", type=int, default=20, help="Number of funds")
+    parser.add_argument("--investments", type=int, default=20, help="Investments per fund")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock server delay per request")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of items that return 500")
+    parser.add_argument("--in-flight", default="1,4,8,16", help="Comma-separated max-in-flight limits to time")
+    parser.add_argument("--skip-unpooled", action="store_true", help="Skip the serial unpooled baseline")
+    parser.add_argument("--cache", action="store_true", help="Also time pulls through the response cache")
+    parser.add_argument("--sync", action="store_true", help="Also time incremental snapshot syncs")
+    parser.add_argument("--rounds", type=int, default=5, help="Companies changed before the last --sync run")
+    parser.add_argument("--page-size", type=int, default=CartaConfig.page_size, help="Client page size on list endpoints")
+    parser.add_argument("--max-page-size", type=int, default=MAX_PAGE_SIZE, help="Largest page the mock returns")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Mock API requests per second before 429s")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of mock API requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on injected 429s")
+
+    args = parser.parse_args()
+    server, url = start_mock_server(latency_ms=args.latency_ms, funds=args.funds,
+                                    investments=args.investments, error_rate=args.error_rate,
+                                    rate_limit=args.rate_limit, throttle_rate=args.throttle_rate,
+                                    retry_after=args.retry_after, max_page_size=args.max_page_size)
+    throttling = bool(args.rate_limit or args.throttle_rate)
+
+    runs = [] if args.skip_unpooled or throttling else [("unpooled serial", UnpooledCartaClient, 1, None)]
+    runs += [(f"pooled x{n}", CartaClient, n, None) for n in (int(x) for x in args.in_flight.split(","))]
+    cache_dir = Path(tempfile.mkdtemp(prefix="carta-cache-"))
+    if args.cache:
+        in_flight = runs[-1][2]
+        expired = {name: 0 for name in DEFAULT_TTLS}
+        runs += [
+            ("cache cold", CartaClient, in_flight, ResponseCache(cache_dir)),
+            ("cache warm", CartaClient, in_flight, ResponseCache(cache_dir)),
+            ("cache revalidate", CartaClient, in_flight, ResponseCache(cache_dir, ttls=expired)),
+            ("cache offline", CartaClient, in_flight, ResponseCache(cache_dir, offline=True))
+        ]
+    if throttling:
+        runs.append(("no retries", CartaClient, runs[-1][2], None))
+
+    print(f"Portfolio: {args.funds} funds x {args.investments} investments, "
+          f"{args.latency_ms:g}ms latency, {args.error_rate:.0%} item errors")
+    if throttling:
+        print(f"Mock throttling: {args.rate_limit or 'no'} requests/s limit, "
+              f"{args.throttle_rate:.0%} random 429s (Retry-After {args.retry_after:g}s)")
+    print(f"\n{'Client':<18} {'Time':>8} {'Requests':>9} {'304s':>5} {'429s':>5} {'Retries':>8} "
+          f"{'Throttled':>10} {'Conns':>6} {'Peak':>5} {'Speedup':>8}")
+
+    baseline_time = reference = None
+    try:
+        for label, client_class, in_flight, cache in runs:
+            retries = 0 if label == "no retries" else CartaConfig.max_retries
+            config = CartaConfig("bench", "bench", "firm-001", api_url=url, max_in_flight=in_flight,
+                                 max_retries=retries, page_size=args.page_size)
+            server.reset_stats()
+            with client_class(config, cache=cache) as client:
+                started = time.perf_counter()
+                try:
+                    summary = comparable(client.pull_portfolio_summary())
+                except requests.HTTPError as e:
+                    if label != "no retries":
+                        raise
+                    summary, failure = None, str(e)  # a throttled firm or fund listing fails the whole pull
+                elapsed = time.perf_counter() - started
+                totals = client.metrics.totals()
+
+            if reference is None:
+                reference, baseline_time = summary, elapsed
+            elif label == "no retries":
+                lost = (f"{count_errors(summary) - count_errors(reference)} more items to 429s"
+                        if summary is not None else f"everything: {failure}")
+            elif summary != reference and not (cache and cache.offline):
+                # Offline pulls report uncached failures as cache misses, so only they may differ
+                raise SystemExit(f"{label}: summary differs from {runs[0][0]}")
+
+            stats = server.stats
+            print(f"{label:<18} {elapsed:>7.2f}s {stats['requests']:>9} {stats['not_modified']:>5} "
+                  f"{stats['throttled']:>5} {totals['retries']:>8} {totals['throttle_seconds']:>9.2f}s "
+                  f"{stats['connections']:>6} {stats['max_in_flight']:>5} {baseline_time / elapsed:>7.1f}x")
+
+        print(f"\nAll runs returned the same summary ({count_errors(reference)} per-item errors captured)")
+        if throttling:
+            print(f"Without retries the pull lost {lost}")
+        if args.sync:
+            time_syncs(server, url, runs[-1][2], args.page_size, args.rounds)
+    finally:
+        server.shutdown()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,56 @@
 #!/usr/bin/env python3
 """
 Carta API Client for VC Due Diligence
+Requests go through one pooled requests.Session; the portfolio summary pulls
+fund performance, investment listings and cap tables concurrently, with at
+most `max_in_flight` requests outstanding. GETs are paced by an adaptive
+token bucket (the environment's published rate limit, adjusted by 429s and
+rate-limit headers) and retried with jittered backoff on 429/502/503/504.
+List endpoints are paged through lazily (iter_funds, iter_investments,
+iter_securities), one page fetched ahead of the records being consumed, and
+the summary can be streamed record by record to a JSON-lines file.
+
 Usage: python carta_client.py --firm-id <FIRM_ID> [--action investments|captable|performance]
+       python carta_client.py --action summary --max-in-flight 16
+       CARTA_API_URL=http://127.0.0.1:8765 python carta_client.py --action summary  # mock_carta_server.py
+       python carta_client.py --action summary --offline  # serve from the response cache only
+       python carta_client.py --action summary --rate-limit 60 --max-retries 6 --metrics
+       python carta_client.py --action summary --jsonl portfolio.jsonl --page-size 200
 """
 
 import os
 import json
+import sys
+import threading
+import time
 import requests
-from typing import Dict, List, Any, Optional
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
+from urllib.parse import urlencode
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from rate_limit import RequestMetrics, RetryPolicy, TokenBucket, parse_retry_after
+from response_cache import OfflineCacheMiss, ResponseCache, cache_enabled
+
+# Published requests/minute per environment (references/api-endpoints.md)
+RATE_LIMITS = {"playground": 100, "production": 1000}
+
+
+def lookahead(items: Iterable, n: int) -> Iterator:
+    """Yield items in order while keeping up to n more already pulled from the source.
+    
+    When pulling an item submits its work to a pool, this keeps n requests
+    ahead of the consumer without materialising the whole stream.
+    """
+    buffer: deque = deque()
+    for item in items:
+        buffer.append(item)
+        if len(buffer) > n:
+            yield buffer.popleft()
+    yield from buffer
 
 
 @dataclass
@@ -19,15 +60,34 @@ class CartaConfig:
     client_secret: str
     firm_id: str
     environment: str = "playground"
+    api_url: Optional[str] = None  # overrides the environment's host, e.g. a mock server
+    max_in_flight: int = 8
+    timeout: float = 30.0
+    rate_limit: Optional[float] = None  # requests/minute; None = environment default, 0 = unpaced
+    max_retries: int = 4
+    page_size: int = 100
+    
+    @property
+    def requests_per_minute(self) -> Optional[float]:
+        """Client-side pacing; a custom api_url is unpaced unless rate_limit is set."""
+        if self.rate_limit is not None:
+            return self.rate_limit or None
+        if self.api_url:
+            return None
+        return RATE_LIMITS.get(self.environment, RATE_LIMITS["playground"])
     
     @property
     def base_url(self) -> str:
+        if self.api_url:
+            return f"{self.api_url.rstrip('/')}/v1alpha1"
         if self.environment == "production":
             return "https://api.carta.com/v1alpha1"
         return "https://api.playground.carta.team/v1alpha1"
     
     @property
     def token_url(self) -> str:
+        if self.api_url:
+            return f"{self.api_url.rstrip('/')}/oauth/token"
         if self.environment == "production":
             return "https://api.carta.com/oauth/token"
         return "https://api.playground.carta.team/oauth/token"
@@ -36,16 +96,43 @@ class CartaConfig:
 class CartaClient:
     """Carta API client for VC diligence workflows."""
     
-    def __init__(self, config: CartaConfig):
+    def __init__(self, config: CartaConfig, cache: Optional[ResponseCache] = None):
         self.config = config
+        self.cache = cache
         self._access_token: Optional[str] = None
         self._token_expires: Optional[datetime] = None
+        self._token_lock = threading.Lock()
+        
+        # Shared by every thread of the pull, so a 429 slows them all
+        rate = config.requests_per_minute
+        self.limiter = TokenBucket(rate / 60 if rate else None)
+        self.retry_policy = RetryPolicy(max_retries=config.max_retries)
+        self.metrics = RequestMetrics()
+        
+        # One keep-alive connection per concurrent request, plus one per
+        # listing's next-page prefetch
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2 * max(config.max_in_flight, 1))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+    
+    def __enter__(self) -> "CartaClient":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
     
     @property
     def access_token(self) -> str:
         """Get or refresh access token."""
         if self._access_token is None or self._is_token_expired():
-            self._refresh_token()
+            with self._token_lock:
+                if self._access_token is None or self._is_token_expired():
+                    self._refresh_token()
         return self._access_token
     
     def _is_token_expired(self) -> bool:
@@ -55,7 +142,7 @@ class CartaClient:
     
     def _refresh_token(self) -> None:
         """Refresh OAuth access token."""
-        response = requests.post(
+        response = self.session.post(
             self.config.token_url,
             data={
                 "grant_type": "client_credentials",
@@ -69,14 +156,15 @@ class CartaClient:
                     "read_investor_securities",
                     "read_investor_stakeholdercapitalizationtable"
                 ])
-            }
+            },
+            timeout=self.config.timeout
         )
         response.raise_for_status()
         data = response.json()
         self._access_token = data["access_token"]
         # Assume 1 hour expiry if not specified
         expires_in = data.get("expires_in", 3600)
-        self._token_expires = datetime.now().timestamp() + expires_in
+        self._token_expires = datetime.now() + timedelta(seconds=expires_in)
     
     @property
     def headers(self) -> Dict[str, str]:
@@ -85,12 +173,92 @@ class CartaClient:
             "Content-Type": "application/json"
         }
     
-    def _get(self, endpoint: str) -> Dict:
-        """Make GET request to Carta API."""
+    def _request(self, endpoint: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET an endpoint under the rate limiter, retrying throttled and transient failures.
+        
+        Returns the final response, whatever its status; raises only when the
+        last attempt could not connect.
+        """
         url = f"{self.config.base_url}{endpoint}"
-        response = requests.get(url, headers=self.headers)
+        attempt = throttled = 0
+        waited = 0.0
+        while True:
+            waited += self.limiter.acquire()
+            try:
+                response = self.session.get(url, headers={**self.headers, **(headers or {})},
+                                            timeout=self.config.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if not self.retry_policy.should_retry(attempt, None):
+                    self.metrics.record(endpoint, requests=1, attempts=attempt + 1, retries=attempt,
+                                        throttled=throttled, errors=1, throttle_seconds=waited)
+                    raise
+                retry_after = None
+            else:
+                self.limiter.observe(response.headers)
+                if not self.retry_policy.should_retry(attempt, response.status_code):
+                    self.metrics.record(endpoint, requests=1, attempts=attempt + 1, retries=attempt,
+                                        throttled=throttled, errors=int(response.status_code >= 400),
+                                        throttle_seconds=waited)
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    throttled += 1
+                    self.limiter.throttle(retry_after)
+            
+            delay = self.retry_policy.delay(attempt, retry_after)
+            time.sleep(delay)
+            waited += delay
+            attempt += 1
+    
+    def _get(self, endpoint: str) -> Dict:
+        """Make GET request to Carta API (through the response cache, if any)."""
+        if self.cache is None:
+            response = self._request(endpoint)
+            response.raise_for_status()
+            return response.json()
+        
+        api, firm_id = self.config.base_url, self.config.firm_id
+        entry = self.cache.lookup(api, firm_id, endpoint)
+        if entry is not None and (self.cache.offline or self.cache.is_fresh(entry)):
+            self.cache.count("hits")
+            return entry["body"]
+        if self.cache.offline:
+            raise OfflineCacheMiss(f"Not in the offline cache: {endpoint}")
+        
+        response = self._request(endpoint, self.cache.validators(entry))
+        if response.status_code == 304 and entry is not None:
+            self.cache.count("revalidated")
+            self.cache.refresh(entry)
+            return entry["body"]
         response.raise_for_status()
-        return response.json()
+        body = response.json()
+        self.cache.count("misses")
+        self.cache.store(api, firm_id, endpoint, body,
+                         response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return body
+    
+    def _paginate(self, endpoint: str, key: str) -> Iterator[Dict]:
+        """Records under `key` from every page of a list endpoint.
+        
+        The next page is requested as soon as its token is known, so it
+        downloads while the current page's records are consumed. Closing the
+        generator early waits for at most that one request.
+        """
+        def page(token: Optional[str]) -> Dict:
+            params = {"pageSize": self.config.page_size}
+            if token:
+                params["pageToken"] = token
+            return self._get(f"{endpoint}?{urlencode(params)}")
+        
+        with ThreadPoolExecutor(max_workers=1) as prefetch:
+            result = page(None)
+            while True:
+                token = result.get("nextPageToken")
+                upcoming = prefetch.submit(page, token) if token else None
+                yield from result.get(key, [])
+                if upcoming is None:
+                    return
+                result = upcoming.result()
     
     # ============ Investor API ============
     
@@ -98,20 +266,25 @@ class CartaClient:
         """Get firm information."""
         return self._get(f"/investors/firms/{self.config.firm_id}")
     
+    def iter_funds(self) -> Iterator[Dict]:
+        """Stream every fund in the firm, page by page."""
+        return self._paginate(f"/investors/firms/{self.config.firm_id}/funds", "funds")
+    
     def list_funds(self) -> List[Dict]:
         """List all funds in the firm."""
-        result = self._get(f"/investors/firms/{self.config.firm_id}/funds")
-        return result.get("funds", [])
+        return list(self.iter_funds())
     
-    def list_investments(self, fund_id: Optional[str] = None) -> List[Dict]:
-        """List all portfolio investments."""
+    def iter_investments(self, fund_id: Optional[str] = None) -> Iterator[Dict]:
+        """Stream portfolio investments (of one fund, or the whole firm), page by page."""
         if fund_id:
-            result = self._get(
-                f"/investors/firms/{self.config.firm_id}/funds/{fund_id}/investments"
-            )
+            endpoint = f"/investors/firms/{self.config.firm_id}/funds/{fund_id}/investments"
         else:
-            result = self._get(f"/investors/firms/{self.config.firm_id}/investments")
-        return result.get("investments", [])
+            endpoint = f"/investors/firms/{self.config.firm_id}/investments"
+        return self._paginate(endpoint, "investments")
+    
+    def list_investments(self, fund_id: Optional[str] = None) -> List[Dict]:
+        """List all portfolio investments."""
+        return list(self.iter_investments(fund_id))
     
     def get_cap_table(self, fund_id: str, company_id: str, cap_table_id: str) -> Dict:
         """Get cap table for a portfolio company."""
@@ -126,67 +299,108 @@ class CartaClient:
             f"/investors/firms/{self.config.firm_id}/funds/{fund_id}/performance"
         )
     
-    def list_securities(self, fund_id: str, company_id: str) -> List[Dict]:
-        """List securities for a portfolio company."""
-        result = self._get(
+    def iter_securities(self, fund_id: str, company_id: str) -> Iterator[Dict]:
+        """Stream securities for a portfolio company, page by page."""
+        return self._paginate(
             f"/investors/firms/{self.config.firm_id}/funds/{fund_id}"
-            f"/investments/{company_id}/securities"
+            f"/investments/{company_id}/securities",
+            "securities"
         )
-        return result.get("securities", [])
+    
+    def list_securities(self, fund_id: str, company_id: str) -> List[Dict]:
+        """List securities for a portfolio company."""
+        return list(self.iter_securities(fund_id, company_id))
     
     # ============ Diligence Helpers ============
     
-    def pull_portfolio_summary(self) -> Dict[str, Any]:
-        """Pull complete portfolio summary for diligence."""
-        summary = {
-            "firm": self.get_firm_info(),
-            "funds": [],
-            "pulled_at": datetime.now().isoformat()
-        }
+    def iter_portfolio_records(self) -> Iterator[Dict[str, Any]]:
+        """Stream the portfolio summary as flat records, in listing order.
         
-        funds = self.list_funds()
-        for fund in funds:
-            fund_data = {
+        Yields a "firm" record, then each fund's "fund" record (with its
+        performance) followed by one "investment" record per investment (with
+        its cap table). Fund performance, investment listings and cap tables
+        are fetched concurrently (at most config.max_in_flight at a time) a
+        bounded distance ahead of the consumer, so memory stays flat however
+        large the firm. A failed performance or cap table fetch is recorded on
+        its record, while a failed firm, fund or investment listing raises.
+        """
+        workers = max(self.config.max_in_flight, 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            firm = pool.submit(self.get_firm_info)
+            funds = lookahead(((
+                fund,
+                pool.submit(self.get_fund_performance, fund["id"]),
+                pool.submit(self.list_investments, fund["id"])
+            ) for fund in self.iter_funds()), workers)
+            
+            yield {"record": "firm", "firm": firm.result(), "pulled_at": datetime.now().isoformat()}
+            
+            for record, fetch, key in lookahead(self._portfolio_fetches(pool, funds), 4 * workers):
+                if fetch is not None:
+                    try:
+                        record[key] = fetch.result()
+                    except Exception as e:
+                        record[f"{key}_error"] = str(e)
+                yield record
+    
+    def _portfolio_fetches(self, pool: ThreadPoolExecutor,
+                           funds: Iterable[Tuple[Dict, Future, Future]]) -> Iterator[Tuple[Dict, Optional[Future], str]]:
+        """(record, pending fetch, key to store it under) for each fund and investment."""
+        for fund, performance, listing in funds:
+            yield {
+                "record": "fund",
                 "fund_id": fund["id"],
                 "fund_name": fund.get("name"),
-                "performance": None,
-                "investments": []
-            }
-            
-            # Get fund performance
-            try:
-                fund_data["performance"] = self.get_fund_performance(fund["id"])
-            except Exception as e:
-                fund_data["performance_error"] = str(e)
+                "performance": None
+            }, performance, "performance"
             
-            # Get investments
-            investments = self.list_investments(fund["id"])
-            for inv in investments:
-                inv_data = {
+            for inv in listing.result():
+                # Get cap table if available
+                cap_tables = inv.get("capitalizationTables", [])
+                cap_table = pool.submit(
+                    self.get_cap_table, fund["id"], inv["companyId"], cap_tables[0]["id"]
+                ) if cap_tables else None
+                yield {
+                    "record": "investment",
+                    "fund_id": fund["id"],
                     "company_id": inv.get("companyId"),
                     "company_name": inv.get("companyName"),
                     "investment_date": inv.get("investmentDate"),
                     "cap_table": None
-                }
-                
-                # Get cap table if available
-                cap_tables = inv.get("capitalizationTables", [])
-                if cap_tables:
-                    try:
-                        inv_data["cap_table"] = self.get_cap_table(
-                            fund["id"],
-                            inv["companyId"],
-                            cap_tables[0]["id"]
-                        )
-                    except Exception as e:
-                        inv_data["cap_table_error"] = str(e)
-                
-                fund_data["investments"].append(inv_data)
-            
-            summary["funds"].append(fund_data)
+                }, cap_table, "cap_table"
+    
+    def pull_portfolio_summary(self) -> Dict[str, Any]:
+        """Pull complete portfolio summary for diligence.
+        
+        Assembles iter_portfolio_records into one dict: funds in listing
+        order, each with its investments. Use stream_portfolio_summary for
+        firms too large to hold in memory.
+        """
+        summary: Dict[str, Any] = {}
+        for record in self.iter_portfolio_records():
+            kind = record.pop("record")
+            if kind == "firm":
+                summary = {"firm": record["firm"], "funds": [], "pulled_at": record["pulled_at"]}
+            elif kind == "fund":
+                fund_data = {**record, "investments": []}
+                if "performance_error" in fund_data:
+                    fund_data["performance_error"] = fund_data.pop("performance_error")
+                summary["funds"].append(fund_data)
+            else:
+                record.pop("fund_id")
+                summary["funds"][-1]["investments"].append(record)
         
         return summary
     
+    def stream_portfolio_summary(self, path: str) -> Dict[str, int]:
+        """Write iter_portfolio_records to a JSON-lines file as they arrive; returns record counts."""
+        counts = {"firm": 0, "fund": 0, "investment": 0}
+        with open(path, "w") as f:
+            for record in self.iter_portfolio_records():
+                f.write(json.dumps(record, default=str) + "\n")
+                counts[record["record"]] += 1
+        return counts
+    
     def extract_ownership_metrics(self, cap_table: Dict) -> Dict[str, Any]:
         """Extract key ownership metrics from cap table."""
         metrics = {
@@ -228,10 +442,24 @@ def load_config_from_env() -> CartaConfig:
         client_id=os.environ.get("CARTA_CLIENT_ID", ""),
         client_secret=os.environ.get("CARTA_CLIENT_SECRET", ""),
         firm_id=os.environ.get("CARTA_FIRM_ID", ""),
-        environment=os.environ.get("CARTA_ENV", "playground")
+        environment=os.environ.get("CARTA_ENV", "playground"),
+        api_url=os.environ.get("CARTA_API_URL") or None,
+        max_in_flight=int(os.environ.get("CARTA_MAX_IN_FLIGHT", 8)),
+        rate_limit=float(os.environ["CARTA_RATE_LIMIT"]) if os.environ.get("CARTA_RATE_LIMIT") else None,
+        max_retries=int(os.environ.get("CARTA_MAX_RETRIES", 4)),
+        page_size=int(os.environ.get("CARTA_PAGE_SIZE", 100))
     )
 
 
+def parse_ttls(values: List[str]) -> Dict[str, float]:
+    """CLASS=SECONDS pairs from --cache-ttl."""
+    ttls = {}
+    for value in values:
+        name, _, seconds = value.partition("=")
+        ttls[name] = float(seconds)
+    return ttls
+
+
 if __name__ == "__main__":
     import argparse
     
@@ -242,6 +470,17 @@ if __name__ == "__main__":
     parser.add_argument("--fund-id", help="Fund ID for fund-specific actions")
     parser.add_argument("--output", default="json", choices=["json", "pretty"],
                        help="Output format")
+    parser.add_argument("--max-in-flight", type=int, help="Concurrent requests for the summary (overrides env)")
+    parser.add_argument("--offline", action="store_true", help="Serve every request from the response cache")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
+    parser.add_argument("--cache-dir", help="Response cache directory")
+    parser.add_argument("--cache-ttl", action="append", default=[], metavar="CLASS=SECONDS",
+                       help="Override a TTL class (firm, funds, performance, investments, cap_table, securities)")
+    parser.add_argument("--rate-limit", type=float, help="Requests per minute, 0 for unpaced (overrides env)")
+    parser.add_argument("--max-retries", type=int, help="Retries per GET on 429/502/503/504 (overrides env)")
+    parser.add_argument("--page-size", type=int, help="Records per page on list endpoints (overrides env)")
+    parser.add_argument("--jsonl", help="Stream the summary to this JSON-lines file instead of printing it")
+    parser.add_argument("--metrics", action="store_true", help="Print per-endpoint retry and throttle counts to stderr")
     
     args = parser.parse_args()
     
@@ -249,8 +488,16 @@ if __name__ == "__main__":
     config = load_config_from_env()
     if args.firm_id:
         config.firm_id = args.firm_id
+    if args.max_in_flight:
+        config.max_in_flight = args.max_in_flight
+    if args.rate_limit is not None:
+        config.rate_limit = args.rate_limit
+    if args.max_retries is not None:
+        config.max_retries = args.max_retries
+    if args.page_size:
+        config.page_size = args.page_size
     
-    if not config.client_id or not config.client_secret:
+    if not args.offline and (not config.client_id or not config.client_secret):
         print("Error: CARTA_CLIENT_ID and CARTA_CLIENT_SECRET must be set")
         exit(1)
     
@@ -258,8 +505,14 @@ if __name__ == "__main__":
         print("Error: CARTA_FIRM_ID must be set or --firm-id provided")
         exit(1)
     
+    use_cache = cache_enabled() and not args.no_cache
+    if args.offline and not use_cache:
+        print("Error: --offline needs the response cache")
+        exit(1)
+    
     # Create client
-    client = CartaClient(config)
+    cache = ResponseCache(args.cache_dir, parse_ttls(args.cache_ttl), offline=args.offline) if use_cache else None
+    client = CartaClient(config, cache=cache)
     
     # Execute action
     try:
@@ -267,6 +520,8 @@ if __name__ == "__main__":
             result = client.list_investments(args.fund_id)
         elif args.action == "performance" and args.fund_id:
             result = client.get_fund_performance(args.fund_id)
+        elif args.action == "summary" and args.jsonl:
+            result = {"jsonl": args.jsonl, "records": client.stream_portfolio_summary(args.jsonl)}
         elif args.action == "summary":
             result = client.pull_portfolio_summary()
         else:
@@ -281,3 +536,7 @@ if __name__ == "__main__":
     except Exception as e:
         print(json.dumps({"error": str(e)}))
         exit(1)
+    
+    finally:
+        if args.metrics:
+            print(json.dumps(client.metrics.report(), indent=2), file=sys.stderr)
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Carta Incremental Sync
+Keeps a local SQLite snapshot of a firm's funds, investments, cap tables and
+securities, every row with a content hash and first/last-seen timestamps.
+A sync re-reads the fund and investment listings (a few paged requests),
+fetches cap tables and securities only for investments whose listing record
+is new, changed or failed last time, and reports what changed, with the
+ownership deltas from CartaClient.extract_ownership_metrics.
+
+Usage:
+    python carta_sync.py --db portfolio.db --report changes.json
+    python carta_sync.py --full --max-in-flight 16
+    CARTA_API_URL=http://127.0.0.1:8765 python carta_sync.py  # mock_carta_server.py
+
+    # In-process
+    from carta_sync import PortfolioSnapshot, sync_portfolio
+    with PortfolioSnapshot("portfolio.db") as snapshot:
+        report = sync_portfolio(client, snapshot)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from carta_client import CartaClient, load_config_from_env, lookahead
+
+SNAPSHOT_PATH = Path(os.environ.get(
+    "CARTA_SNAPSHOT_DB",
+    Path(__file__).resolve().parents[3] / ".cache" / "carta-sync" / "snapshot.db"
+))
+
+# extract_ownership_metrics fields compared between snapshots
+OWNERSHIP_FIELDS = ("fully_diluted_shares", "issued_shares", "stakeholder_count",
+                    "founders_pct", "investors_pct", "employees_pct", "option_pool_pct")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS funds (
+    firm_id TEXT, fund_id TEXT, hash TEXT, data TEXT, first_seen TEXT, last_seen TEXT,
+    PRIMARY KEY (firm_id, fund_id)
+);
+CREATE TABLE IF NOT EXISTS investments (
+    firm_id TEXT, fund_id TEXT, company_id TEXT,
+    hash TEXT,  -- listing hash the details were fetched for; NULL until they all succeed
+    data TEXT, first_seen TEXT, last_seen TEXT, fetched_at TEXT,
+    PRIMARY KEY (firm_id, fund_id, company_id)
+);
+CREATE TABLE IF NOT EXISTS cap_tables (
+    firm_id TEXT, fund_id TEXT, company_id TEXT, cap_table_id TEXT, hash TEXT, data TEXT, last_seen TEXT,
+    PRIMARY KEY (firm_id, fund_id, company_id)
+);
+CREATE TABLE IF NOT EXISTS securities (
+    firm_id TEXT, fund_id TEXT, company_id TEXT, hash TEXT, data TEXT, last_seen TEXT,
+    PRIMARY KEY (firm_id, fund_id, company_id)
+);
+CREATE TABLE IF NOT EXISTS syncs (
+    id INTEGER PRIMARY KEY, firm_id TEXT, started_at TEXT, finished_at TEXT, full INTEGER, counts TEXT
+);
+"""
+
+Key = Tuple[str, str]  # (fund_id, company_id)
+
+
+def content_hash(record: Any) -> str:
+    """Hash of a record's canonical JSON (key order and whitespace ignored)."""
+    return hashlib.sha256(json.dumps(record, sort_keys=True, separators=(",", ":"), default=str).encode()).hexdigest()
+
+
+class PortfolioSnapshot:
+    """SQLite store of each firm's last synced Carta data."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else SNAPSHOT_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "PortfolioSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def funds(self, firm_id: str) -> Dict[str, str]:
+        """Fund id -> hash."""
+        rows = self.db.execute("SELECT fund_id, hash FROM funds WHERE firm_id = ?", (firm_id,))
+        return dict(rows.fetchall())
+
+    def investments(self, firm_id: str) -> Dict[Key, Dict[str, Any]]:
+        """(fund_id, company_id) -> {"hash", "data"} of every stored investment."""
+        rows = self.db.execute(
+            "SELECT fund_id, company_id, hash, data FROM investments WHERE firm_id = ?", (firm_id,))
+        return {(fund_id, company_id): {"hash": h, "data": json.loads(data)}
+                for fund_id, company_id, h, data in rows}
+
+    def details(self, firm_id: str, key: Key) -> Dict[str, Any]:
+        """Stored cap table (or None) and the hashes of the cap table and securities."""
+        cap_table = self.db.execute(
+            "SELECT hash, data FROM cap_tables WHERE firm_id = ? AND fund_id = ? AND company_id = ?",
+            (firm_id, *key)).fetchone()
+        securities = self.db.execute(
+            "SELECT hash FROM securities WHERE firm_id = ? AND fund_id = ? AND company_id = ?",
+            (firm_id, *key)).fetchone()
+        return {
+            "cap_table": json.loads(cap_table[1]) if cap_table else None,
+            "cap_table_hash": cap_table[0] if cap_table else None,
+            "securities_hash": securities[0] if securities else None
+        }
+
+    def cap_tables(self, firm_id: str) -> Dict[Key, Dict]:
+        """(fund_id, company_id) -> stored cap table."""
+        rows = self.db.execute("SELECT fund_id, company_id, data FROM cap_tables WHERE firm_id = ?", (firm_id,))
+        return {(fund_id, company_id): json.loads(data) for fund_id, company_id, data in rows}
+
+    def last_sync(self, firm_id: str) -> Optional[str]:
+        row = self.db.execute(
+            "SELECT finished_at FROM syncs WHERE firm_id = ? ORDER BY id DESC LIMIT 1", (firm_id,)).fetchone()
+        return row[0] if row else None
+
+    def put_fund(self, firm_id: str, fund: Dict, fund_hash: str, now: str) -> None:
+        self.db.execute(
+            "INSERT INTO funds VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (firm_id, fund_id) "
+            "DO UPDATE SET hash = excluded.hash, data = excluded.data, last_seen = excluded.last_seen",
+            (firm_id, fund["id"], fund_hash, json.dumps(fund), now, now))
+
+    def put_investment(self, firm_id: str, fund_id: str, inv: Dict, inv_hash: Optional[str], now: str) -> None:
+        self.db.execute(
+            "INSERT INTO investments VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (firm_id, fund_id, company_id) "
+            "DO UPDATE SET hash = excluded.hash, data = excluded.data, last_seen = excluded.last_seen, "
+            "fetched_at = excluded.fetched_at",
+            (firm_id, fund_id, inv["companyId"], inv_hash, json.dumps(inv), now, now, now))
+
+    def put_cap_table(self, firm_id: str, key: Key, cap_table: Optional[Dict], now: str) -> None:
+        if cap_table is None:
+            self.db.execute("DELETE FROM cap_tables WHERE firm_id = ? AND fund_id = ? AND company_id = ?",
+                            (firm_id, *key))
+            return
+        self.db.execute(
+            "INSERT OR REPLACE INTO cap_tables VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (firm_id, *key, cap_table.get("id"), content_hash(cap_table), json.dumps(cap_table), now))
+
+    def put_securities(self, firm_id: str, key: Key, securities: List[Dict], now: str) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO securities VALUES (?, ?, ?, ?, ?, ?)",
+            (firm_id, *key, content_hash(securities), json.dumps(securities), now))
+
+    def touch(self, firm_id: str, keys: Iterable[Key], now: str) -> None:
+        """Mark unchanged investments (and their details) as seen."""
+        rows = [(now, firm_id, *key) for key in keys]
+        for table in ("investments", "cap_tables", "securities"):
+            self.db.executemany(
+                f"UPDATE {table} SET last_seen = ? WHERE firm_id = ? AND fund_id = ? AND company_id = ?", rows)
+
+    def remove_investments(self, firm_id: str, keys: Iterable[Key]) -> None:
+        rows = [(firm_id, *key) for key in keys]
+        for table in ("investments", "cap_tables", "securities"):
+            self.db.executemany(f"DELETE FROM {table} WHERE firm_id = ? AND fund_id = ? AND company_id = ?", rows)
+
+    def remove_funds(self, firm_id: str, fund_ids: Iterable[str]) -> None:
+        self.db.executemany("DELETE FROM funds WHERE firm_id = ? AND fund_id = ?",
+                            [(firm_id, fund_id) for fund_id in fund_ids])
+
+    def record_sync(self, firm_id: str, started: str, full: bool, counts: Dict[str, int]) -> None:
+        self.db.execute("INSERT INTO syncs (firm_id, started_at, finished_at, full, counts) VALUES (?, ?, ?, ?, ?)",
+                        (firm_id, started, datetime.now().isoformat(), int(full), json.dumps(counts)))
+
+
+def ownership_delta(client: CartaClient, before: Optional[Dict], after: Optional[Dict]) -> Dict[str, Dict[str, Any]]:
+    """Before, after and change of each ownership metric (None where a cap table is missing)."""
+    old = client.extract_ownership_metrics(before) if before else None
+    new = client.extract_ownership_metrics(after) if after else None
+    delta = {}
+    for field in OWNERSHIP_FIELDS:
+        b = round(old[field], 4) if old else None
+        a = round(new[field], 4) if new else None
+        delta[field] = {"before": b, "after": a, "delta": round(a - b, 4) if old and new else None}
+    return delta
+
+
+def _changed_fields(before: Dict, after: Dict) -> List[str]:
+    return sorted(k for k in before.keys() | after.keys() if before.get(k) != after.get(k))
+
+
+def _detail_fetches(client: CartaClient, pool: ThreadPoolExecutor, funds: Iterable[Tuple[Dict, Future]],
+                    known: Dict[Key, Dict[str, Any]], full: bool,
+                    state: Dict[str, Any]) -> Iterator[Tuple[Key, Dict, str, Optional[Future], Future]]:
+    """Walk the listings, submitting cap table and securities fetches for new or changed investments.
+
+    Funds and unchanged investments are recorded in `state` along the way.
+    """
+    for fund, listing in funds:
+        state["funds"].append(fund)
+        for inv in listing.result():
+            key = (fund["id"], inv["companyId"])
+            inv_hash = content_hash(inv)
+            state["seen"].add(key)
+            prior = known.get(key)
+            if not full and prior is not None and prior["hash"] == inv_hash:
+                state["unchanged"].append(key)
+                continue
+            cap_tables = inv.get("capitalizationTables", [])
+            cap_table = pool.submit(
+                client.get_cap_table, fund["id"], inv["companyId"], cap_tables[0]["id"]
+            ) if cap_tables else None
+            securities = pool.submit(client.list_securities, fund["id"], inv["companyId"])
+            yield key, inv, inv_hash, cap_table, securities
+
+
+def sync_portfolio(client: CartaClient, snapshot: PortfolioSnapshot, full: bool = False) -> Dict[str, Any]:
+    """Bring the snapshot up to date with Carta and report what changed.
+
+    Only investments whose listing record differs from the snapshot (or
+    whose details failed to fetch last time) get their cap table and
+    securities re-downloaded; `full` re-downloads everything. A failed
+    detail fetch keeps the previous data and is retried on the next sync.
+    The snapshot is only written if the listings all succeed.
+    """
+    firm_id = client.config.firm_id
+    now = datetime.now().isoformat()
+    known_funds = snapshot.funds(firm_id)
+    known = snapshot.investments(firm_id)
+    report: Dict[str, Any] = {
+        "firm_id": firm_id,
+        "synced_at": now,
+        "previous_sync": snapshot.last_sync(firm_id),
+        "full": full,
+        "funds": {"added": [], "changed": [], "removed": []},
+        "added": [],
+        "changed": [],
+        "removed": [],
+        "errors": []
+    }
+    state: Dict[str, Any] = {"funds": [], "seen": set(), "unchanged": []}
+    fetched = 0
+
+    workers = max(client.config.max_in_flight, 1)
+    with snapshot.db, ThreadPoolExecutor(max_workers=workers) as pool:
+        funds = lookahead(((fund, pool.submit(client.list_investments, fund["id"]))
+                           for fund in client.iter_funds()), workers)
+        fetches = _detail_fetches(client, pool, funds, known, full, state)
+
+        for key, inv, inv_hash, cap_table_fetch, securities_fetch in lookahead(fetches, 4 * workers):
+            fetched += 1
+            stored = snapshot.details(firm_id, key)
+            entry = {"fund_id": key[0], "company_id": key[1], "company_name": inv.get("companyName")}
+            errors = {}
+
+            cap_table = stored["cap_table"]
+            try:
+                cap_table = cap_table_fetch.result() if cap_table_fetch is not None else None
+                snapshot.put_cap_table(firm_id, key, cap_table, now)
+            except Exception as e:
+                errors["cap_table"] = str(e)
+
+            securities_changed = False
+            try:
+                securities = securities_fetch.result()
+                securities_changed = content_hash(securities) != stored["securities_hash"]
+                snapshot.put_securities(firm_id, key, securities, now)
+            except Exception as e:
+                errors["securities"] = str(e)
+
+            snapshot.put_investment(firm_id, key[0], inv, None if errors else inv_hash, now)
+            if errors:
+                report["errors"].append({**entry, "errors": errors})
+
+            cap_table_changed = (content_hash(cap_table) if cap_table else None) != stored["cap_table_hash"]
+            prior = known.get(key)
+            if prior is None:
+                report["added"].append({**entry, "ownership": ownership_delta(client, None, cap_table)})
+                continue
+            fields = _changed_fields(prior["data"], inv)
+            if fields or cap_table_changed or (securities_changed and stored["securities_hash"] is not None):
+                report["changed"].append({
+                    **entry,
+                    "fields": fields,
+                    "cap_table_changed": cap_table_changed,
+                    "securities_changed": securities_changed,
+                    "ownership": ownership_delta(client, stored["cap_table"], cap_table) if cap_table_changed else None
+                })
+
+        for fund in state["funds"]:
+            fund_hash = content_hash(fund)
+            if fund["id"] not in known_funds:
+                report["funds"]["added"].append(fund["id"])
+            elif known_funds[fund["id"]] != fund_hash:
+                report["funds"]["changed"].append(fund["id"])
+            snapshot.put_fund(firm_id, fund, fund_hash, now)
+
+        listed_funds = {fund["id"] for fund in state["funds"]}
+        report["funds"]["removed"] = sorted(set(known_funds) - listed_funds)
+        snapshot.remove_funds(firm_id, report["funds"]["removed"])
+
+        removed = sorted(set(known) - state["seen"])
+        for key in removed:
+            last = snapshot.details(firm_id, key)["cap_table"]
+            report["removed"].append({"fund_id": key[0], "company_id": key[1],
+                                      "company_name": known[key]["data"].get("companyName"),
+                                      "ownership": ownership_delta(client, last, None)})
+        snapshot.remove_investments(firm_id, removed)
+        snapshot.touch(firm_id, state["unchanged"], now)
+
+        report["counts"] = {
+            "funds": len(state["funds"]),
+            "investments": len(state["seen"]),
+            "fetched": fetched,
+            "unchanged": len(state["unchanged"]),
+            "added": len(report["added"]),
+            "changed": len(report["changed"]),
+            "removed": len(report["removed"]),
+            "errors": len(report["errors"]),
+            "requests": int(client.metrics.totals()["requests"])
+        }
+        snapshot.record_sync(firm_id, now, full, report["counts"])
+
+    return report
+
+
+def _ownership_line(change: Dict[str, Any]) -> str:
+    moves = []
+    for field, label in (("investors_pct", "investors"), ("founders_pct", "founders"),
+                         ("employees_pct", "employees"), ("option_pool_pct", "pool")):
+        delta = change["ownership"][field]["delta"]
+        if delta:
+            moves.append(f"{label} {delta:+.2f}pp")
+    shares = change["ownership"]["fully_diluted_shares"]["delta"]
+    if shares:
+        moves.append(f"FD shares {shares:+,.0f}")
+    return ", ".join(moves) or "no ownership change"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally sync a Carta portfolio into a local snapshot")
+    parser.add_argument("--db", default=str(SNAPSHOT_PATH), help="SQLite snapshot file")
+    parser.add_argument("--report", help="Write the change report to this JSON file")
+    parser.add_argument("--full", action="store_true", help="Re-fetch every cap table and security list")
+    parser.add_argument("--firm-id", help="Carta Firm ID (overrides env)")
+    parser.add_argument("--max-in-flight", type=int, help="Concurrent requests (overrides env)")
+
+    args = parser.parse_args()
+
+    config = load_config_from_env()
+    if args.firm_id:
+        config.firm_id = args.firm_id
+    if args.max_in_flight:
+        config.max_in_flight = args.max_in_flight
+    if not config.client_id or not config.client_secret or not config.firm_id:
+        print("Error: CARTA_CLIENT_ID, CARTA_CLIENT_SECRET and CARTA_FIRM_ID (or --firm-id) must be set")
+        exit(1)
+
+    # No response cache: a fresh cached listing would hide the very changes being synced
+    with CartaClient(config) as client, PortfolioSnapshot(args.db) as snapshot:
+        report = sync_portfolio(client, snapshot, full=args.full)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Change report saved to {args.report}")
+
+    counts = report["counts"]
+    print(f"\n=== CARTA SYNC SUMMARY ===")
+    print(f"Firm: {report['firm_id']} ({'since ' + report['previous_sync'] if report['previous_sync'] else 'first sync'})")
+    print(f"Funds: {counts['funds']} ({len(report['funds']['added'])} added, "
+          f"{len(report['funds']['changed'])} changed, {len(report['funds']['removed'])} removed)")
+    print(f"Investments: {counts['investments']} listed, {counts['fetched']} fetched, {counts['unchanged']} unchanged")
+    print(f"Added: {counts['added']}  Changed: {counts['changed']}  Removed: {counts['removed']}  "
+          f"Errors: {counts['errors']}")
+    print(f"Requests: {counts['requests']}")
+
+    ownership_changes = [c for c in report["changed"] if c["ownership"]]
+    if ownership_changes:
+        print(f"\nOwnership changes:")
+        for change in ownership_changes[:20]:
+            print(f"  {change['company_name']} ({change['fund_id']}): {_ownership_line(change)}")
+        if len(ownership_changes) > 20:
+            print(f"  ... and {len(ownership_changes) - 20} more (see the report)")
+
+
+if __name__ == "__main__":
+    main()
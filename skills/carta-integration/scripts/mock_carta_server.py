@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Mock Carta API Server
+Serves a synthetic firm (funds, investments, cap tables, securities, fund
+performance) on the Carta Investor API paths, with optional per-request
+latency and injected errors, so the client can be benchmarked and exercised
+offline. List endpoints are paginated (pageSize / pageToken, answered with
+a nextPageToken while more remain). Responses carry an ETag and
+Last-Modified and honour conditional GETs.
+API requests can be rate limited (a fixed one-second window, with
+X-RateLimit-* headers) and a share of them randomly answered with 429 and
+a Retry-After, to exercise the client's throttling and retries.
+
+Usage:
+    python mock_carta_server.py --port 8765 --funds 20 --investments 20 --latency-ms 50
+    CARTA_API_URL=http://127.0.0.1:8765 CARTA_CLIENT_ID=x CARTA_CLIENT_SECRET=x CARTA_FIRM_ID=firm-001 \
+        python carta_client.py --action summary --output pretty
+    python mock_carta_server.py --funds 5 --investments 500 --max-page-size 50
+    python mock_carta_server.py --rate-limit 50 --throttle-rate 0.05 --retry-after 0.5
+
+    # In-process
+    from mock_carta_server import start_mock_server
+    server, url = start_mock_server(funds=5, investments=10, latency_ms=20, rate_limit=50)
+    ...
+    server.shutdown()
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+API_PREFIX = "/v1alpha1"
+CATEGORIES = ["FOUNDER", "INVESTOR", "EMPLOYEE", "OPTION_POOL"]
+MAX_PAGE_SIZE = 100
+
+
+def build_portfolio(firm_id: str = "firm-001", funds: int = 20, investments: int = 20,
+                    error_rate: float = 0.0, seed: int = 7) -> Dict[str, Any]:
+    """Synthetic firm data keyed the way the mock routes look it up.
+
+    `error_rate` is the share of fund performance and cap table resources
+    that answer with a 500 instead.
+    """
+    rng = random.Random(seed)
+    securities_rng = random.Random(seed + 1)  # separate stream, so the rest of the data is unchanged
+    portfolio: Dict[str, Any] = {
+        "firm": {"id": firm_id, "name": "Mock Ventures", "fundCount": funds},
+        "funds": [],
+        "investments": {},
+        "performance": {},
+        "cap_tables": {},
+        "securities": {},
+        "failing": set()
+    }
+
+    for f in range(funds):
+        fund_id = f"fund-{f + 1:03d}"
+        portfolio["funds"].append({"id": fund_id, "name": f"Mock Fund {f + 1}", "vintage": 2015 + f % 10})
+        portfolio["performance"][fund_id] = {
+            "fundId": fund_id,
+            "asOfDate": "2025-01-01",
+            "tvpi": round(rng.uniform(0.8, 3.5), 2),
+            "dpi": round(rng.uniform(0.0, 1.5), 2),
+            "rvpi": round(rng.uniform(0.5, 2.5), 2),
+            "netIrr": round(rng.uniform(-0.05, 0.35), 3),
+            "totalContributions": rng.randrange(20, 200) * 1_000_000,
+            "totalDistributions": rng.randrange(0, 150) * 1_000_000,
+            "nav": rng.randrange(20, 400) * 1_000_000
+        }
+        if rng.random() < error_rate:
+            portfolio["failing"].add(("performance", fund_id))
+
+        fund_investments = []
+        for i in range(investments):
+            company_id = f"company-{f + 1:03d}-{i + 1:03d}"
+            cap_table_id = f"ct-{f + 1:03d}-{i + 1:03d}"
+            fund_investments.append({
+                "companyId": company_id,
+                "companyName": f"Portfolio Co {f + 1}-{i + 1}",
+                "investmentDate": f"{2015 + (f + i) % 10}-{1 + i % 12:02d}-01",
+                "capitalizationTables": [{"id": cap_table_id, "type": "PRIMARY"}]
+            })
+            portfolio["cap_tables"][(fund_id, company_id, cap_table_id)] = _cap_table(rng, cap_table_id)
+            portfolio["securities"][(fund_id, company_id)] = _securities(securities_rng, cap_table_id)
+            if rng.random() < error_rate:
+                portfolio["failing"].add(("cap_table", cap_table_id))
+        portfolio["investments"][fund_id] = fund_investments
+
+    return portfolio
+
+
+def _cap_table(rng: random.Random, cap_table_id: str) -> Dict[str, Any]:
+    stakeholders = []
+    for s in range(rng.randrange(4, 12)):
+        stakeholders.append({
+            "id": f"{cap_table_id}-sh-{s + 1}",
+            "name": f"Stakeholder {s + 1}",
+            "category": CATEGORIES[s % len(CATEGORIES)],
+            "fullyDilutedShares": rng.randrange(100, 5000) * 1000
+        })
+    fully_diluted = sum(sh["fullyDilutedShares"] for sh in stakeholders)
+    for sh in stakeholders:
+        sh["ownershipPercentage"] = round(sh["fullyDilutedShares"] / fully_diluted * 100, 4)
+    return {
+        "id": cap_table_id,
+        "type": "PRIMARY",
+        "fullyDilutedShares": fully_diluted,
+        "issuedShares": int(fully_diluted * 0.85),
+        "stakeholders": stakeholders,
+        "shareClasses": [
+            {"id": f"{cap_table_id}-common", "name": "Common", "fullyDilutedShares": int(fully_diluted * 0.6)},
+            {"id": f"{cap_table_id}-pref-a", "name": "Series A Preferred", "fullyDilutedShares": int(fully_diluted * 0.4)}
+        ]
+    }
+
+
+def _securities(rng: random.Random, cap_table_id: str) -> List[Dict[str, Any]]:
+    securities = []
+    for s, (name, kind) in enumerate([("Series A Preferred", "PREFERRED"), ("Common", "COMMON"),
+                                      ("Warrant", "WARRANT")][:rng.randrange(1, 4)]):
+        quantity = rng.randrange(10, 2000) * 1000
+        securities.append({
+            "id": f"{cap_table_id}-sec-{s + 1}",
+            "type": kind,
+            "shareClassName": name,
+            "quantity": quantity,
+            "costBasis": round(quantity * rng.uniform(0.1, 3.0), 2),
+            "issueDate": f"{2015 + rng.randrange(10)}-{rng.randrange(1, 13):02d}-01"
+        })
+    return securities
+
+
+def issue_rounds(portfolio: Dict[str, Any], count: int, seed: int = 11) -> List[Tuple[str, str]]:
+    """Simulate `count` new priced rounds in place (for sync testing).
+
+    Each picked company gets a new investor on its cap table, diluting
+    everyone else, and its listing record a new lastUpdated stamp. Returns
+    the (fund_id, company_id) pairs changed; call server.touch() afterwards.
+    """
+    rng = random.Random(seed)
+    keys = sorted(portfolio["cap_tables"])
+    changed = []
+    for fund_id, company_id, cap_table_id in rng.sample(keys, min(count, len(keys))):
+        cap_table = portfolio["cap_tables"][(fund_id, company_id, cap_table_id)]
+        new_shares = int(cap_table["fullyDilutedShares"] * rng.uniform(0.1, 0.3))
+        stakeholders = cap_table["stakeholders"]
+        stakeholders.append({
+            "id": f"{cap_table_id}-sh-{len(stakeholders) + 1}",
+            "name": f"New Investor {len(stakeholders) + 1}",
+            "category": "INVESTOR",
+            "fullyDilutedShares": new_shares
+        })
+        fully_diluted = sum(sh["fullyDilutedShares"] for sh in stakeholders)
+        for sh in stakeholders:
+            sh["ownershipPercentage"] = round(sh["fullyDilutedShares"] / fully_diluted * 100, 4)
+        cap_table["fullyDilutedShares"] = fully_diluted
+        cap_table["issuedShares"] = int(fully_diluted * 0.85)
+
+        for inv in portfolio["investments"][fund_id]:
+            if inv["companyId"] == company_id:
+                inv["lastUpdated"] = datetime.now(timezone.utc).isoformat()
+        changed.append((fund_id, company_id))
+    return changed
+
+
+def encode_page_token(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"offset:{offset}".encode()).decode()
+
+
+def decode_page_token(token: str) -> Optional[int]:
+    try:
+        kind, _, offset = base64.urlsafe_b64decode(token.encode()).decode().partition(":")
+        return int(offset) if kind == "offset" and int(offset) >= 0 else None
+    except ValueError:
+        return None
+
+
+class MockCartaServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the portfolio and request statistics."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], portfolio: Dict[str, Any], latency_ms: float = 0.0,
+                 rate_limit: int = 0, throttle_rate: float = 0.0, retry_after: float = 1.0, seed: int = 7,
+                 max_page_size: int = MAX_PAGE_SIZE):
+        super().__init__(address, MockCartaHandler)
+        self.portfolio = portfolio
+        self.latency = latency_ms / 1000
+        self.max_page_size = max_page_size
+        self.rate_limit = rate_limit  # API requests per second, 0 for unlimited
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.last_modified = time.time()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.stats = {"requests": 0, "connections": 0, "in_flight": 0, "max_in_flight": 0, "not_modified": 0,
+                      "throttled": 0}
+
+    def count(self, key: str, delta: int = 1) -> None:
+        with self.lock:
+            self.stats[key] += delta
+            if key == "in_flight":
+                self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.stats.update(requests=0, connections=0, in_flight=0, max_in_flight=0, not_modified=0, throttled=0)
+
+    def admit(self) -> Tuple[bool, Dict[str, str]]:
+        """Apply the rate limit and 429 injection to an API request.
+        
+        Returns whether the request may proceed and the rate-limit headers
+        for its response (Retry-After included when it may not).
+        """
+        with self.lock:
+            headers: Dict[str, str] = {}
+            if self.rate_limit:
+                now = time.monotonic()
+                if now - self.window_start >= 1.0:
+                    self.window_start, self.window_count = now, 0
+                reset = 1.0 - (now - self.window_start)
+                limited = self.window_count >= self.rate_limit
+                if not limited:
+                    self.window_count += 1
+                headers = {
+                    "X-RateLimit-Limit": str(self.rate_limit),
+                    "X-RateLimit-Remaining": str(self.rate_limit - self.window_count),
+                    "X-RateLimit-Reset": f"{reset:.3f}"
+                }
+                if limited:
+                    self.stats["throttled"] += 1
+                    return False, {**headers, "Retry-After": f"{reset:.3f}"}
+            if self.throttle_rate and self.rng.random() < self.throttle_rate:
+                self.stats["throttled"] += 1
+                return False, {**headers, "Retry-After": f"{self.retry_after:g}"}
+        return True, headers
+    
+    def touch(self) -> None:
+        """Mark the portfolio as modified now (after editing it in place)."""
+        self.last_modified = time.time()
+
+
+class MockCartaHandler(BaseHTTPRequestHandler):
+    """Routes the Investor API paths the client uses."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse shows in the stats
+    server: MockCartaServer
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; without this, Nagle plus
+        # delayed ACKs stall every keep-alive response by ~40ms
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode()
+        if status == 200:
+            etag = f'"{hashlib.sha256(payload).hexdigest()[:16]}"'
+            last_modified = formatdate(int(self.server.last_modified), usegmt=True)
+            if self._not_modified(etag):
+                self.server.count("not_modified")
+                self.send_response(304)
+                self._send_headers(headers)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self._send_headers(headers)
+        if status == 200:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_headers(self, headers: Optional[Dict[str, str]]) -> None:
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+    
+    def _not_modified(self, etag: str) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(",")]
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                return int(self.server.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _handle(self, method: str) -> None:
+        self.server.count("requests")
+        self.server.count("in_flight")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            path, _, query = self.path.partition("?")
+            allowed, headers = self.server.admit() if path.startswith(API_PREFIX) else (True, {})
+            if not allowed:
+                self._send(429, {"error": "RATE_LIMITED"}, headers)
+                return
+            status, body = self.route(method, path, {k: v[-1] for k, v in parse_qs(query).items()})
+            self._send(status, body, headers)
+        finally:
+            self.server.count("in_flight", -1)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _page(self, key: str, items: List[Dict[str, Any]], query: Dict[str, str]) -> Tuple[int, Any]:
+        """One page of a list endpoint, capped at the server's max page size."""
+        try:
+            size = min(int(query.get("pageSize", self.server.max_page_size)), self.server.max_page_size)
+        except ValueError:
+            return 400, {"error": "INVALID_PAGE_SIZE"}
+        offset = decode_page_token(query["pageToken"]) if query.get("pageToken") else 0
+        if offset is None or size < 1:
+            return 400, {"error": "INVALID_PAGE_TOKEN" if offset is None else "INVALID_PAGE_SIZE"}
+        body: Dict[str, Any] = {key: items[offset:offset + size]}
+        if offset + size < len(items):
+            body["nextPageToken"] = encode_page_token(offset + size)
+        return 200, body
+    
+    def route(self, method: str, path: str, query: Optional[Dict[str, str]] = None) -> Tuple[int, Any]:
+        portfolio = self.server.portfolio
+        query = query or {}
+        if method == "POST" and path == "/oauth/token":
+            return 200, {"access_token": "mock-token", "token_type": "Bearer", "expires_in": 3600}
+        if method != "GET" or not path.startswith(API_PREFIX):
+            return 404, {"error": "NOT_FOUND"}
+        if self.headers.get("Authorization") != "Bearer mock-token":
+            return 401, {"error": "UNAUTHORIZED"}
+
+        firm = re.escape(portfolio["firm"]["id"])
+        path = path[len(API_PREFIX):]
+        if re.fullmatch(rf"/investors/firms/{firm}", path):
+            return 200, portfolio["firm"]
+        if re.fullmatch(rf"/investors/firms/{firm}/funds", path):
+            return self._page("funds", portfolio["funds"], query)
+        if re.fullmatch(rf"/investors/firms/{firm}/investments", path):
+            return self._page("investments", [inv for invs in portfolio["investments"].values() for inv in invs], query)
+
+        match = re.fullmatch(rf"/investors/firms/{firm}/funds/([^/]+)/(performance|investments)", path)
+        if match:
+            fund_id, resource = match.groups()
+            if fund_id not in portfolio["investments"]:
+                return 404, {"error": "NOT_FOUND"}
+            if resource == "investments":
+                return self._page("investments", portfolio["investments"][fund_id], query)
+            if ("performance", fund_id) in portfolio["failing"]:
+                return 500, {"error": "INTERNAL_ERROR"}
+            return 200, portfolio["performance"][fund_id]
+
+        match = re.fullmatch(
+            rf"/investors/firms/{firm}/funds/([^/]+)/investments/([^/]+)/capitalizationTables/([^/]+)", path)
+        if match:
+            cap_table = portfolio["cap_tables"].get(match.groups())
+            if cap_table is None:
+                return 404, {"error": "NOT_FOUND"}
+            if ("cap_table", cap_table["id"]) in portfolio["failing"]:
+                return 500, {"error": "INTERNAL_ERROR"}
+            return 200, cap_table
+
+        match = re.fullmatch(rf"/investors/firms/{firm}/funds/([^/]+)/investments/([^/]+)/securities", path)
+        if match:
+            securities = portfolio["securities"].get(match.groups())
+            if securities is None:
+                return 404, {"error": "NOT_FOUND"}
+            return self._page("securities", securities, query)
+
+        return 404, {"error": "NOT_FOUND"}
+
+
+def start_mock_server(port: int = 0, host: str = "127.0.0.1", latency_ms: float = 0.0,
+                      portfolio: Optional[Dict[str, Any]] = None, rate_limit: int = 0, throttle_rate: float = 0.0,
+                      retry_after: float = 1.0, max_page_size: int = MAX_PAGE_SIZE,
+                      **portfolio_options) -> Tuple[MockCartaServer, str]:
+    """Serve a mock portfolio from a background thread; returns the server and its base URL."""
+    server = MockCartaServer((host, port), portfolio or build_portfolio(**portfolio_options), latency_ms,
+                             rate_limit, throttle_rate, retry_after, max_page_size=max_page_size)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock Carta Investor API")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--firm-id", default="firm-001", help="Firm ID to serve")
+    parser.add_argument("--funds", type=int, default=20, help="Number of funds")
+    parser.add_argument("--investments", type=int, default=20, help="Investments per fund")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of performance and cap table resources that return 500")
+    parser.add_argument("--rate-limit", type=int, default=0, help="API requests per second before 429s (0 = unlimited)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of API requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on injected 429s")
+    parser.add_argument("--max-page-size", type=int, default=MAX_PAGE_SIZE, help="Largest page a list endpoint returns")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for the synthetic data")
+
+    args = parser.parse_args()
+    portfolio = build_portfolio(args.firm_id, args.funds, args.investments, args.error_rate, args.seed)
+    server = MockCartaServer((args.host, args.port), portfolio, args.latency_ms,
+                             args.rate_limit, args.throttle_rate, args.retry_after, args.seed, args.max_page_size)
+    print(f"Mock Carta API for {args.firm_id} ({args.funds} funds x {args.investments} investments) "
+          f"on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served {server.stats['requests']} requests over {server.stats['connections']} connections "
+              f"({server.stats['throttled']} throttled)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Carta Rate Limiting and Retry
+A token bucket shared by all of a client's threads. It adapts to the API:
+- A 429 pauses every thread for Retry-After and halves the rate.
+- X-RateLimit-Remaining / X-RateLimit-Reset headers pace the remaining
+  budget over the window.
+- Successful responses ease the rate back up.
+Idempotent GETs that fail with a 429, a 502/503/504 or a connection error
+are retried with jittered exponential backoff. A plain 500 is not retried,
+since Carta's are deterministic failures of one resource. Retries, 429s and
+the time spent throttled are tallied per endpoint class.
+
+Usage:
+    # From carta_client
+    limiter = TokenBucket(rate=100 / 60)
+    policy = RetryPolicy(max_retries=4)
+    metrics = RequestMetrics()
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+from response_cache import endpoint_class
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# X-RateLimit-Reset values above this are epoch seconds rather than a delay
+EPOCH_THRESHOLD = 1e9
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay-seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _header_float(headers: Mapping[str, str], *names: str) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose rate follows the server's feedback.
+
+    `rate` is requests per second (None paces nothing until the server sends
+    rate-limit headers); `burst` is the bucket size. Throttling never takes
+    the rate below `min_rate` (default a tenth of `rate`).
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None,
+                 min_rate: Optional[float] = None, recovery: float = 0.1):
+        self.ceiling = rate
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate or 1.0)
+        self.tokens = self.capacity
+        self.min_rate = min_rate or (rate / 10 if rate else 0.1)
+        self.recovery = recovery
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Block until a request may go out; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.rate is None:
+                    return waited
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def throttle(self, retry_after: Optional[float]) -> None:
+        """React to a 429: pause everyone for Retry-After and halve the rate.
+
+        429s that land while a pause is already running are the same episode
+        (requests sent before it began) and do not halve the rate again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.rate is not None and now >= self.blocked_until:
+                self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            self.tokens = min(self.tokens, 0.0)
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Pace by the rate-limit headers of a response, or recover toward the ceiling."""
+        remaining = _header_float(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+        reset = _header_float(headers, "X-RateLimit-Reset", "RateLimit-Reset")
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if remaining is not None and reset is not None:
+                if reset > EPOCH_THRESHOLD:
+                    reset = max(reset - time.time(), 0.0)
+                if remaining <= 0:
+                    self.blocked_until = max(self.blocked_until, now + reset)
+                    return
+                paced = remaining / max(reset, 1e-3)
+                self.rate = max(self.min_rate, min(paced, self.ceiling or paced))
+                self.capacity = max(1.0, min(self.capacity, remaining))
+            elif self.rate is not None and self.ceiling is not None and self.rate < self.ceiling:
+                self.rate = min(self.ceiling, self.rate + self.ceiling * self.recovery)
+
+
+class RetryPolicy:
+    """Jittered exponential backoff ("full jitter") for idempotent requests."""
+
+    def __init__(self, max_retries: int = 4, base_delay: float = 0.25, max_delay: float = 30.0,
+                 statuses: tuple = RETRY_STATUSES):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.statuses = statuses
+
+    def should_retry(self, attempt: int, status: Optional[int]) -> bool:
+        """Whether attempt number `attempt` (0-based) may be retried; status None is a connection error."""
+        return attempt < self.max_retries and (status is None or status in self.statuses)
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to sleep before the next attempt.
+
+        With a Retry-After the wait is that plus a little jitter, so threads
+        throttled together do not all come back in the same instant.
+        """
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class RequestMetrics:
+    """Per-endpoint-class request, retry and throttling counters.
+
+    `throttle_seconds` is time spent waiting on the token bucket or backing
+    off before a retry; `errors` counts calls that finally failed.
+    """
+
+    FIELDS = ("requests", "attempts", "retries", "throttled", "errors", "throttle_seconds")
+
+    def __init__(self):
+        self.by_class: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, **counts: float) -> None:
+        with self._lock:
+            row = self.by_class.setdefault(endpoint_class(endpoint), dict.fromkeys(self.FIELDS, 0))
+            for name, value in counts.items():
+                row[name] += value
+
+    def totals(self) -> Dict[str, float]:
+        with self._lock:
+            return {name: sum(row[name] for row in self.by_class.values()) for name in self.FIELDS}
+
+    def report(self) -> Dict[str, Any]:
+        """Counters per endpoint class plus totals, throttle time rounded to ms."""
+        with self._lock:
+            classes = {name: {**row, "throttle_seconds": round(row["throttle_seconds"], 3)}
+                       for name, row in sorted(self.by_class.items())}
+        totals = self.totals()
+        totals["throttle_seconds"] = round(totals["throttle_seconds"], 3)
+        return {"endpoints": classes, "total": totals}
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Carta Response Cache
+Persistent on-disk cache of Carta API GET responses, keyed by API host, firm
+and endpoint. Each endpoint class has its own TTL; once an entry is stale it
+is revalidated with If-None-Match / If-Modified-Since when the API sent an
+ETag or Last-Modified, so an unchanged resource costs a 304 instead of a
+full download. In offline mode every read is served from the cache,
+stale or not, and nothing touches the network.
+
+Usage:
+    python response_cache.py --stats
+    python response_cache.py --clear --firm-id firm-001
+
+    # From carta_client
+    cache = ResponseCache(ttls={"cap_table": 30 * 86400})
+    client = CartaClient(config, cache=cache)
+
+    # Environment
+    CARTA_CACHE_DIR=.cache/carta     cache location
+    DILIGENCE_NO_CACHE=1             disable caching
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CACHE_DIR = Path(os.environ.get(
+    "CARTA_CACHE_DIR",
+    Path(__file__).resolve().parents[3] / ".cache" / "carta"
+))
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Seconds an entry is served without revalidation, by endpoint class
+DEFAULT_TTLS: Dict[str, float] = {
+    "firm": DAY,
+    "funds": DAY,
+    "performance": 6 * HOUR,
+    "investments": HOUR,
+    "cap_table": 7 * DAY,  # historic cap tables rarely change
+    "securities": DAY,
+    "other": HOUR
+}
+
+ENDPOINT_CLASSES = [
+    ("cap_table", re.compile(r"/capitalizationTables(/[^/]+)?$")),
+    ("securities", re.compile(r"/securities$")),
+    ("performance", re.compile(r"/funds/[^/]+/performance$")),
+    ("investments", re.compile(r"/investments(/[^/]+)?$")),
+    ("funds", re.compile(r"/funds(/[^/]+)?$")),
+    ("firm", re.compile(r"/firms(/[^/]+)?$"))
+]
+
+
+class OfflineCacheMiss(LookupError):
+    """Raised in offline mode for a request the cache cannot answer."""
+
+
+def cache_enabled() -> bool:
+    """Caching can be switched off with DILIGENCE_NO_CACHE=1."""
+    return os.environ.get("DILIGENCE_NO_CACHE", "") != "1"
+
+
+def endpoint_class(endpoint: str) -> str:
+    """TTL class of an API path (query string ignored)."""
+    path = endpoint.split("?", 1)[0]
+    for name, pattern in ENDPOINT_CLASSES:
+        if pattern.search(path):
+            return name
+    return "other"
+
+
+class ResponseCache:
+    """JSON response store with per-class TTLs and validator headers."""
+
+    def __init__(self, cache_dir: Optional[Path] = None, ttls: Optional[Dict[str, float]] = None,
+                 offline: bool = False):
+        self.cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.offline = offline
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def count(self, outcome: str) -> None:
+        """Tally a hit, revalidation or miss (called from pool threads)."""
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def _path(self, api: str, firm_id: str, endpoint: str) -> Path:
+        key = hashlib.sha256(f"{api}\n{endpoint}".encode()).hexdigest()
+        return self.cache_dir / (firm_id or "_") / key[:2] / f"{key}.json"
+
+    def lookup(self, api: str, firm_id: str, endpoint: str) -> Optional[Dict[str, Any]]:
+        """Stored entry for an endpoint, or None."""
+        try:
+            with open(self._path(api, firm_id, endpoint), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        ttl = self.ttls.get(endpoint_class(entry["endpoint"]), self.ttls["other"])
+        return time.time() - entry["stored_at"] < ttl
+
+    def validators(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Conditional request headers for revalidating an entry."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, api: str, firm_id: str, endpoint: str, body: Any,
+              etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, Any]:
+        """Write an entry (atomically, so concurrent writers never leave a torn file)."""
+        entry = {
+            "api": api,
+            "firm_id": firm_id,
+            "endpoint": endpoint,
+            "stored_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body
+        }
+        path = self._path(api, firm_id, endpoint)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return entry
+
+    def refresh(self, entry: Dict[str, Any]) -> None:
+        """Restart an entry's TTL after a 304."""
+        self.store(entry["api"], entry["firm_id"], entry["endpoint"], entry["body"],
+                   entry.get("etag"), entry.get("last_modified"))
+
+    def clear(self, firm_id: Optional[str] = None) -> None:
+        """Delete every entry, or one firm's."""
+        target = self.cache_dir / firm_id if firm_id else self.cache_dir
+        if target.exists():
+            shutil.rmtree(target)
+
+    def summary(self) -> Dict[str, Any]:
+        """Entry counts and size per firm."""
+        firms: Dict[str, Dict[str, Any]] = {}
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob("*/*/*.json"):
+                firm = firms.setdefault(path.parts[-3], {"entries": 0, "size_kb": 0.0})
+                firm["entries"] += 1
+                firm["size_kb"] += path.stat().st_size / 1024
+        for firm in firms.values():
+            firm["size_kb"] = round(firm["size_kb"], 1)
+        return {"cache_dir": str(self.cache_dir), "firms": firms, "ttls": self.ttls}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the Carta response cache")
+    parser.add_argument("--stats", action="store_true", help="Show cache contents")
+    parser.add_argument("--clear", action="store_true", help="Delete cached responses")
+    parser.add_argument("--firm-id", help="Limit --clear to one firm")
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR), help="Cache directory")
+
+    args = parser.parse_args()
+    cache = ResponseCache(Path(args.cache_dir))
+
+    if args.clear:
+        cache.clear(args.firm_id)
+        print(f"Cleared {cache.cache_dir / args.firm_id if args.firm_id else cache.cache_dir}")
+
+    if args.stats or not args.clear:
+        print(json.dumps(cache.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
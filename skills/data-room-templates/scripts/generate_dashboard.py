@@ -21,14 +21,16 @@ except ImportError:
     PLOTLY_AVAILABLE = False
 
 
+# Analysis outputs read by load_analysis_data (also the step's inputs in run_pipeline.py)
+ANALYSIS_FILES = ['metrics.json', 'parsed_captable.json', 'round_model.json',
+                  'series_a_model.json']
+
+
 def load_analysis_data(analysis_dir: str) -> Dict[str, Any]:
     """Load all analysis JSON files."""
     data = {}
 
-    json_files = ['metrics.json', 'parsed_captable.json', 'round_model.json',
-                  'series_a_model.json']
-
-    for filename in json_files:
+    for filename in ANALYSIS_FILES:
         filepath = os.path.join(analysis_dir, filename)
         if os.path.exists(filepath):
             with open(filepath, 'r') as f:
@@ -138,6 +140,34 @@ def create_ownership_chart(captable: Dict[str, Any]) -> str:
     return fig.to_html(full_html=False, include_plotlyjs=False)
 
 
+def create_mrr_chart(metrics: Dict[str, Any]) -> str:
+    """Create monthly MRR bar chart with trailing-12 NRR."""
+    if not PLOTLY_AVAILABLE:
+        return "<p>Plotly not available for charts</p>"
+
+    monthly = metrics.get('monthly', [])
+    if not monthly:
+        return "<p>No monthly revenue data available</p>"
+
+    months = [row['month'] for row in monthly]
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Bar(x=months, y=[row['mrr'] for row in monthly], name='MRR',
+                         marker_color='#1f77b4'))
+    fig.add_trace(go.Scatter(x=months, y=[row.get('nrr_trailing_12') for row in monthly],
+                             name='NRR (T12)', mode='lines+markers', marker_color='#ff7f0e'),
+                  secondary_y=True)
+
+    fig.update_layout(
+        title="Monthly Recurring Revenue",
+        height=350,
+        margin=dict(l=20, r=20, t=50, b=20)
+    )
+    fig.update_yaxes(title_text="MRR ($)", secondary_y=False)
+    fig.update_yaxes(title_text="NRR (%)", secondary_y=True)
+
+    return fig.to_html(full_html=False, include_plotlyjs=False)
+
+
 def generate_dashboard(data: Dict[str, Any]) -> str:
     """Generate complete HTML dashboard."""
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -148,6 +178,7 @@ def generate_dashboard(data: Dict[str, Any]) -> str:
     # Generate components
     metric_cards = create_metric_cards(metrics)
     ownership_chart = create_ownership_chart(captable)
+    mrr_chart = create_mrr_chart(metrics)
 
     # Flags section
     flags = metrics.get('flags', [])
@@ -316,6 +347,10 @@ def generate_dashboard(data: Dict[str, Any]) -> str:
         </div>
 
         <div class="charts-grid">
+            <div class="section">
+                <h2>Monthly Recurring Revenue</h2>
+                {mrr_chart}
+            </div>
             <div class="section">
                 <h2>Ownership Distribution</h2>
                 {ownership_chart}
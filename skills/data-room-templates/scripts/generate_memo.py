@@ -14,14 +14,16 @@ from datetime import datetime
 from typing import Dict, Any
 
 
+# Analysis outputs read by load_analysis_data (also the step's inputs in run_pipeline.py)
+ANALYSIS_FILES = ['metrics.json', 'financial-summary.json', 'parsed_captable.json',
+                  'customer-analysis.json', 'round_model.json', 'series_a_model.json']
+
+
 def load_analysis_data(analysis_dir: str) -> Dict[str, Any]:
     """Load all analysis JSON files."""
     data = {}
 
-    json_files = ['metrics.json', 'financial-summary.json', 'parsed_captable.json',
-                  'customer-analysis.json', 'round_model.json', 'series_a_model.json']
-
-    for filename in json_files:
+    for filename in ANALYSIS_FILES:
         filepath = os.path.join(analysis_dir, filename)
         if os.path.exists(filepath):
             with open(filepath, 'r') as f:
@@ -4,6 +4,10 @@ Diligence Report Generator
 Compiles analysis files into professional PDF with Mermaid visualizations.
 
 Usage: python generate_report.py --company "Company Name" --data-room ./data-room --output report.pdf
+
+In-process:
+    from generate_report import render_report
+    render_report("Company Name", {'metrics': metrics, 'cap_table': parsed, 'risk_markdown': scorecard_md}, 'report.pdf')
 """
 
 import json
@@ -35,14 +39,46 @@ CROWLEY_RED = HexColor('#e53e3e')
 CROWLEY_GRAY = HexColor('#718096')
 
 
+def parse_risk_markdown(content: str) -> Dict[str, Any]:
+    """Parse risk scorecard markdown into structured data."""
+    risks = {'scores': {}, 'composite': 0, 'level': 'UNKNOWN'}
+    
+    # Parse risk scores (simplified - expand as needed)
+    risk_categories = [
+        'Market', 'Product', 'Team', 'Financial', 'Competition',
+        'Timing', 'Regulatory', 'Customer', 'Technology', 'Legal', 'Execution'
+    ]
+    
+    for category in risk_categories:
+        # Look for score patterns
+        import re
+        pattern = rf'{category}[^\d]*(\d+(?:\.\d+)?)/10'
+        match = re.search(pattern, content, re.IGNORECASE)
+        if match:
+            risks['scores'][category] = float(match.group(1))
+    
+    # Calculate composite
+    if risks['scores']:
+        risks['composite'] = sum(risks['scores'].values()) / len(risks['scores'])
+        if risks['composite'] >= 8:
+            risks['level'] = 'LOW'
+        elif risks['composite'] >= 6:
+            risks['level'] = 'MODERATE'
+        else:
+            risks['level'] = 'HIGH'
+    
+    return risks
+
+
 class DiligenceReport:
     """Generate comprehensive diligence PDF report."""
     
-    def __init__(self, company_name: str, data_room_path: str):
+    def __init__(self, company_name: str, data_room_path: Optional[str] = None,
+                 data: Optional[Dict[str, Any]] = None):
         self.company_name = company_name
-        self.data_room = Path(data_room_path)
+        self.data_room = Path(data_room_path) if data_room_path else None
         self.styles = self._create_styles()
-        self.data = self._load_data()
+        self.data = data if data is not None else self._load_data()
         self.charts = {}
     
     def _create_styles(self) -> Dict[str, ParagraphStyle]:
@@ -160,37 +196,9 @@ class DiligenceReport:
         return data
     
     def _parse_risk_scorecard(self, path: Path) -> Dict[str, Any]:
-        """Parse risk scorecard markdown into structured data."""
-        risks = {'scores': {}, 'composite': 0, 'level': 'UNKNOWN'}
-        
+        """Parse a risk scorecard markdown file into structured data."""
         with open(path) as f:
-            content = f.read()
-        
-        # Parse risk scores (simplified - expand as needed)
-        risk_categories = [
-            'Market', 'Product', 'Team', 'Financial', 'Competition',
-            'Timing', 'Regulatory', 'Customer', 'Technology', 'Legal', 'Execution'
-        ]
-        
-        for category in risk_categories:
-            # Look for score patterns
-            import re
-            pattern = rf'{category}[^\d]*(\d+(?:\.\d+)?)/10'
-            match = re.search(pattern, content, re.IGNORECASE)
-            if match:
-                risks['scores'][category] = float(match.group(1))
-        
-        # Calculate composite
-        if risks['scores']:
-            risks['composite'] = sum(risks['scores'].values()) / len(risks['scores'])
-            if risks['composite'] >= 8:
-                risks['level'] = 'LOW'
-            elif risks['composite'] >= 6:
-                risks['level'] = 'MODERATE'
-            else:
-                risks['level'] = 'HIGH'
-        
-        return risks
+            return parse_risk_markdown(f.read())
     
     def _generate_mermaid_chart(self, mermaid_code: str, filename: str) -> Optional[str]:
         """Generate chart image from Mermaid code using CLI."""
@@ -530,6 +538,26 @@ class DiligenceReport:
         return output_path
 
 
+def render_report(
+    company_name: str,
+    data: Dict[str, Any],
+    output_path: str,
+    format: str = 'executive'
+) -> str:
+    """Render the PDF from in-memory analysis data.
+
+    `data` may hold 'metrics', 'cap_table' (parsed cap table payload),
+    'flags', 'memo' and either 'risks' or the scorecard text as
+    'risk_markdown'.
+    """
+    data = dict(data)
+    if 'risks' not in data:
+        data['risks'] = parse_risk_markdown(data.pop('risk_markdown', ''))
+    for key, default in (('metrics', {}), ('cap_table', {}), ('flags', []), ('memo', '')):
+        data.setdefault(key, default)
+    return DiligenceReport(company_name, data=data).generate(output_path, format)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Generate Diligence Report PDF')
     parser.add_argument('--company', required=True, help='Company name')
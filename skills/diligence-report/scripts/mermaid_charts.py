@@ -42,7 +42,11 @@ def generate_revenue_chart(metrics: Dict[str, Any]) -> str:
     
     # Use last 6 months
     recent = monthly_revenue[-6:] if len(monthly_revenue) >= 6 else monthly_revenue
-    labels = months[:len(recent)]
+    series_months = [row['month'] for row in metrics.get('monthly', [])]
+    if len(series_months) == len(monthly_revenue):
+        labels = [months[int(m[5:7]) - 1] for m in series_months[-len(recent):]]
+    else:
+        labels = months[:len(recent)]
     
     max_val = max(recent) if recent else 100
     
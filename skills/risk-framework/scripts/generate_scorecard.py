@@ -10,10 +10,19 @@ Usage:
 import argparse
 import json
 import os
+import sys
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'scripts'))
+try:
+    from skill_support import cached_main
+except ImportError:  # skill used outside the repository
+    def cached_main(main, *args, **kwargs):
+        return main()
+
 
 @dataclass
 class RiskScore:
@@ -53,14 +62,16 @@ RISKS = [
 ]
 
 
+# Analysis outputs read by load_analysis_data (also the step's inputs in run_pipeline.py)
+ANALYSIS_FILES = ['metrics.json', 'financial-summary.json', 'parsed_captable.json',
+                  'customer-analysis.json', 'round_model.json']
+
+
 def load_analysis_data(analysis_dir: str) -> Dict[str, Any]:
     """Load all analysis JSON files."""
     data = {}
 
-    json_files = ['metrics.json', 'financial-summary.json', 'parsed_captable.json',
-                  'customer-analysis.json', 'round_model.json']
-
-    for filename in json_files:
+    for filename in ANALYSIS_FILES:
         filepath = os.path.join(analysis_dir, filename)
         if os.path.exists(filepath):
             with open(filepath, 'r') as f:
@@ -360,14 +371,41 @@ def generate_scorecard_markdown(
     return md
 
 
-def main():
+def score_risks(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Score the 11 risks from analysis payloads keyed like load_analysis_data.
+
+    Returns the scores, weighted score, veto, recommendation and the
+    scorecard markdown.
+    """
+    scores = [
+        score_business_model(data),
+        score_capitalization(data),
+        score_market_adoption(data),
+        *generate_default_scores()
+    ]
+    weighted_score = calculate_weighted_score(scores)
+    veto = check_veto_rules(scores)
+    recommendation = get_recommendation(weighted_score, veto)
+    return {
+        'scores': scores,
+        'weighted_score': weighted_score,
+        'veto': veto,
+        'recommendation': recommendation,
+        'markdown': generate_scorecard_markdown(scores, weighted_score, recommendation, veto)
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description='Generate 11-risks scorecard')
     parser.add_argument('--analysis-dir', default='data-room/analysis/',
                         help='Directory containing analysis outputs')
     parser.add_argument('--output', default='data-room/output/risk-scorecard.md',
                         help='Output scorecard path')
+    return parser
 
-    args = parser.parse_args()
+
+def main():
+    args = build_parser().parse_args()
 
     # Load data
     print(f"Loading analysis from {args.analysis_dir}...")
@@ -375,40 +413,22 @@ def main():
 
     # Calculate scores
     print("Calculating risk scores...")
-    scores = []
-
-    # Calculated scores
-    scores.append(score_business_model(data))
-    scores.append(score_capitalization(data))
-    scores.append(score_market_adoption(data))
-
-    # Default scores for remaining risks
-    scores.extend(generate_default_scores())
-
-    # Calculate weighted score
-    weighted_score = calculate_weighted_score(scores)
-
-    # Check veto rules
-    veto = check_veto_rules(scores)
-
-    # Get recommendation
-    recommendation = get_recommendation(weighted_score, veto)
-
-    # Generate markdown
-    md = generate_scorecard_markdown(scores, weighted_score, recommendation, veto)
+    result = score_risks(data)
 
     # Write output
     os.makedirs(os.path.dirname(args.output), exist_ok=True)
     with open(args.output, 'w') as f:
-        f.write(md)
+        f.write(result['markdown'])
 
     print(f"\n=== RISK ASSESSMENT ===")
-    print(f"Overall Score: {weighted_score:.1f}/10")
-    print(f"Recommendation: {recommendation}")
-    if veto:
-        print(f"Veto: {veto}")
+    print(f"Overall Score: {result['weighted_score']:.1f}/10")
+    print(f"Recommendation: {result['recommendation']}")
+    if result['veto']:
+        print(f"Veto: {result['veto']}")
     print(f"\nScorecard saved to {args.output}")
 
 
 if __name__ == '__main__':
-    main()
+    cached_main(main, __file__, build_parser(),
+                inputs=lambda args: [os.path.join(args.analysis_dir, f) for f in ANALYSIS_FILES + ['flags.md']],
+                outputs=lambda args: [args.output])
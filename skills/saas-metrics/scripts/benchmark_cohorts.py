@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Cohort Matrix Benchmark
+Times the vectorized cohort engine against the original per-cohort loops on
+synthetic revenue ledgers and checks that both produce identical matrices.
+
+Usage:
+    python benchmark_cohorts.py --sizes 10000,100000,1000000
+"""
+
+import argparse
+import time
+import pandas as pd
+import numpy as np
+from typing import Tuple
+
+from cohort_analysis import (
+    create_cohort_column, build_cohort_aggregate,
+    build_retention_matrix, build_revenue_retention_matrix
+)
+
+
+def generate_ledger(rows: int, months: int = 36, seed: int = 42) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Generate a synthetic (customers, revenue) pair with roughly `rows` revenue records."""
+    rng = np.random.default_rng(seed)
+    month_starts = pd.date_range('2022-01-01', periods=months, freq='MS')
+
+    n_customers = max(rows // (months // 2), 1)
+    signup_month = rng.integers(0, months, n_customers)
+    customers_df = pd.DataFrame({
+        'customer_id': [f'cust_{i:07d}' for i in range(n_customers)],
+        'created_date': month_starts[signup_month] + pd.to_timedelta(rng.integers(0, 28, n_customers), unit='D')
+    })
+
+    customer_idx = rng.integers(0, n_customers, rows)
+    offset = (rng.random(rows) * (months - signup_month[customer_idx])).astype(int)
+    period = signup_month[customer_idx] + offset
+    mrr = rng.choice([0, 500, 1000, 2500, 5000], size=rows, p=[0.1, 0.4, 0.3, 0.15, 0.05])
+
+    revenue_df = pd.DataFrame({
+        'date': month_starts[period] + pd.to_timedelta(rng.integers(0, 28, rows), unit='D'),
+        'customer_id': customers_df['customer_id'].to_numpy()[customer_idx],
+        'mrr': mrr
+    })
+    return customers_df, revenue_df
+
+
+def build_retention_matrix_loop(customers_df: pd.DataFrame, revenue_df: pd.DataFrame) -> pd.DataFrame:
+    """Original O(cohorts x periods x rows) implementation, kept as the reference."""
+    customers_df = create_cohort_column(customers_df)
+
+    all_periods = sorted(revenue_df['date'].dt.to_period('M').unique())
+    cohorts = sorted(customers_df['cohort'].unique())
+
+    matrix_data = []
+
+    for cohort in cohorts:
+        cohort_customers = customers_df[customers_df['cohort'] == cohort]['customer_id'].tolist()
+        cohort_size = len(cohort_customers)
+
+        row = {'cohort': str(cohort), 'cohort_size': cohort_size}
+
+        for period in all_periods:
+            if period >= cohort:
+                month_num = (period.year - cohort.year) * 12 + (period.month - cohort.month)
+
+                period_revenue = revenue_df[
+                    (revenue_df['date'].dt.to_period('M') == period) &
+                    (revenue_df['customer_id'].isin(cohort_customers)) &
+                    (revenue_df['mrr'] > 0)
+                ]
+                active_count = period_revenue['customer_id'].nunique()
+
+                retention_pct = (active_count / cohort_size * 100) if cohort_size > 0 else 0
+                row[f'M{month_num}'] = round(retention_pct, 1)
+
+        matrix_data.append(row)
+
+    return pd.DataFrame(matrix_data)
+
+
+def build_revenue_retention_matrix_loop(customers_df: pd.DataFrame, revenue_df: pd.DataFrame) -> pd.DataFrame:
+    """Original per-cohort NRR loop, kept as the reference."""
+    customers_df = create_cohort_column(customers_df)
+
+    all_periods = sorted(revenue_df['date'].dt.to_period('M').unique())
+    cohorts = sorted(customers_df['cohort'].unique())
+
+    matrix_data = []
+
+    for cohort in cohorts:
+        cohort_customers = customers_df[customers_df['cohort'] == cohort]['customer_id'].tolist()
+
+        initial_revenue = revenue_df[
+            (revenue_df['date'].dt.to_period('M') == cohort) &
+            (revenue_df['customer_id'].isin(cohort_customers))
+        ]['mrr'].sum()
+
+        row = {'cohort': str(cohort), 'initial_mrr': initial_revenue}
+
+        for period in all_periods:
+            if period >= cohort:
+                month_num = (period.year - cohort.year) * 12 + (period.month - cohort.month)
+
+                period_revenue = revenue_df[
+                    (revenue_df['date'].dt.to_period('M') == period) &
+                    (revenue_df['customer_id'].isin(cohort_customers))
+                ]['mrr'].sum()
+
+                nrr_pct = (period_revenue / initial_revenue * 100) if initial_revenue > 0 else 0
+                row[f'M{month_num}'] = round(nrr_pct, 1)
+
+        matrix_data.append(row)
+
+    return pd.DataFrame(matrix_data)
+
+
+def build_matrices_loop(customers_df: pd.DataFrame, revenue_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Both reference loops, as main() used to run them."""
+    return (build_retention_matrix_loop(customers_df, revenue_df),
+            build_revenue_retention_matrix_loop(customers_df, revenue_df))
+
+
+def build_matrices(customers_df: pd.DataFrame, revenue_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Both matrices from one shared cohort aggregate."""
+    aggregate = build_cohort_aggregate(customers_df, revenue_df)
+    return (build_retention_matrix(customers_df, revenue_df, aggregate),
+            build_revenue_retention_matrix(customers_df, revenue_df, aggregate))
+
+
+def time_call(func, *args) -> Tuple[float, Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Run func once and return (seconds, result)."""
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cohort matrix engines')
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='Comma-separated ledger sizes (rows)')
+    parser.add_argument('--months', type=int, default=36, help='Months of history')
+    parser.add_argument('--skip-loop-above', type=int, default=0,
+                        help='Skip the reference loop for ledgers larger than this (0 = never skip)')
+
+    args = parser.parse_args()
+    sizes = [int(x.strip()) for x in args.sizes.split(',')]
+
+    print(f"{'Rows':>10} {'Loop (s)':>10} {'Vector (s)':>11} {'Speedup':>9}  Match")
+    print("-" * 52)
+
+    for rows in sizes:
+        customers_df, revenue_df = generate_ledger(rows, args.months)
+
+        vector_time, vector_matrices = time_call(build_matrices, customers_df, revenue_df)
+
+        if args.skip_loop_above and rows > args.skip_loop_above:
+            print(f"{rows:>10,} {'skipped':>10} {vector_time:>11.3f} {'—':>9}  —")
+            continue
+
+        loop_time, loop_matrices = time_call(build_matrices_loop, customers_df, revenue_df)
+        match = all(a.equals(b) for a, b in zip(loop_matrices, vector_matrices))
+        speedup = loop_time / vector_time if vector_time > 0 else float('inf')
+
+        print(f"{rows:>10,} {loop_time:>10.3f} {vector_time:>11.3f} {speedup:>8.0f}x  {'yes' if match else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,15 +5,41 @@ Calculates core SaaS metrics from revenue and customer data.
 
 Usage:
     python calculate_metrics.py --revenue revenue.csv --customers customers.csv --output metrics.json
+    python calculate_metrics.py --revenue revenue.csv --customers customers.csv --chunksize 500000
+
+    # Batch: manifest (CSV/JSON with company,revenue,customers) or a directory of
+    # company folders each holding a *revenue*.csv and a *customer*.csv
+    python calculate_metrics.py --batch portfolio/ --workers 8 --output metrics_batch.parquet
+    python calculate_metrics.py --batch manifest.csv --output metrics_batch.jsonl
+
+    # In-process
+    from calculate_metrics import compute_metrics
+    metrics = compute_metrics(revenue_df, customers_df)
 """
 
 import argparse
 import json
+import sys
+import time
+import traceback
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, asdict, fields
+
+from ledger import read_revenue_ledger, read_table
+from monthly_metrics import DEFAULT_GROSS_MARGIN, latest, monthly_series, series_records
+from concentration import concentration_summary
+
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'scripts'))
+try:
+    from skill_support import cached_main
+except ImportError:  # skill used outside the repository
+    def cached_main(main, *args, **kwargs):
+        return main()
 
 
 @dataclass
@@ -22,7 +48,7 @@ class SaaSMetrics:
     mrr: float
     arr: float
     mrr_growth_mom: float
-    arr_growth_yoy: float
+    arr_growth_yoy: Optional[float]  # None until the month a year back has MRR
     arpu: float
     ltv: float
     ltv_dcf: float
@@ -37,7 +63,7 @@ class SaaSMetrics:
     burn_rate: float
     runway_months: float
     burn_multiple: float
-    quick_ratio: float
+    quick_ratio: Optional[float]  # None when the latest month lost no MRR
     top_customer_concentration: float
     top_10_concentration: float
     calculation_date: str
@@ -45,29 +71,17 @@ class SaaSMetrics:
     flags: list
 
 
-def calculate_mrr_metrics(revenue_df: pd.DataFrame) -> Dict[str, float]:
-    """Calculate MRR-based metrics from revenue data."""
-    revenue_df['date'] = pd.to_datetime(revenue_df['date'])
-    revenue_df = revenue_df.sort_values('date')
-    
-    latest_month = revenue_df['date'].max().replace(day=1)
-    current_mrr = revenue_df[
-        revenue_df['date'].dt.to_period('M') == latest_month.to_period('M')
-    ]['mrr'].sum()
-    
-    prev_month = latest_month - timedelta(days=1)
-    prev_month = prev_month.replace(day=1)
-    prev_mrr = revenue_df[
-        revenue_df['date'].dt.to_period('M') == prev_month.to_period('M')
-    ]['mrr'].sum()
-    
-    mrr_growth_mom = ((current_mrr - prev_mrr) / prev_mrr * 100) if prev_mrr > 0 else 0
-    
+def calculate_mrr_metrics(revenue_df: pd.DataFrame, series: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """Latest-month MRR metrics, read off the monthly series."""
+    if series is None:
+        series = monthly_series(revenue_df)
+    current_mrr = series['mrr'].iloc[-1] if len(series) else 0
+
     return {
         'mrr': current_mrr,
         'arr': current_mrr * 12,
-        'mrr_growth_mom': round(mrr_growth_mom, 2),
-        'arr_growth_yoy': 0  # Requires 12 months of data
+        'mrr_growth_mom': latest(series, 'mrr_growth_mom', 0),
+        'arr_growth_yoy': latest(series, 'arr_growth_yoy')  # None until 12 months of data
     }
 
 
@@ -109,6 +123,13 @@ def generate_flags(metrics: Dict[str, Any]) -> list:
             'message': '🔴 Burn multiple exceeds 2.5x - Inefficient growth'
         })
     
+    if metrics.get('top_customer_concentration', 0) > 25.0:
+        flags.append({
+            'severity': 'high',
+            'metric': 'top_customer_concentration',
+            'message': '🔴 Top customer exceeds 25% of MRR - Concentration risk'
+        })
+    
     if metrics.get('runway_months', 999) < 12:
         flags.append({
             'severity': 'high',
@@ -119,56 +140,223 @@ def generate_flags(metrics: Dict[str, Any]) -> list:
     return flags
 
 
-def main():
-    parser = argparse.ArgumentParser(description='Calculate SaaS metrics')
-    parser.add_argument('--revenue', required=True, help='Revenue CSV file')
-    parser.add_argument('--customers', required=True, help='Customers CSV file')
-    parser.add_argument('--output', default='metrics.json', help='Output file')
-    
-    args = parser.parse_args()
-    
-    # Load and process data
-    revenue_df = pd.read_csv(args.revenue)
-    customers_df = pd.read_csv(args.customers)
-    
-    mrr_metrics = calculate_mrr_metrics(revenue_df)
-    
-    # Build full metrics (simplified)
+def compute_metrics(revenue_df: pd.DataFrame, customers_df: pd.DataFrame,
+                    series: Optional[pd.DataFrame] = None,
+                    concentration: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Compute the metrics.json payload from in-memory revenue and customer tables.
+
+    Pass a precomputed monthly `series` and concentration_summary to skip
+    the ledger passes (revenue_df is then unused and may be None).
+    """
+    if series is None:
+        series = monthly_series(revenue_df, DEFAULT_GROSS_MARGIN)
+    if concentration is None:
+        concentration = concentration_summary(revenue_df)
+    mrr_metrics = calculate_mrr_metrics(revenue_df, series)
+    customer_count = len(customers_df)
+
+    # Revenue metrics from the latest month of the series; cost-side metrics
+    # need financials the ledger does not carry and keep placeholder values
     all_metrics = {
         **mrr_metrics,
-        'arpu': mrr_metrics['mrr'] / len(customers_df) if len(customers_df) > 0 else 0,
-        'ltv': 0,
+        'arpu': latest(series, 'arpu', mrr_metrics['mrr'] / customer_count if customer_count > 0 else 0),
+        'ltv': latest(series, 'ltv', 0),
         'ltv_dcf': 0,
         'cac': 0,
         'ltv_cac_ratio': 0,
         'cac_payback_months': 0,
-        'gross_churn_rate': 2.0,  # Default
-        'net_churn_rate': -2.0,
-        'net_revenue_retention': 102.0,
+        'gross_churn_rate': latest(series, 'gross_churn_rate', 0.0),
+        'net_churn_rate': latest(series, 'net_churn_rate', 0.0),
+        'net_revenue_retention': latest(series, 'nrr_trailing_12', 100.0),
         'logo_retention': 95.0,
-        'gross_margin': 75.0,
+        'gross_margin': DEFAULT_GROSS_MARGIN,
         'burn_rate': 0,
         'runway_months': 18,
         'burn_multiple': 1.5,
-        'quick_ratio': 4.0,
-        'top_customer_concentration': 15.0,
-        'top_10_concentration': 45.0
+        'quick_ratio': latest(series, 'quick_ratio'),
+        'top_customer_concentration': concentration.get('top_1_share', 0.0),
+        'top_10_concentration': concentration.get('top_10_share', 0.0)
     }
-    
+
     flags = generate_flags(all_metrics)
     all_metrics['flags'] = flags
     all_metrics['calculation_date'] = datetime.now().isoformat()
-    all_metrics['data_period'] = 'sample'
+    all_metrics['data_period'] = (f"{series.index.min()} to {series.index.max()}" if len(series) else 'empty')
+    all_metrics['monthly_revenue'] = series['mrr'].astype(float).tolist()
+    all_metrics['monthly'] = series_records(series)
+    all_metrics['customer_concentration'] = concentration
+    return all_metrics
+
+
+def convert_numpy(obj):
+    """json.dump default for NumPy scalars and arrays."""
+    if isinstance(obj, (np.integer, np.int64)):
+        return int(obj)
+    elif isinstance(obj, (np.floating, np.float64)):
+        return float(obj)
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return obj
+
+
+@dataclass
+class BatchJob:
+    """One company's inputs in a batch run."""
+    company: str
+    revenue: str
+    customers: str
+
+
+def load_batch_jobs(source: str) -> List[BatchJob]:
+    """Jobs from a manifest file or a directory of company subfolders.
+
+    A manifest is a CSV or JSON list with company, revenue and customers
+    entries (paths relative to the manifest). In a directory, each subfolder
+    is a company and must hold one revenue and one customers file.
+    """
+    path = Path(source)
+    if path.is_dir():
+        jobs = []
+        for folder in sorted(p for p in path.iterdir() if p.is_dir()):
+            files = [f for f in folder.iterdir() if f.suffix.lower() in ('.csv', '.xlsx', '.xls')]
+            revenue = [f for f in files if 'revenue' in f.name.lower()]
+            customers = [f for f in files if 'customer' in f.name.lower()]
+            jobs.append(BatchJob(
+                folder.name,
+                str(revenue[0]) if revenue else '',
+                str(customers[0]) if customers else ''
+            ))
+        return jobs
+
+    if path.suffix.lower() == '.json':
+        with open(path, 'r') as f:
+            entries = json.load(f)
+    else:
+        entries = pd.read_csv(path, dtype=str).fillna('').to_dict('records')
+
+    def resolve(value: str) -> str:
+        return str(path.parent / value) if value else ''
+
+    return [BatchJob(str(e['company']), resolve(e.get('revenue', '')), resolve(e.get('customers', '')))
+            for e in entries]
+
+
+def batch_inputs(source: str) -> List[str]:
+    """The manifest or directory plus every revenue and customers file its jobs read."""
+    return [source] + [path for job in load_batch_jobs(source) for path in (job.revenue, job.customers)]
+
+
+def compute_company_metrics(job: BatchJob, chunksize: Optional[int] = None) -> Dict[str, Any]:
+    """Metrics row for one company; failures are returned as an error row instead of raised."""
+    started = time.perf_counter()
+    row: Dict[str, Any] = {'company': job.company, 'revenue_file': job.revenue,
+                           'customers_file': job.customers, 'status': 'ok', 'error': None}
+    try:
+        if not job.revenue or not job.customers:
+            raise FileNotFoundError('missing revenue or customers file')
+        revenue_df = read_revenue_ledger(job.revenue, chunksize)
+        customers_df = read_table(job.customers)
+        row['load_seconds'] = time.perf_counter() - started
+        metrics = compute_metrics(revenue_df, customers_df)
+        for f in fields(SaaSMetrics):
+            row[f.name] = convert_numpy(metrics.get(f.name))
+        row['flag_count'] = len(row['flags'])
+        row['flags'] = json.dumps(row['flags'], ensure_ascii=False)
+    except Exception as e:
+        row['status'] = 'error'
+        row['error'] = f'{type(e).__name__}: {e}'
+        row['traceback'] = traceback.format_exc(limit=3)
+    row['seconds'] = time.perf_counter() - started
+    return row
+
+
+def run_batch(jobs: List[BatchJob], workers: int = 4, chunksize: Optional[int] = None) -> pd.DataFrame:
+    """Compute metrics for every job in a process pool, one row per company in job order."""
+    rows: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    if workers <= 1:
+        for i, job in enumerate(jobs):
+            rows[i] = compute_company_metrics(job, chunksize)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(compute_company_metrics, job, chunksize): i for i, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    rows[i] = future.result()
+                except Exception as e:  # worker died (e.g. out of memory)
+                    rows[i] = {'company': jobs[i].company, 'revenue_file': jobs[i].revenue,
+                               'customers_file': jobs[i].customers, 'status': 'error',
+                               'error': f'{type(e).__name__}: {e}', 'seconds': None}
+    return pd.DataFrame(rows)
+
+
+def export_batch(df: pd.DataFrame, output_path: str) -> None:
+    """Write the batch table to Parquet (.parquet) or JSON lines (anything else)."""
+    if output_path.endswith('.parquet'):
+        df.to_parquet(output_path, index=False)
+    else:
+        df.to_json(output_path, orient='records', lines=True, force_ascii=False)
+
+
+def main_batch(args) -> None:
+    jobs = load_batch_jobs(args.batch)
+    output_path = resolve_output(args)
+    print(f"Computing metrics for {len(jobs)} companies with {args.workers} workers...")
+
+    started = time.perf_counter()
+    df = run_batch(jobs, args.workers, args.chunksize)
+    elapsed = time.perf_counter() - started
+    export_batch(df, output_path)
+
+    ok = df[df['status'] == 'ok']
+    failed = df[df['status'] != 'ok']
+    print(f"Batch results saved to {output_path}")
+    print(f"\n=== BATCH SUMMARY ===")
+    print(f"Companies: {len(df)} ({len(ok)} ok, {len(failed)} failed)")
+    print(f"Wall time: {elapsed:.2f}s (sum of company times {df['seconds'].sum():.2f}s)")
+    if len(ok):
+        print(f"Median ARR: ${ok['arr'].median():,.0f}")
+        slowest = ok.nlargest(min(3, len(ok)), 'seconds')
+        print("Slowest: " + ', '.join(f"{r.company} ({r.seconds:.2f}s)" for r in slowest.itertuples()))
+    for r in failed.itertuples():
+        print(f"  FAILED {r.company}: {r.error}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Calculate SaaS metrics')
+    parser.add_argument('--revenue', help='Revenue CSV file')
+    parser.add_argument('--customers', help='Customers CSV file')
+    parser.add_argument('--output', default=None,
+                        help='Output file (default metrics.json, or metrics_batch.parquet with --batch)')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Stream the revenue file in chunks of this many rows')
+    parser.add_argument('--batch', metavar='MANIFEST_OR_DIR',
+                        help='Compute metrics for every company in a manifest or directory of company folders')
+    parser.add_argument('--workers', type=int, default=4, help='Process pool size for --batch')
+    return parser
+
+
+def resolve_output(args: argparse.Namespace) -> str:
+    """The file main() writes: --output, else the default for the run mode."""
+    return args.output or ('metrics_batch.parquet' if args.batch else 'metrics.json')
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if args.batch:
+        main_batch(args)
+        return
+    if not (args.revenue and args.customers):
+        parser.error('--revenue and --customers are required without --batch')
+    args.output = resolve_output(args)
+    
+    # Load and process data
+    revenue_df = read_revenue_ledger(args.revenue, args.chunksize)
+    customers_df = read_table(args.customers)
     
-    # Convert numpy types for JSON serialization
-    def convert_numpy(obj):
-        if isinstance(obj, (np.integer, np.int64)):
-            return int(obj)
-        elif isinstance(obj, (np.floating, np.float64)):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return obj
+    all_metrics = compute_metrics(revenue_df, customers_df)
 
     with open(args.output, 'w') as f:
         json.dump(all_metrics, f, indent=2, default=convert_numpy)
@@ -177,7 +365,11 @@ def main():
     print(f"\n=== SUMMARY ===")
     print(f"ARR: ${all_metrics['arr']:,.0f}")
     print(f"MRR Growth: {all_metrics['mrr_growth_mom']}%")
+    print(f"Top Customer: {all_metrics['top_customer_concentration']}% of MRR "
+          f"(top 10: {all_metrics['top_10_concentration']}%)")
 
 
 if __name__ == '__main__':
-    main()
+    cached_main(main, __file__, build_parser(),
+                inputs=lambda args: batch_inputs(args.batch) if args.batch else [args.revenue, args.customers],
+                outputs=lambda args: [resolve_output(args)])
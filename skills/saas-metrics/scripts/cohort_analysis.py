@@ -5,23 +5,39 @@ Generates retention cohort matrices and visualizations.
 
 Usage:
     python cohort_analysis.py --revenue revenue.csv --customers customers.csv --output cohorts.xlsx
+    python cohort_analysis.py --revenue revenue.csv --customers customers.csv --chunksize 500000
 """
 
 import argparse
 import json
+import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass
 from pathlib import Path
 
+from ledger import read_revenue_ledger, read_table
 
-def load_data(revenue_path: str, customers_path: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    """Load revenue and customer data files."""
-    revenue_df = pd.read_csv(revenue_path)
-    revenue_df['date'] = pd.to_datetime(revenue_df['date'])
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'scripts'))
+try:
+    from skill_support import cached_main
+except ImportError:  # skill used outside the repository
+    def cached_main(main, *args, **kwargs):
+        return main()
 
-    customers_df = pd.read_csv(customers_path)
+
+def load_data(revenue_path: str, customers_path: str,
+              chunksize: Optional[int] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Load revenue and customer data files.
+
+    With `chunksize`, the revenue ledger is streamed and compacted to one row
+    per (customer, month); see ledger.read_revenue_ledger.
+    """
+    revenue_df = read_revenue_ledger(revenue_path, chunksize)
+
+    customers_df = read_table(customers_path)
     customers_df['created_date'] = pd.to_datetime(customers_df['created_date'])
     if 'churned_date' in customers_df.columns:
         customers_df['churned_date'] = pd.to_datetime(customers_df['churned_date'])
@@ -36,78 +52,175 @@ def create_cohort_column(df: pd.DataFrame, date_col: str = 'created_date') -> pd
     return df
 
 
-def build_retention_matrix(customers_df: pd.DataFrame, revenue_df: pd.DataFrame) -> pd.DataFrame:
-    """Build customer retention cohort matrix."""
+def month_ordinal(dates: pd.Series) -> np.ndarray:
+    """Convert datetimes to a monthly integer index (year * 12 + month - 1)."""
+    return (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype=np.int64)
+
+
+def attach_cohorts(customers_df: pd.DataFrame, revenue_df: pd.DataFrame) -> pd.DataFrame:
+    """Join each customer's signup cohort onto the revenue ledger.
+
+    Returns one row per revenue record (duplicated if a customer id appears in
+    several cohorts) with integer ``cohort_month``, ``period_month`` and
+    ``month_num`` columns and an ``is_active`` flag. Records before the cohort
+    month or for unknown customers are dropped.
+    """
+    # Compacted (chunk-loaded) ledgers carry the largest single-row MRR
+    active_col = 'mrr_max' if 'mrr_max' in revenue_df.columns else 'mrr'
+
+    pairs = pd.DataFrame({
+        'customer_id': customers_df['customer_id'].to_numpy(),
+        'cohort_month': month_ordinal(customers_df['created_date'])
+    }).drop_duplicates()
+
+    ledger = pd.DataFrame({
+        'customer_id': revenue_df['customer_id'].to_numpy(),
+        'period_month': month_ordinal(revenue_df['date']),
+        'mrr': revenue_df['mrr'].to_numpy(),
+        'is_active': revenue_df[active_col].to_numpy() > 0
+    })
+
+    if pairs['customer_id'].is_unique:
+        cohort_month = ledger['customer_id'].map(pairs.set_index('customer_id')['cohort_month'])
+        known = cohort_month.notna().to_numpy()
+        ledger = ledger[known].assign(cohort_month=cohort_month[known].to_numpy(dtype=np.int64))
+    else:
+        ledger = ledger.merge(pairs, on='customer_id', how='inner')
+
+    ledger['month_num'] = ledger['period_month'] - ledger['cohort_month']
+    return ledger[ledger['month_num'] >= 0]
+
+
+def _cohort_grid(cohort_months: np.ndarray, period_months: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Lay out the M-columns of a cohort matrix.
+
+    Returns the month offsets in column order (first appearance when walking
+    cohorts oldest-first) and a boolean (cohort x offset) mask of the cells
+    that correspond to a period present in the ledger.
+    """
+    row_idx, offsets = [], []
+    for i, cohort_month in enumerate(cohort_months):
+        cohort_offsets = period_months[period_months >= cohort_month] - cohort_month
+        row_idx.append(np.full(len(cohort_offsets), i))
+        offsets.append(cohort_offsets)
+
+    row_idx = np.concatenate(row_idx) if row_idx else np.array([], dtype=np.int64)
+    offsets = np.concatenate(offsets) if offsets else np.array([], dtype=np.int64)
+
+    unique_offsets, first_seen = np.unique(offsets, return_index=True)
+    columns = unique_offsets[np.argsort(first_seen, kind='stable')]
+
+    valid = np.zeros((len(cohort_months), len(columns)), dtype=bool)
+    col_pos = {offset: j for j, offset in enumerate(columns)}
+    valid[row_idx, [col_pos[o] for o in offsets]] = True
+    return columns, valid
+
+
+@dataclass
+class CohortAggregate:
+    """Cohort x month-offset activity shared by the logo and revenue matrices."""
+    cohorts: List[pd.Period]
+    cohort_sizes: np.ndarray
+    month_offsets: np.ndarray
+    valid: np.ndarray
+    active_customers: np.ndarray
+    mrr: np.ndarray
+
+    @property
+    def initial_mrr(self) -> np.ndarray:
+        """MRR of each cohort in its signup month (zero if that month has no revenue)."""
+        at_signup = np.flatnonzero(self.month_offsets == 0)
+        if len(at_signup) == 0:
+            return np.zeros(len(self.cohorts), dtype=self.mrr.dtype)
+        return self.mrr[:, at_signup[0]]
+
+
+def build_cohort_aggregate(customers_df: pd.DataFrame, revenue_df: pd.DataFrame) -> CohortAggregate:
+    """Aggregate the revenue ledger by (cohort, month offset) in a single pass."""
+    ledger = attach_cohorts(customers_df, revenue_df)
+    keys = ['cohort_month', 'month_num']
+
+    active = ledger[ledger['is_active']].groupby(keys)['customer_id'].nunique()
+    mrr = ledger.groupby(keys)['mrr'].sum()
+    period_months = np.unique(month_ordinal(revenue_df['date']))
+    return assemble_cohort_aggregate(customers_df, period_months, active, mrr)
+
+
+def assemble_cohort_aggregate(customers_df: pd.DataFrame, period_months: np.ndarray,
+                              active: pd.Series, mrr: pd.Series) -> CohortAggregate:
+    """Lay (cohort_month, month_num)-indexed active-customer and MRR totals out as a CohortAggregate.
+
+    `period_months` are the month ordinals present in the ledger.
+    """
     customers_df = create_cohort_column(customers_df)
 
-    # Get all periods
-    all_periods = sorted(revenue_df['date'].dt.to_period('M').unique())
     cohorts = sorted(customers_df['cohort'].unique())
-
-    # Build matrix
-    matrix_data = []
-
-    for cohort in cohorts:
-        cohort_customers = customers_df[customers_df['cohort'] == cohort]['customer_id'].tolist()
-        cohort_size = len(cohort_customers)
-
-        row = {'cohort': str(cohort), 'cohort_size': cohort_size}
-
-        for i, period in enumerate(all_periods):
-            if period >= cohort:
-                month_num = (period.year - cohort.year) * 12 + (period.month - cohort.month)
-
-                # Count active customers in this period
-                period_revenue = revenue_df[
-                    (revenue_df['date'].dt.to_period('M') == period) &
-                    (revenue_df['customer_id'].isin(cohort_customers)) &
-                    (revenue_df['mrr'] > 0)
-                ]
-                active_count = period_revenue['customer_id'].nunique()
-
-                retention_pct = (active_count / cohort_size * 100) if cohort_size > 0 else 0
-                row[f'M{month_num}'] = round(retention_pct, 1)
-
-        matrix_data.append(row)
-
-    return pd.DataFrame(matrix_data)
-
-
-def build_revenue_retention_matrix(customers_df: pd.DataFrame, revenue_df: pd.DataFrame) -> pd.DataFrame:
+    cohort_sizes = customers_df['cohort'].value_counts()
+    cohort_months = np.array([c.year * 12 + c.month - 1 for c in cohorts], dtype=np.int64)
+    month_offsets, valid = _cohort_grid(cohort_months, period_months)
+
+    def to_grid(series: pd.Series, dtype) -> np.ndarray:
+        grid = series.unstack('month_num', fill_value=0)
+        grid = grid.reindex(index=cohort_months, columns=month_offsets, fill_value=0)
+        return grid.to_numpy(dtype=dtype)
+
+    return CohortAggregate(
+        cohorts=cohorts,
+        cohort_sizes=np.array([cohort_sizes[c] for c in cohorts], dtype=np.int64),
+        month_offsets=month_offsets,
+        valid=valid,
+        active_customers=to_grid(active, np.int64),
+        mrr=to_grid(mrr, mrr.dtype)
+    )
+
+
+def build_retention_matrix(customers_df: pd.DataFrame, revenue_df: pd.DataFrame,
+                           aggregate: Optional[CohortAggregate] = None) -> pd.DataFrame:
+    """Build customer retention cohort matrix."""
+    if aggregate is None:
+        aggregate = build_cohort_aggregate(customers_df, revenue_df)
+    if not aggregate.cohorts:
+        return pd.DataFrame()
+
+    sizes = aggregate.cohort_sizes
+    matrix = pd.DataFrame({
+        'cohort': [str(c) for c in aggregate.cohorts],
+        'cohort_size': sizes
+    })
+    for j, offset in enumerate(aggregate.month_offsets):
+        # Python's round() keeps the per-cell rounding of the original loop
+        matrix[f'M{offset}'] = [
+            round(int(count) / size * 100, 1) if ok else np.nan
+            for count, size, ok in zip(aggregate.active_customers[:, j], sizes, aggregate.valid[:, j])
+        ]
+
+    return matrix
+
+
+def build_revenue_retention_matrix(customers_df: pd.DataFrame, revenue_df: pd.DataFrame,
+                                   aggregate: Optional[CohortAggregate] = None) -> pd.DataFrame:
     """Build revenue retention (NRR) cohort matrix."""
-    customers_df = create_cohort_column(customers_df)
-
-    all_periods = sorted(revenue_df['date'].dt.to_period('M').unique())
-    cohorts = sorted(customers_df['cohort'].unique())
-
-    matrix_data = []
-
-    for cohort in cohorts:
-        cohort_customers = customers_df[customers_df['cohort'] == cohort]['customer_id'].tolist()
+    if aggregate is None:
+        aggregate = build_cohort_aggregate(customers_df, revenue_df)
+    if not aggregate.cohorts:
+        return pd.DataFrame()
 
-        # Get initial MRR for cohort
-        initial_revenue = revenue_df[
-            (revenue_df['date'].dt.to_period('M') == cohort) &
-            (revenue_df['customer_id'].isin(cohort_customers))
-        ]['mrr'].sum()
+    initial_mrr = aggregate.initial_mrr
+    matrix = pd.DataFrame({
+        'cohort': [str(c) for c in aggregate.cohorts],
+        'initial_mrr': initial_mrr
+    })
 
-        row = {'cohort': str(cohort), 'initial_mrr': initial_revenue}
+    has_base = initial_mrr > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        nrr = aggregate.mrr / np.where(has_base, initial_mrr, 1)[:, None] * 100
+    nrr = np.where(has_base[:, None], np.round(nrr, 1), 0.0)
+    nrr = np.where(aggregate.valid, nrr, np.nan)
 
-        for period in all_periods:
-            if period >= cohort:
-                month_num = (period.year - cohort.year) * 12 + (period.month - cohort.month)
+    for j, offset in enumerate(aggregate.month_offsets):
+        matrix[f'M{offset}'] = nrr[:, j]
 
-                period_revenue = revenue_df[
-                    (revenue_df['date'].dt.to_period('M') == period) &
-                    (revenue_df['customer_id'].isin(cohort_customers))
-                ]['mrr'].sum()
-
-                nrr_pct = (period_revenue / initial_revenue * 100) if initial_revenue > 0 else 0
-                row[f'M{month_num}'] = round(nrr_pct, 1)
-
-        matrix_data.append(row)
-
-    return pd.DataFrame(matrix_data)
+    return matrix
 
 
 def calculate_cohort_metrics(retention_matrix: pd.DataFrame, revenue_matrix: pd.DataFrame) -> Dict[str, Any]:
@@ -220,25 +333,31 @@ def export_to_excel(retention_matrix: pd.DataFrame, revenue_matrix: pd.DataFrame
             red_format = workbook.add_format({'bg_color': '#FFC7CE'})
 
 
-def main():
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description='Generate cohort retention analysis')
     parser.add_argument('--revenue', required=True, help='Revenue CSV file')
     parser.add_argument('--customers', required=True, help='Customers CSV file')
     parser.add_argument('--output', default='cohorts.xlsx', help='Output Excel file')
     parser.add_argument('--json', action='store_true', help='Also output JSON metrics')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Stream the revenue file in chunks of this many rows')
+    return parser
+
 
-    args = parser.parse_args()
+def main():
+    args = build_parser().parse_args()
 
     # Load data
     print(f"Loading data from {args.revenue} and {args.customers}...")
-    revenue_df, customers_df = load_data(args.revenue, args.customers)
+    revenue_df, customers_df = load_data(args.revenue, args.customers, args.chunksize)
 
     print(f"Found {len(customers_df)} customers and {len(revenue_df)} revenue records")
 
     # Build matrices
     print("Building retention matrices...")
-    retention_matrix = build_retention_matrix(customers_df, revenue_df)
-    revenue_matrix = build_revenue_retention_matrix(customers_df, revenue_df)
+    aggregate = build_cohort_aggregate(customers_df, revenue_df)
+    retention_matrix = build_retention_matrix(customers_df, revenue_df, aggregate)
+    revenue_matrix = build_revenue_retention_matrix(customers_df, revenue_df, aggregate)
 
     # Calculate metrics
     metrics = calculate_cohort_metrics(retention_matrix, revenue_matrix)
@@ -281,4 +400,6 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    cached_main(main, __file__, build_parser(),
+                inputs=lambda args: [args.revenue, args.customers],
+                outputs=lambda args: [args.output] + ([args.output.replace('.xlsx', '.json')] if args.json else []))
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Customer Concentration Analysis
+Per-month revenue concentration from a revenue ledger: top-1 and top-10
+customer share, top-N% of customers' share, Herfindahl-Hirschman index and
+the Lorenz curve / Gini coefficient. Top-k selection uses partial sorts
+(np.partition / np.argpartition) on a customers x months MRR matrix, so
+every month is handled in one call and only the largest customers are
+ever sorted.
+
+Usage:
+    python concentration.py --revenue revenue.csv --output concentration.csv
+    python concentration.py --revenue revenue.csv --chunksize 500000 --top-percent 1,5,10 --output concentration.parquet
+
+    # From calculate_metrics
+    from concentration import concentration_series, concentration_summary
+    summary = concentration_summary(revenue_df)
+"""
+
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ledger import read_revenue_ledger
+
+TOP_K = 10
+DEFAULT_TOP_PERCENT = (1, 10, 20)
+
+# Population points of the Lorenz curve (and the Gini computed from it)
+LORENZ_POINTS = 100
+
+
+def months_from_ordinals(ordinals: np.ndarray) -> pd.PeriodIndex:
+    """Monthly PeriodIndex from months since 1970 (PeriodIndex.from_ordinals needs pandas 2.2)."""
+    dates = np.asarray(ordinals, dtype=np.int64).astype('datetime64[M]').astype('datetime64[ns]')
+    return pd.DatetimeIndex(dates).to_period('M')
+
+
+def customer_month_matrix(revenue_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, pd.PeriodIndex]:
+    """MRR per (customer, month) as a dense customers x months matrix.
+
+    Returns the matrix, the customer ids for its rows and the months for its
+    columns (every month from the first to the last, gaps included).
+    Negative MRR (credits, refunds) counts as zero.
+    """
+    date = pd.to_datetime(revenue_df['date'])
+    if len(date) == 0:
+        return np.zeros((0, 0)), np.array([], dtype=object), pd.PeriodIndex([], freq='M')
+
+    # Months since 1970, as pandas monthly period ordinals
+    ordinal = date.to_numpy(dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+    first, last = ordinal.min(), ordinal.max()
+    months = months_from_ordinals(np.arange(first, last + 1))
+    customer_codes, customers = pd.factorize(revenue_df['customer_id'])
+    month_codes = ordinal - first
+    flat = np.bincount(customer_codes * len(months) + month_codes,
+                       weights=revenue_df['mrr'].to_numpy(dtype=np.float64),
+                       minlength=len(customers) * len(months))
+    return np.clip(flat.reshape(len(customers), len(months)), 0, None), np.asarray(customers), months
+
+
+def top_cumulative(matrix: np.ndarray, k: int) -> np.ndarray:
+    """Running totals of the k largest values in each column, largest first (k x columns).
+
+    One partition pulls the top k rows for every month; only that block is sorted.
+    """
+    n = matrix.shape[0]
+    k = min(k, n)
+    block = np.partition(matrix, n - k, axis=0)[n - k:] if 0 < k < n else matrix
+    return np.cumsum(np.sort(block, axis=0)[::-1], axis=0)
+
+
+def ranked_share(cumulative: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Revenue of each column's top `counts[j]` values (zero where the count is zero)."""
+    if not len(cumulative):
+        return np.zeros(len(counts))
+    rows = np.clip(counts, 1, len(cumulative)) - 1
+    return np.where(counts > 0, cumulative[rows, np.arange(len(counts))], 0)
+
+
+def lorenz_curve(values: np.ndarray, points: int = LORENZ_POINTS) -> np.ndarray:
+    """Cumulative revenue share at `points` evenly spaced population shares (poorest first).
+
+    np.partition at the cut points orders the blocks between them, which
+    is all the block sums need; the customers within a block stay unsorted.
+    """
+    n = len(values)
+    total = values.sum()
+    if n == 0 or total <= 0:
+        return np.linspace(0, 1, points + 1)
+    cuts = np.unique(np.floor(np.linspace(0, n, points + 1)).astype(np.int64))
+    inner = cuts[1:-1]
+    ordered = np.partition(values, inner) if len(inner) else values
+    block_sums = np.add.reduceat(ordered, cuts[:-1])
+    shares = np.concatenate([[0.0], np.cumsum(block_sums) / total])
+    return np.interp(np.linspace(0, n, points + 1), cuts, shares)
+
+
+def gini(curve: np.ndarray) -> float:
+    """Gini coefficient from a Lorenz curve on an even population grid.
+
+    Exact when the curve has a point per customer; on the LORENZ_POINTS
+    grid it is within about 1/LORENZ_POINTS of the exact value.
+    """
+    # Trapezoid rule by hand: np.trapezoid needs numpy 2.0, which deprecates np.trapz
+    dx = 1 / (len(curve) - 1)
+    area = (curve[:-1] + curve[1:]).sum() * dx / 2
+    return float(1 - 2 * area)
+
+
+def _series_from_matrix(matrix: np.ndarray, months: pd.PeriodIndex, top_percent: Sequence[float]) -> pd.DataFrame:
+    total = matrix.sum(axis=0)
+    active = (matrix > 0).sum(axis=0)
+    base = np.where(total > 0, total, np.nan)
+
+    # Top-k and top-N% shares all read off one ranked block of the largest customers
+    counts = {p: np.ceil(active * p / 100).astype(np.int64) for p in top_percent}
+    k_max = max([TOP_K] + [int(c.max(initial=0)) for c in counts.values()])
+    cumulative = top_cumulative(matrix, k_max)
+
+    out = pd.DataFrame({
+        'mrr': total,
+        'customers': active,
+        'top_1_share': ranked_share(cumulative, np.minimum(active, 1)) / base * 100,
+        f'top_{TOP_K}_share': ranked_share(cumulative, np.minimum(active, TOP_K)) / base * 100
+    }, index=months)
+    for p, c in counts.items():
+        out[f'top_{p:g}pct_share'] = ranked_share(cumulative, c) / base * 100
+    out['hhi'] = np.square(matrix / base).sum(axis=0) * 10000
+    out['gini'] = [gini(lorenz_curve(matrix[:, j][matrix[:, j] > 0])) if total[j] > 0 else np.nan
+                   for j in range(len(months))]
+
+    out.index.name = 'month'
+    return out
+
+
+def concentration_series(revenue_df: pd.DataFrame,
+                         top_percent: Sequence[float] = DEFAULT_TOP_PERCENT) -> pd.DataFrame:
+    """Concentration metrics for every month, indexed by month.
+
+    Shares are percentages of the month's MRR over customers with positive
+    MRR; HHI is on the 0-10,000 scale. Months without revenue are NaN.
+    """
+    matrix, _, months = customer_month_matrix(revenue_df)
+    return _series_from_matrix(matrix, months, top_percent)
+
+
+def _top_customers(column: np.ndarray, customers: np.ndarray, k: int) -> List[Dict[str, Any]]:
+    k = min(k, int((column > 0).sum()))
+    if k == 0:
+        return []
+    top = np.argpartition(column, len(column) - k)[-k:]
+    top = top[np.argsort(-column[top], kind='stable')]
+    total = column.sum()
+    return [{'customer_id': customers[i], 'mrr': round(float(column[i]), 2),
+             'share': round(float(column[i] / total * 100), 2)} for i in top]
+
+
+def top_customers(revenue_df: pd.DataFrame, k: int = TOP_K, month: Optional[pd.Period] = None) -> List[Dict[str, Any]]:
+    """The k largest customers of a month (default the latest), largest first."""
+    matrix, customers, months = customer_month_matrix(revenue_df)
+    if not len(months):
+        return []
+    return _top_customers(matrix[:, months.get_loc(month) if month is not None else -1], customers, k)
+
+
+def latest_revenue_month(series: pd.DataFrame) -> Optional[pd.Period]:
+    """The last month of a concentration series with any revenue, or None."""
+    revenue = series.dropna(subset=['top_1_share'])
+    return revenue.index[-1] if len(revenue) else None
+
+
+def summarize_concentration(series: pd.DataFrame, column: np.ndarray, customers: np.ndarray) -> Dict[str, Any]:
+    """concentration_summary from a concentration series and the latest revenue month's MRR per customer."""
+    month = latest_revenue_month(series)
+    if month is None:
+        return {'month': None, 'monthly': []}
+    latest = series.loc[month]
+
+    summary: Dict[str, Any] = {'month': str(month), 'customers': int(latest['customers'])}
+    summary.update({c: round(float(latest[c]), 3 if c == 'gini' else 2)
+                    for c in series.columns if c not in ('mrr', 'customers')})
+    summary['lorenz'] = [{'population_share': p * 10, 'revenue_share': round(float(s * 100), 2)}
+                         for p, s in enumerate(lorenz_curve(column[column > 0], 10))]
+    summary['top_customers'] = _top_customers(column, customers, TOP_K)
+
+    table = series.round({**{c: 2 for c in series.columns}, 'gini': 3}).astype(object).where(series.notna(), None)
+    table.insert(0, 'month', series.index.astype(str))
+    summary['monthly'] = table.to_dict('records')
+    return summary
+
+
+def concentration_summary(revenue_df: pd.DataFrame,
+                          top_percent: Sequence[float] = DEFAULT_TOP_PERCENT) -> Dict[str, Any]:
+    """Latest-month concentration with its Lorenz curve (by decile) and top customers, plus the monthly history."""
+    matrix, customers, months = customer_month_matrix(revenue_df)
+    series = _series_from_matrix(matrix, months, top_percent)
+    month = latest_revenue_month(series)
+    column = matrix[:, months.get_loc(month)] if month is not None else np.zeros(0)
+    return summarize_concentration(series, column, customers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute monthly customer concentration')
+    parser.add_argument('--revenue', required=True, help='Revenue CSV file')
+    parser.add_argument('--output', default='concentration.csv', help='Output CSV, Parquet or JSON file')
+    parser.add_argument('--top-percent', default=','.join(str(p) for p in DEFAULT_TOP_PERCENT),
+                        help='Comma-separated customer percentiles for top-N%% shares')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Stream the revenue file in chunks of this many rows')
+
+    args = parser.parse_args()
+    top_percent = [float(p) for p in args.top_percent.split(',')]
+
+    revenue_df = read_revenue_ledger(args.revenue, args.chunksize)
+    series = concentration_series(revenue_df, top_percent)
+    if args.output.endswith('.json'):
+        with open(args.output, 'w') as f:
+            json.dump(concentration_summary(revenue_df, top_percent), f, indent=2, default=str)
+    elif args.output.endswith('.parquet'):
+        series.assign(month=series.index.astype(str)).to_parquet(args.output, index=False)
+    else:
+        series.to_csv(args.output)
+
+    latest = series.dropna(subset=['top_1_share'])
+    print(f"Concentration saved to {args.output}")
+    print(f"\n=== CONCENTRATION SUMMARY ===")
+    if latest.empty:
+        print("No revenue found")
+        return
+    row = latest.iloc[-1]
+    print(f"Month: {latest.index[-1]} ({int(row['customers'])} paying customers)")
+    print(f"Top customer: {row['top_1_share']:.1f}% of MRR")
+    print(f"Top {TOP_K}: {row[f'top_{TOP_K}_share']:.1f}% of MRR")
+    for p in top_percent:
+        print(f"Top {p:g}% of customers: {row[f'top_{p:g}pct_share']:.1f}% of MRR")
+    print(f"HHI: {row['hhi']:,.0f}")
+    print(f"Gini: {row['gini']:.3f}")
+
+
+if __name__ == '__main__':
+    main()
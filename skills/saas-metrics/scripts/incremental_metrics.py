@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+"""
+Incremental SaaS Metrics
+Keeps per-(customer, month), per-month and per-(cohort, month offset)
+aggregates in a state directory next to metrics.json and, when new rows are
+appended to the revenue ledger, folds only those rows into it. The monthly
+series, cohort matrices and flags are then re-derived from the aggregates,
+and concentration is recomputed only for the months the new rows touch.
+Saving the state still rewrites its Parquet files, which is linear in the
+customer-months kept but far cheaper than re-reading and re-ranking the
+ledger.
+
+The ledger CSV is tracked by byte offset; if it was rewritten rather than
+appended to (or is not a CSV), the state is rebuilt from scratch.
+
+Usage:
+    python incremental_metrics.py --revenue revenue.csv --customers customers.csv --output analysis/metrics.json
+    python incremental_metrics.py --revenue revenue.csv --customers customers.csv --output analysis/metrics.json \\
+        --cohorts analysis/cohorts.json --verify
+    python incremental_metrics.py --revenue revenue.csv --customers customers.csv --rebuild
+
+    # In-process
+    from incremental_metrics import empty_state, fold_rows, state_series
+    state = empty_state(has_movements=False)
+    fold_rows(state, new_rows_df)
+    series = state_series(state)
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from calculate_metrics import compute_metrics, convert_numpy
+from concentration import concentration_series, latest_revenue_month, months_from_ordinals, summarize_concentration
+from cohort_analysis import (CohortAggregate, assemble_cohort_aggregate, build_cohort_aggregate,
+                             build_retention_matrix, build_revenue_retention_matrix,
+                             calculate_cohort_metrics, generate_flags as cohort_flags, month_ordinal)
+from ledger import MOVEMENT_COLUMNS, read_revenue_ledger, read_table
+from monthly_metrics import DEFAULT_GROSS_MARGIN, latest, monthly_series, movement_contributions, series_from_aggregates
+
+STATE_VERSION = 2
+KEY = ['customer_id', 'month']
+COHORT_KEY = ['cohort_month', 'month_num']
+
+# Bytes before the recorded offset that must be unchanged for the ledger to
+# count as appended to
+TAIL_BYTES = 4096
+
+# month_ordinal counts months from year 0; pandas monthly periods from 1970
+PERIOD_EPOCH = 1970 * 12
+
+
+@dataclass
+class MetricsState:
+    """Running aggregates of a revenue ledger.
+
+    customer_months: (customer_id, month) -> mrr, mrr_max
+    monthly:         month -> mrr, customers, MRR movements, cells
+    cohorts:         (cohort_month, month_num) -> active_customers, mrr
+    concentration:   month -> concentration_series columns
+    pairs:           customer_id -> cohort_month, from the customers file
+    Months are month_ordinal integers; `cells` counts the customer-months
+    present in the ledger for that month. Concentration ranks a month's
+    customers, so it cannot be summed: fold_rows marks the months it touches
+    as `stale_months` and refresh_concentration recomputes just those.
+    """
+    has_movements: bool
+    customer_months: pd.DataFrame
+    monthly: pd.DataFrame
+    cohorts: pd.DataFrame
+    pairs: pd.DataFrame
+    concentration: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(
+        index=pd.Index([], dtype='int64', name='month')))
+    stale_months: set = field(default_factory=set)
+    source: Dict[str, Any] = field(default_factory=dict)
+
+
+def empty_state(has_movements: bool) -> MetricsState:
+    """State for a ledger with no rows yet."""
+    customer_months = pd.DataFrame(
+        {'mrr': pd.Series(dtype='float64'), 'mrr_max': pd.Series(dtype='float64')},
+        index=pd.MultiIndex.from_arrays([pd.Series(dtype=object), pd.Series(dtype='int64')], names=KEY)
+    )
+    monthly = pd.DataFrame(
+        {'mrr': pd.Series(dtype='float64'), 'customers': pd.Series(dtype='int64'),
+         **{c: pd.Series(dtype='float64') for c in MOVEMENT_COLUMNS}, 'cells': pd.Series(dtype='int64')},
+        index=pd.Index([], dtype='int64', name='month')
+    )
+    cohorts = pd.DataFrame(
+        {'active_customers': pd.Series(dtype='int64'), 'mrr': pd.Series(dtype='float64')},
+        index=pd.MultiIndex.from_arrays([pd.Series(dtype='int64'), pd.Series(dtype='int64')], names=COHORT_KEY)
+    )
+    pairs = pd.DataFrame({'customer_id': pd.Series(dtype=object), 'cohort_month': pd.Series(dtype='int64')})
+    return MetricsState(has_movements, customer_months, monthly, cohorts, pairs)
+
+
+def customer_pairs(customers_df: pd.DataFrame) -> pd.DataFrame:
+    """(customer_id, cohort_month) pairs as attach_cohorts uses them."""
+    return pd.DataFrame({
+        'customer_id': customers_df['customer_id'].to_numpy(),
+        'cohort_month': month_ordinal(pd.to_datetime(customers_df['created_date']))
+    }).drop_duplicates().sort_values(['customer_id', 'cohort_month'], ignore_index=True)
+
+
+def compact_rows(rows: pd.DataFrame, has_movements: bool) -> pd.DataFrame:
+    """Ledger rows (raw or compacted) to one row per (customer_id, month ordinal)."""
+    active_col = 'mrr_max' if 'mrr_max' in rows.columns else 'mrr'
+    frame = pd.DataFrame({
+        'customer_id': rows['customer_id'].to_numpy(),
+        'month': month_ordinal(pd.to_datetime(rows['date'])),
+        'mrr': rows['mrr'].to_numpy(dtype=np.float64),
+        'mrr_max': rows[active_col].to_numpy(dtype=np.float64)
+    })
+    aggs = {'mrr': ('mrr', 'sum'), 'mrr_max': ('mrr_max', 'max')}
+    if has_movements:
+        for c in MOVEMENT_COLUMNS:
+            frame[c] = rows[c].abs().to_numpy(dtype=np.float64)
+            aggs[c] = (c, 'sum')
+    return frame.groupby(KEY, sort=False).agg(**aggs)
+
+
+def _lookup(values: pd.Series, customers: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """Values at (customer, month) keys, zero where the key is absent."""
+    keys = pd.MultiIndex.from_arrays([customers, months], names=KEY)
+    return values.reindex(keys).fillna(0).to_numpy(dtype=np.float64)
+
+
+def _month_range(monthly: pd.DataFrame) -> Optional[Tuple[int, int]]:
+    return (int(monthly.index.min()), int(monthly.index.max())) if len(monthly) else None
+
+
+def _movement_changes(state: MetricsState, delta: pd.DataFrame, updated: pd.DataFrame,
+                      old_range: Optional[Tuple[int, int]], new_range: Tuple[int, int]) -> pd.DataFrame:
+    """Change in derived MRR movements per month caused by folding `delta`.
+
+    A customer-month's movement depends on its MRR and the month before, so
+    only the delta's cells, the months right after them and (when the range
+    grows) the churn of customers active in the old last month are revisited.
+    """
+    cm = state.customer_months
+    customers = delta.index.get_level_values('customer_id').to_numpy()
+    months = delta.index.get_level_values('month').to_numpy()
+    touched = [pd.MultiIndex.from_arrays([customers, months], names=KEY),
+               pd.MultiIndex.from_arrays([customers, months + 1], names=KEY)]
+    if old_range and new_range[1] > old_range[1]:
+        in_last = cm.index.get_level_values('month') == old_range[1]
+        last = cm[in_last & (cm['mrr'].to_numpy() > 0)].index.get_level_values('customer_id').to_numpy()
+        touched.append(pd.MultiIndex.from_arrays([last, np.full(len(last), old_range[1] + 1)], names=KEY))
+    pairs = touched[0].append(touched[1:]).unique()
+    pair_customers = pairs.get_level_values('customer_id').to_numpy()
+    pair_months = pairs.get_level_values('month').to_numpy(dtype=np.int64)
+
+    # MRR in the pair's month (lag 0) and the month before (lag 1), before and after the fold
+    before = {lag: _lookup(cm['mrr'], pair_customers, pair_months - lag) for lag in (0, 1)}
+    after = {lag: np.where(
+        pd.MultiIndex.from_arrays([pair_customers, pair_months - lag]).isin(updated.index),
+        _lookup(updated['mrr'], pair_customers, pair_months - lag),
+        before[lag]
+    ) for lag in (0, 1)}
+
+    in_old = (np.zeros(len(pairs), dtype=bool) if old_range is None
+              else (pair_months >= old_range[0]) & (pair_months <= old_range[1]))
+    in_new = (pair_months >= new_range[0]) & (pair_months <= new_range[1])
+    old_moves = movement_contributions(before[1], before[0])
+    new_moves = movement_contributions(after[1], after[0])
+    changes = pd.DataFrame({
+        c: np.where(in_new, new_moves[c], 0) - np.where(in_old, old_moves[c], 0) for c in MOVEMENT_COLUMNS
+    })
+    return changes.groupby(pair_months).sum()
+
+
+def fold_rows(state: MetricsState, rows: pd.DataFrame) -> int:
+    """Fold new ledger rows into the state in place; returns the customer-months touched."""
+    delta = compact_rows(rows, state.has_movements)
+    if delta.empty:
+        return 0
+
+    cm = state.customer_months
+    old = cm.reindex(delta.index)
+    is_new = old['mrr'].isna()
+    updated = pd.DataFrame({
+        'mrr': old['mrr'].fillna(0) + delta['mrr'],
+        'mrr_max': np.fmax(old['mrr_max'], delta['mrr_max'])
+    }, index=delta.index)
+    active_change = (updated['mrr_max'] > 0).astype(np.int64) - (old['mrr_max'] > 0).astype(np.int64)
+
+    # Per-month totals, over a month range grown to cover the delta
+    old_range = _month_range(state.monthly)
+    months = delta.index.get_level_values('month')
+    new_range = (int(months.min()), int(months.max()))
+    if old_range:
+        new_range = (min(old_range[0], new_range[0]), max(old_range[1], new_range[1]))
+    monthly = state.monthly.reindex(pd.RangeIndex(new_range[0], new_range[1] + 1, name='month'), fill_value=0)
+
+    by_month = pd.DataFrame({
+        'mrr': delta['mrr'].to_numpy(),
+        'customers': active_change.to_numpy(),
+        'cells': is_new.astype(np.int64).to_numpy()
+    }, index=months)
+    if state.has_movements:
+        for c in MOVEMENT_COLUMNS:
+            by_month[c] = delta[c].to_numpy()
+    changes = by_month.groupby(level='month').sum()
+    if not state.has_movements:
+        changes = changes.join(_movement_changes(state, delta, updated, old_range, new_range), how='outer')
+    changes = changes.reindex(index=monthly.index, columns=monthly.columns, fill_value=0).fillna(0)
+    state.monthly = (monthly + changes).astype(monthly.dtypes.to_dict())
+
+    # Per-cohort totals for customers the customers file knows about
+    cells = pd.DataFrame({
+        'customer_id': delta.index.get_level_values('customer_id'),
+        'month': months,
+        'active_customers': active_change.to_numpy(),
+        'mrr': delta['mrr'].to_numpy()
+    }).merge(state.pairs, on='customer_id', how='inner')
+    cells['month_num'] = cells['month'] - cells['cohort_month']
+    cells = cells[cells['month_num'] >= 0]
+    cohort_changes = cells.groupby(COHORT_KEY)[['active_customers', 'mrr']].sum()
+    state.cohorts = state.cohorts.add(cohort_changes, fill_value=0).astype(
+        {'active_customers': np.int64, 'mrr': np.float64})
+
+    # Customer-month cells: overwrite the ones seen before, append the rest
+    existing = updated[~is_new.to_numpy()]
+    if len(existing):
+        cm.loc[existing.index, ['mrr', 'mrr_max']] = existing.to_numpy()
+    state.customer_months = pd.concat([cm, updated[is_new.to_numpy()]])
+    state.stale_months.update(np.unique(months).tolist())
+    return len(delta)
+
+
+def refresh_concentration(state: MetricsState) -> None:
+    """Recompute the concentration rows of the stale months from their cells.
+
+    Months without cells (gaps in the ledger) get the zero-revenue row
+    concentration_series gives them.
+    """
+    stale = np.array(sorted(state.stale_months), dtype=np.int64)
+    concentration = state.concentration
+    if not len(stale) and concentration.index.equals(state.monthly.index):
+        return
+    if len(stale):
+        cm = state.customer_months
+        cells = cm[cm.index.get_level_values('month').isin(stale)]
+        series = concentration_series(pd.DataFrame({
+            'date': months_from_ordinals(cells.index.get_level_values('month').to_numpy() - PERIOD_EPOCH).to_timestamp(),
+            'customer_id': cells.index.get_level_values('customer_id'),
+            'mrr': cells['mrr'].to_numpy()
+        }))
+        series.index = pd.Index(series.index.asi8 + PERIOD_EPOCH, name='month')
+        concentration = pd.concat([concentration[~concentration.index.isin(stale)],
+                                   series[series.index.isin(stale)]])
+    concentration = concentration.reindex(state.monthly.index)
+    concentration[['mrr', 'customers']] = concentration[['mrr', 'customers']].fillna(0)
+    state.concentration = concentration.astype({'customers': np.int64})
+    state.stale_months = set()
+
+
+def rebuild_cohorts(state: MetricsState) -> None:
+    """Recompute the cohort totals from the customer-month cells."""
+    cells = state.customer_months.reset_index().merge(state.pairs, on='customer_id', how='inner')
+    cells['month_num'] = cells['month'] - cells['cohort_month']
+    cells = cells[cells['month_num'] >= 0].assign(active_customers=lambda d: (d['mrr_max'] > 0).astype(np.int64))
+    cohorts = cells.groupby(COHORT_KEY).agg(active_customers=('active_customers', 'sum'), mrr=('mrr', 'sum'))
+    state.cohorts = cohorts.astype({'active_customers': np.int64, 'mrr': np.float64})
+
+
+def set_customers(state: MetricsState, customers_df: pd.DataFrame) -> bool:
+    """Point the state at a new customers file; returns True if cohort totals had to be rebuilt.
+
+    Newly added customers without ledger rows cost nothing; a changed signup
+    month (or a customer whose earlier rows were unattributed) means
+    re-bucketing the customer-month cells.
+    """
+    pairs = customer_pairs(customers_df)
+    if pairs.equals(state.pairs):
+        return False
+
+    merged = state.pairs.merge(pairs, how='outer', indicator=True)
+    changed = merged.loc[merged['_merge'] != 'both', 'customer_id'].unique()
+    state.pairs = pairs
+    if not state.customer_months.index.get_level_values('customer_id').isin(changed).any():
+        return False
+    rebuild_cohorts(state)
+    return True
+
+
+def state_series(state: MetricsState, gross_margin: float = DEFAULT_GROSS_MARGIN) -> pd.DataFrame:
+    """The monthly_series frame derived from the state's per-month totals."""
+    monthly = state.monthly[['mrr', 'customers'] + MOVEMENT_COLUMNS]
+    monthly.index = months_from_ordinals(state.monthly.index.to_numpy() - PERIOD_EPOCH)
+    return series_from_aggregates(monthly, gross_margin)
+
+
+def state_concentration(state: MetricsState) -> Dict[str, Any]:
+    """concentration_summary of the ledger, from the per-month rows and the latest revenue month's cells."""
+    refresh_concentration(state)
+    if 'top_1_share' not in state.concentration.columns:
+        return {'month': None, 'monthly': []}
+    series = state.concentration.set_axis(months_from_ordinals(state.concentration.index.to_numpy() - PERIOD_EPOCH))
+    month = latest_revenue_month(series)
+    cm = state.customer_months
+    cells = cm[cm.index.get_level_values('month') == month.ordinal + PERIOD_EPOCH] if month is not None else cm.iloc[:0]
+    return summarize_concentration(series, np.clip(cells['mrr'].to_numpy(dtype=np.float64), 0, None),
+                                   cells.index.get_level_values('customer_id').to_numpy())
+
+
+def state_cohort_aggregate(state: MetricsState, customers_df: pd.DataFrame) -> CohortAggregate:
+    """The CohortAggregate derived from the state's per-cohort totals."""
+    period_months = state.monthly.index[state.monthly['cells'] > 0].to_numpy(dtype=np.int64)
+    return assemble_cohort_aggregate(customers_df, period_months,
+                                     state.cohorts['active_customers'], state.cohorts['mrr'])
+
+
+def cohort_payload(customers_df: pd.DataFrame, aggregate: CohortAggregate) -> Dict[str, Any]:
+    """The cohort_analysis --json payload for an aggregate."""
+    retention_matrix = build_retention_matrix(customers_df, None, aggregate)
+    revenue_matrix = build_revenue_retention_matrix(customers_df, None, aggregate)
+    metrics = calculate_cohort_metrics(retention_matrix, revenue_matrix)
+    metrics['flags'] = cohort_flags(metrics)
+    metrics['generated_at'] = datetime.now().isoformat()
+    return {
+        'metrics': metrics,
+        'retention_matrix': retention_matrix.to_dict('records'),
+        'revenue_matrix': revenue_matrix.to_dict('records')
+    }
+
+
+def save_state(state: MetricsState, state_dir: Path) -> None:
+    """Write the state; the manifest goes last so a partial write reads as no state."""
+    refresh_concentration(state)
+    state_dir.mkdir(parents=True, exist_ok=True)
+    state.customer_months.reset_index().to_parquet(state_dir / 'customer_months.parquet', index=False)
+    state.monthly.reset_index().to_parquet(state_dir / 'monthly.parquet', index=False)
+    state.cohorts.reset_index().to_parquet(state_dir / 'cohorts.parquet', index=False)
+    state.concentration.reset_index().to_parquet(state_dir / 'concentration.parquet', index=False)
+    state.pairs.to_parquet(state_dir / 'customers.parquet', index=False)
+
+    tmp_path = state_dir / 'state.json.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': STATE_VERSION, 'has_movements': state.has_movements, 'source': state.source}, f, indent=2)
+    os.replace(tmp_path, state_dir / 'state.json')
+
+
+def load_state(state_dir: Path) -> Optional[MetricsState]:
+    """Read a saved state, or None if there is none (or it is from another version)."""
+    try:
+        with open(state_dir / 'state.json', 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != STATE_VERSION:
+            return None
+        return MetricsState(
+            has_movements=manifest['has_movements'],
+            customer_months=pd.read_parquet(state_dir / 'customer_months.parquet').set_index(KEY),
+            monthly=pd.read_parquet(state_dir / 'monthly.parquet').set_index('month'),
+            cohorts=pd.read_parquet(state_dir / 'cohorts.parquet').set_index(COHORT_KEY),
+            pairs=pd.read_parquet(state_dir / 'customers.parquet'),
+            concentration=pd.read_parquet(state_dir / 'concentration.parquet').set_index('month'),
+            source=manifest['source']
+        )
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _tail_hash(f, offset: int) -> str:
+    start = max(0, offset - TAIL_BYTES)
+    f.seek(start)
+    return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+
+def ledger_source(path: str) -> Dict[str, Any]:
+    """Fingerprint of a CSV ledger as read up to its current end."""
+    with open(path, 'rb') as f:
+        header = f.readline().decode().rstrip('\r\n')
+        offset = os.fstat(f.fileno()).st_size
+        return {'path': str(Path(path).resolve()), 'header': header,
+                'offset': offset, 'tail_hash': _tail_hash(f, offset)}
+
+
+def read_appended_rows(path: str, source: Dict[str, Any]) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+    """Rows appended to a CSV ledger since `source`, with the new fingerprint.
+
+    Returns None when the file is not the one `source` describes with rows
+    added at the end.
+    """
+    if not path.lower().endswith('.csv') or source.get('path') != str(Path(path).resolve()):
+        return None
+    with open(path, 'rb') as f:
+        header = f.readline().decode().rstrip('\r\n')
+        size = os.fstat(f.fileno()).st_size
+        offset = source['offset']
+        if header != source['header'] or size < offset or _tail_hash(f, offset) != source['tail_hash']:
+            return None
+        f.seek(offset)
+        appended = f.read(size - offset)
+        new_source = {**source, 'offset': size, 'tail_hash': _tail_hash(f, size)}
+
+    columns = pd.read_csv(io.StringIO(header), nrows=0).columns
+    if not appended.strip():
+        return pd.DataFrame(columns=columns), new_source
+    rows = pd.read_csv(io.BytesIO(appended), header=None, names=columns)
+    rows['date'] = pd.to_datetime(rows['date'])
+    return rows, new_source
+
+
+def build_state(revenue_path: str, customers_df: pd.DataFrame, chunksize: int = 500000) -> MetricsState:
+    """Fold a whole ledger into a fresh state, chunk by chunk for CSVs."""
+    if revenue_path.lower().endswith('.csv'):
+        source = ledger_source(revenue_path)
+        columns = pd.read_csv(io.StringIO(source['header']), nrows=0).columns
+        state = empty_state(all(c in columns for c in MOVEMENT_COLUMNS))
+        state.pairs = customer_pairs(customers_df)
+        for chunk in pd.read_csv(revenue_path, chunksize=chunksize):
+            fold_rows(state, chunk)
+        state.source = source
+        return state
+
+    revenue_df = read_revenue_ledger(revenue_path)
+    state = empty_state(all(c in revenue_df.columns for c in MOVEMENT_COLUMNS))
+    state.pairs = customer_pairs(customers_df)
+    fold_rows(state, revenue_df)
+    state.source = {'path': str(Path(revenue_path).resolve())}
+    return state
+
+
+def update_state(revenue_path: str, customers_df: pd.DataFrame, state_dir: Path,
+                 rebuild: bool = False, chunksize: int = 500000) -> Tuple[MetricsState, Dict[str, Any]]:
+    """Bring the saved state up to date with the ledger; returns it with a summary of what was done."""
+    state = None if rebuild else load_state(state_dir)
+    appended = read_appended_rows(revenue_path, state.source) if state else None
+    if state is None or appended is None:
+        state = build_state(revenue_path, customers_df, chunksize)
+        return state, {'mode': 'rebuild', 'rows': None, 'cells': len(state.customer_months),
+                       'cohorts_rebuilt': True}
+
+    rows, source = appended
+    cohorts_rebuilt = set_customers(state, customers_df)
+    cells = fold_rows(state, rows)
+    state.source = source
+    return state, {'mode': 'incremental', 'rows': len(rows), 'cells': cells, 'cohorts_rebuilt': cohorts_rebuilt}
+
+
+def verify_state(state: MetricsState, revenue_path: str, customers_df: pd.DataFrame,
+                 gross_margin: float = DEFAULT_GROSS_MARGIN) -> List[str]:
+    """Differences between the state and a full recompute from the ledger (empty when they agree)."""
+    revenue_df = read_revenue_ledger(revenue_path)
+    problems = []
+
+    full = monthly_series(revenue_df, gross_margin)
+    incremental = state_series(state, gross_margin)
+    if not full.index.equals(incremental.index):
+        problems.append(f"months differ: {len(full)} recomputed vs {len(incremental)} incremental")
+    else:
+        for column in full.columns:
+            if not np.allclose(full[column].to_numpy(dtype=np.float64), incremental[column].to_numpy(dtype=np.float64),
+                               rtol=1e-9, atol=1e-6, equal_nan=True):
+                problems.append(f"monthly {column} differs")
+
+    full_cohorts = build_cohort_aggregate(customers_df, revenue_df)
+    cohorts = state_cohort_aggregate(state, customers_df)
+    if not (np.array_equal(full_cohorts.month_offsets, cohorts.month_offsets)
+            and np.array_equal(full_cohorts.valid, cohorts.valid)):
+        problems.append("cohort grid layout differs")
+    else:
+        if not np.array_equal(full_cohorts.active_customers, cohorts.active_customers):
+            problems.append("cohort active customers differ")
+        if not np.allclose(full_cohorts.mrr, cohorts.mrr, rtol=1e-9, atol=1e-6):
+            problems.append("cohort MRR differs")
+
+    full_concentration = concentration_series(revenue_df)
+    refresh_concentration(state)
+    if not (len(full_concentration) == len(state.concentration)
+            and np.allclose(full_concentration.to_numpy(dtype=np.float64),
+                            state.concentration[full_concentration.columns].to_numpy(dtype=np.float64),
+                            rtol=1e-9, atol=1e-6, equal_nan=True)):
+        problems.append("monthly concentration differs")
+
+    concentration = state_concentration(state)
+    if (compute_metrics(revenue_df, customers_df)['flags']
+            != compute_metrics(None, customers_df, incremental, concentration)['flags']):
+        problems.append("metric flags differ")
+    if (cohort_payload(customers_df, full_cohorts)['metrics']['flags']
+            != cohort_payload(customers_df, cohorts)['metrics']['flags']):
+        problems.append("cohort flags differ")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Update SaaS metrics incrementally as revenue rows are appended')
+    parser.add_argument('--revenue', required=True, help='Revenue CSV file (appended to over time)')
+    parser.add_argument('--customers', required=True, help='Customers CSV file')
+    parser.add_argument('--output', default='metrics.json', help='Output metrics JSON file')
+    parser.add_argument('--cohorts', help='Also write the cohort matrices and flags to this JSON file')
+    parser.add_argument('--state-dir', help='Aggregate state directory (default: <output>_state next to the output)')
+    parser.add_argument('--rebuild', action='store_true', help='Discard the saved state and rebuild it from the ledger')
+    parser.add_argument('--verify', action='store_true', help='Check the updated state against a full recompute')
+    parser.add_argument('--chunksize', type=int, default=500000, help='Rows per chunk when rebuilding from a CSV')
+
+    args = parser.parse_args()
+    output = Path(args.output)
+    state_dir = Path(args.state_dir) if args.state_dir else output.parent / f"{output.stem}_state"
+
+    customers_df = read_table(args.customers)
+    customers_df['created_date'] = pd.to_datetime(customers_df['created_date'])
+
+    started = time.perf_counter()
+    state, summary = update_state(args.revenue, customers_df, state_dir, args.rebuild, args.chunksize)
+    series = state_series(state)
+    metrics = compute_metrics(None, customers_df, series, state_concentration(state))
+    cohorts = cohort_payload(customers_df, state_cohort_aggregate(state, customers_df)) if args.cohorts else None
+    elapsed = time.perf_counter() - started
+
+    save_state(state, state_dir)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(metrics, f, indent=2, default=convert_numpy)
+    print(f"Metrics saved to {output}")
+    if cohorts is not None:
+        with open(args.cohorts, 'w') as f:
+            json.dump(cohorts, f, indent=2, default=str)
+        print(f"Cohorts saved to {args.cohorts}")
+
+    print(f"\n=== INCREMENTAL SUMMARY ===")
+    if summary['mode'] == 'rebuild':
+        print(f"Mode: full rebuild ({summary['cells']} customer-months)")
+    else:
+        print(f"Mode: incremental ({summary['rows']} new rows, {summary['cells']} customer-months touched"
+              f"{', cohorts re-bucketed' if summary['cohorts_rebuilt'] else ''})")
+    print(f"Months: {len(series)} ({metrics['data_period']})")
+    print(f"Latest MRR: ${latest(series, 'mrr', 0):,.0f}")
+    print(f"Update time: {elapsed:.3f}s")
+    print(f"State: {state_dir}")
+
+    if args.verify:
+        problems = verify_state(state, args.revenue, customers_df)
+        if problems:
+            print("\n=== VERIFY FAILED ===")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print("Verify: matches full recompute")
+
+
+if __name__ == '__main__':
+    main()
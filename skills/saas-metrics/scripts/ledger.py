@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Revenue Ledger Ingestion
+Loads billing exports for the saas-metrics scripts, either in one read or as
+a stream of chunks folded into per-(customer, month) MRR aggregates.
+
+Usage:
+    from ledger import read_revenue_ledger
+    revenue_df = read_revenue_ledger('revenue.csv', chunksize=500000)
+"""
+
+import sys
+import pandas as pd
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'scripts'))
+try:
+    from skill_support import fold_chunks, read_table
+except ImportError:  # skill used outside the repository
+    def fold_chunks(parts, fold, chunksize, factor=None):
+        return list(parts)  # folded once by the caller, without bounding memory
+    def read_table(path: str, **read_kwargs) -> pd.DataFrame:
+        if path.lower().endswith(('.xlsx', '.xls')):
+            return pd.read_excel(path, **read_kwargs)
+        return pd.read_csv(path, **read_kwargs)
+
+LEDGER_COLUMNS = ['date', 'customer_id', 'mrr']
+MOVEMENT_COLUMNS = ['new_mrr', 'expansion_mrr', 'churned_mrr', 'contraction_mrr']
+
+
+def compact_ledger(df: pd.DataFrame) -> pd.DataFrame:
+    """Collapse ledger rows to one row per (customer, month).
+
+    `mrr` is summed; `mrr_max` keeps the largest single-row MRR so a customer
+    still counts as active in a month if any of its rows had positive MRR.
+    MRR movement columns, when present, are summed.
+    """
+    if 'mrr_max' not in df.columns:
+        df = df.assign(mrr_max=df['mrr'])
+
+    movements = [c for c in MOVEMENT_COLUMNS if c in df.columns]
+    month = df['date'].dt.to_period('M').dt.to_timestamp()
+    compacted = df.groupby(['customer_id', month], sort=False).agg(
+        mrr=('mrr', 'sum'),
+        mrr_max=('mrr_max', 'max'),
+        **{c: (c, 'sum') for c in movements}
+    )
+    return compacted.reset_index()[['date', 'customer_id', 'mrr', 'mrr_max'] + movements]
+
+
+def _fold(partials: List[pd.DataFrame]) -> pd.DataFrame:
+    """Merge partial aggregates into one."""
+    return compact_ledger(pd.concat(partials, ignore_index=True))
+
+
+def read_revenue_ledger(path: str, chunksize: Optional[int] = None) -> pd.DataFrame:
+    """Load a revenue ledger CSV.
+
+    Without `chunksize` the file is read whole (through the data room Parquet
+    cache) and returned row-for-row. With `chunksize` only the ledger and MRR
+    movement columns are read, chunk by chunk, and the result is the
+    compacted per-(customer, month) ledger.
+    """
+    if not chunksize:
+        revenue_df = read_table(path)
+        revenue_df['date'] = pd.to_datetime(revenue_df['date'])
+        return revenue_df
+
+    headers = pd.read_csv(path, nrows=0).columns
+    usecols = LEDGER_COLUMNS + [c for c in MOVEMENT_COLUMNS if c in headers]
+    reader = pd.read_csv(path, usecols=usecols, chunksize=chunksize)
+
+    def compacted():
+        for chunk in reader:
+            chunk['date'] = pd.to_datetime(chunk['date'])
+            yield compact_ledger(chunk)
+
+    # Memory stays bounded by customers x months rather than ledger rows
+    partials = fold_chunks(compacted(), _fold, chunksize)
+    if not partials:
+        return pd.DataFrame({
+            'date': pd.Series(dtype='datetime64[ns]'),
+            'customer_id': pd.Series(dtype=object),
+            'mrr': pd.Series(dtype='float64'),
+            'mrr_max': pd.Series(dtype='float64')
+        })
+
+    return _fold(partials)
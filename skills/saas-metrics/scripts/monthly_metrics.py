@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Monthly SaaS Metrics Engine
+Computes the full monthly time series (MRR, ARR growth, churn, NRR, quick
+ratio, ARPU, trailing-12 LTV) from a revenue ledger in one groupby pass.
+MRR movements come from the ledger's new/expansion/churned/contraction
+columns when present, otherwise from month-over-month changes in each
+customer's MRR.
+
+Usage:
+    python monthly_metrics.py --revenue revenue.csv --output monthly_metrics.csv
+    python monthly_metrics.py --revenue revenue.csv --chunksize 500000 --output monthly_metrics.parquet
+
+    # From calculate_metrics
+    from monthly_metrics import monthly_series, series_records
+    series = monthly_series(revenue_df)
+
+    # From per-month totals kept elsewhere (see incremental_metrics.py)
+    series = series_from_aggregates(monthly)
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+from ledger import MOVEMENT_COLUMNS, read_revenue_ledger
+
+DEFAULT_GROSS_MARGIN = 75.0
+
+# Cap customer lifetime (1 / monthly churn) so LTV stays finite for
+# ledgers with little or no churn
+MAX_LIFETIME_MONTHS = 60
+
+TRAILING_MONTHS = 12
+
+
+def movement_contributions(previous: np.ndarray, current: np.ndarray) -> Dict[str, np.ndarray]:
+    """MRR movements per cell between a customer's previous and current month MRR.
+
+    Zero to positive MRR is new (including reactivations), positive to zero
+    is churn, and changes between two positive months are expansion or
+    contraction.
+    """
+    delta = current - previous
+    retained = (previous > 0) & (current > 0)
+    return {
+        'new_mrr': np.where((previous <= 0) & (current > 0), current, 0),
+        'expansion_mrr': np.where(retained & (delta > 0), delta, 0),
+        'churned_mrr': np.where((previous > 0) & (current <= 0), previous, 0),
+        'contraction_mrr': np.where(retained & (delta < 0), -delta, 0)
+    }
+
+
+def derive_movements(revenue_df: pd.DataFrame, months: pd.PeriodIndex) -> pd.DataFrame:
+    """New/expansion/churned/contraction MRR per month from per-customer MRR changes.
+
+    Builds a customers x months MRR matrix and sums the movement_contributions
+    of each column against the one before it.
+    """
+    month = revenue_df['date'].dt.to_period('M')
+    per_customer = revenue_df.groupby(['customer_id', month], sort=False)['mrr'].sum().unstack(fill_value=0)
+    per_customer = per_customer.reindex(columns=months, fill_value=0)
+
+    current = per_customer.to_numpy(dtype=np.float64)
+    previous = np.zeros_like(current)
+    previous[:, 1:] = current[:, :-1]
+
+    movements = movement_contributions(previous, current)
+    return pd.DataFrame({c: movements[c].sum(axis=0) for c in MOVEMENT_COLUMNS}, index=months)
+
+
+def monthly_aggregates(revenue_df: pd.DataFrame) -> pd.DataFrame:
+    """Per-month MRR, active customers and MRR movements (gaps filled with zero MRR)."""
+    date = pd.to_datetime(revenue_df['date'])
+    has_movements = all(c in revenue_df.columns for c in MOVEMENT_COLUMNS)
+    active_col = 'mrr_max' if 'mrr_max' in revenue_df.columns else 'mrr'
+
+    frame = pd.DataFrame({
+        'month': date.dt.to_period('M'),
+        'mrr': revenue_df['mrr'],
+        'active': revenue_df['customer_id'].where(revenue_df[active_col] > 0)
+    })
+    aggs = {'mrr': ('mrr', 'sum'), 'customers': ('active', 'nunique')}
+    if has_movements:
+        for c in MOVEMENT_COLUMNS:
+            frame[c] = revenue_df[c].abs()
+            aggs[c] = (c, 'sum')
+
+    monthly = frame.groupby('month').agg(**aggs)
+    if monthly.empty:
+        return monthly
+    months = pd.period_range(monthly.index.min(), monthly.index.max(), freq='M')
+    monthly = monthly.reindex(months, fill_value=0)
+    if not has_movements:
+        monthly = monthly.join(derive_movements(revenue_df.assign(date=date), months))
+    return monthly
+
+
+def monthly_series(revenue_df: pd.DataFrame, gross_margin: float = DEFAULT_GROSS_MARGIN) -> pd.DataFrame:
+    """Every metric for every month, indexed by month (gaps filled with zero MRR).
+
+    Rates are percentages. Ratios without a base (no starting MRR, no lost
+    MRR, under 12 months of history) are NaN.
+    """
+    return series_from_aggregates(monthly_aggregates(revenue_df), gross_margin)
+
+
+def series_from_aggregates(monthly: pd.DataFrame, gross_margin: float = DEFAULT_GROSS_MARGIN) -> pd.DataFrame:
+    """Derive the rate, retention and LTV columns from monthly_aggregates output."""
+    if monthly.empty:
+        return monthly
+
+    mrr = monthly['mrr'].astype(np.float64)
+    start = mrr.shift(1).where(lambda s: s > 0)
+    year_ago = mrr.shift(TRAILING_MONTHS).where(lambda s: s > 0)
+    lost = monthly['churned_mrr'] + monthly['contraction_mrr']
+    gained = monthly['new_mrr'] + monthly['expansion_mrr']
+
+    out = monthly.copy()
+    out['arr'] = mrr * 12
+    out['net_new_mrr'] = gained - lost
+    out['mrr_growth_mom'] = (mrr - start) / start * 100
+    out['arr_growth_yoy'] = (mrr - year_ago) / year_ago * 100
+    out['gross_churn_rate'] = lost / start * 100
+    out['net_churn_rate'] = (lost - monthly['expansion_mrr']) / start * 100
+    out['net_revenue_retention'] = 100 - out['net_churn_rate']
+    out['quick_ratio'] = gained / lost.where(lost > 0)
+    out['arpu'] = mrr / monthly['customers'].where(monthly['customers'] > 0)
+
+    # Trailing-12 NRR compounds the monthly retention; months without a base count as flat
+    retention = (out['net_revenue_retention'] / 100).fillna(1.0)
+    out['nrr_trailing_12'] = retention.rolling(TRAILING_MONTHS, min_periods=1).apply(np.prod, raw=True) * 100
+    out.loc[start.isna().cumprod().astype(bool), 'nrr_trailing_12'] = np.nan
+
+    # Trailing-12 LTV: average ARPU x gross margin x capped lifetime from average gross churn
+    arpu_t12 = out['arpu'].rolling(TRAILING_MONTHS, min_periods=1).mean()
+    churn_t12 = (out['gross_churn_rate'] / 100).rolling(TRAILING_MONTHS, min_periods=1).mean()
+    lifetime = (1 / churn_t12.where(churn_t12 > 0)).clip(upper=MAX_LIFETIME_MONTHS).fillna(MAX_LIFETIME_MONTHS)
+    out['ltv'] = (arpu_t12 * gross_margin / 100 * lifetime).where(churn_t12.notna())
+
+    out.index.name = 'month'
+    return out
+
+
+def series_records(series: pd.DataFrame, decimals: int = 2) -> List[Dict[str, Any]]:
+    """JSON-ready rows (month as YYYY-MM, NaN as None)."""
+    table = series.round(decimals).astype(object).where(series.notna(), None)
+    table.insert(0, 'month', series.index.astype(str))
+    return table.to_dict('records')
+
+
+def latest(series: pd.DataFrame, column: str, default: Optional[float] = None) -> Optional[float]:
+    """Latest month's value of a column, or `default` when it is undefined."""
+    if series.empty:
+        return default
+    value = series[column].iloc[-1]
+    return default if pd.isna(value) else round(float(value), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute monthly SaaS metrics')
+    parser.add_argument('--revenue', required=True, help='Revenue CSV file')
+    parser.add_argument('--output', default='monthly_metrics.csv', help='Output CSV, Parquet or JSON file')
+    parser.add_argument('--gross-margin', type=float, default=DEFAULT_GROSS_MARGIN, help='Gross margin %% for LTV')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Stream the revenue file in chunks of this many rows')
+
+    args = parser.parse_args()
+
+    series = monthly_series(read_revenue_ledger(args.revenue, args.chunksize), args.gross_margin)
+    if args.output.endswith('.parquet'):
+        series.assign(month=series.index.astype(str)).to_parquet(args.output, index=False)
+    elif args.output.endswith('.json'):
+        pd.DataFrame(series_records(series)).to_json(args.output, orient='records', indent=2)
+    else:
+        series.to_csv(args.output)
+
+    print(f"Monthly metrics saved to {args.output}")
+    print(f"\n=== MONTHLY SUMMARY ===")
+    print(f"Months: {len(series)} ({series.index.min()} to {series.index.max()})")
+    print(f"Latest MRR: ${latest(series, 'mrr', 0):,.0f}")
+    print(f"Latest NRR (trailing 12): {latest(series, 'nrr_trailing_12', 0):.1f}%")
+    print(f"Latest LTV: ${latest(series, 'ltv', 0):,.0f}")
+
+
+if __name__ == '__main__':
+    main()
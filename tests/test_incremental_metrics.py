@@ -0,0 +1,128 @@
+"""
+Incremental metrics: folding appended ledger rows must match a full recompute.
+
+Each case builds the state on a prefix of a generated ledger, appends the
+rest in chunks and checks the state against verify_state after every chunk.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'skills' / 'saas-metrics' / 'scripts'))
+
+from incremental_metrics import load_state, save_state, state_concentration, update_state, verify_state
+from ledger import MOVEMENT_COLUMNS
+
+MONTHS = pd.period_range('2022-01', periods=18, freq='M')
+ZERO_MONTH = MONTHS[7]  # every row of this month bills 0
+GAP_MONTH = MONTHS[11]  # no rows at all
+
+
+def generate_ledger(customers: int = 60, seed: int = 7, movements: bool = True):
+    """(revenue, customers) frames: staggered signups, churn, credits, a zero-MRR and an empty month."""
+    rng = np.random.default_rng(seed)
+    signup = rng.integers(0, len(MONTHS) - 4, customers)
+    churn = np.minimum(signup + rng.integers(3, len(MONTHS), customers), len(MONTHS))
+    ids = [f'cust_{i:03d}' for i in range(customers)]
+
+    rows = []
+    for i in range(customers):
+        base = float(rng.choice([500, 1200, 3000, 9000]))
+        for m in range(signup[i], churn[i]):
+            if MONTHS[m] == GAP_MONTH:
+                continue
+            mrr = 0.0 if MONTHS[m] == ZERO_MONTH else round(base * (1 + 0.03 * (m - signup[i])), 2)
+            rows.append({'date': MONTHS[m].to_timestamp() + pd.Timedelta(days=int(rng.integers(0, 27))),
+                         'customer_id': ids[i], 'mrr': mrr})
+            if rng.random() < 0.1:
+                rows.append({'date': MONTHS[m].to_timestamp() + pd.Timedelta(days=27),
+                             'customer_id': ids[i], 'mrr': -round(mrr * 0.1, 2)})
+    revenue = pd.DataFrame(rows).sort_values('date', kind='stable', ignore_index=True)
+    if movements:
+        for c in MOVEMENT_COLUMNS:
+            revenue[c] = rng.choice([0.0, 0.0, 100.0, 250.0], len(revenue))
+
+    customers_df = pd.DataFrame({
+        'customer_id': ids,
+        'created_date': MONTHS[signup].to_timestamp(),
+        'segment': rng.choice(['smb', 'mid-market', 'enterprise'], customers)
+    })
+    return revenue, customers_df
+
+
+def write_rows(path: Path, rows: pd.DataFrame, header: bool) -> None:
+    rows.assign(date=rows['date'].dt.strftime('%Y-%m-%d')).to_csv(
+        path, mode='w' if header else 'a', header=header, index=False)
+
+
+def fold_in_chunks(tmp_path: Path, customers_df: pd.DataFrame, prefix: pd.DataFrame, chunks) -> None:
+    ledger = tmp_path / 'revenue.csv'
+    state_dir = tmp_path / 'state'
+    write_rows(ledger, prefix, header=True)
+
+    state, summary = update_state(str(ledger), customers_df, state_dir)
+    assert summary['mode'] == 'rebuild'
+    assert verify_state(state, str(ledger), customers_df) == []
+    save_state(state, state_dir)
+
+    for chunk in chunks:
+        write_rows(ledger, chunk, header=False)
+        state, summary = update_state(str(ledger), customers_df, state_dir)
+        assert summary['mode'] == 'incremental'
+        assert summary['rows'] == len(chunk)
+        assert verify_state(state, str(ledger), customers_df) == []
+        save_state(state, state_dir)
+
+    assert verify_state(load_state(state_dir), str(ledger), customers_df) == []
+
+
+@pytest.mark.parametrize('movements', [True, False], ids=['movement-columns', 'mrr-only'])
+def test_appended_months(tmp_path, movements):
+    revenue, customers_df = generate_ledger(movements=movements)
+    month = revenue['date'].dt.to_period('M')
+    prefix = revenue[month < MONTHS[5]]
+    chunks = [revenue[month == m] for m in MONTHS[5:]]
+    fold_in_chunks(tmp_path, customers_df, prefix, chunks)
+
+
+@pytest.mark.parametrize('movements', [True, False], ids=['movement-columns', 'mrr-only'])
+def test_late_rows_for_old_months(tmp_path, movements):
+    revenue, customers_df = generate_ledger(movements=movements)
+    shuffled = revenue.sample(frac=1, random_state=3).reset_index(drop=True)
+    cut = len(shuffled) // 3
+    prefix = shuffled.iloc[:cut]
+    chunks = [shuffled.iloc[start:start + 40] for start in range(cut, len(shuffled), 40)]
+    fold_in_chunks(tmp_path, customers_df, prefix, chunks)
+
+
+def test_months_before_the_first(tmp_path):
+    revenue, customers_df = generate_ledger(movements=False)
+    month = revenue['date'].dt.to_period('M')
+    late = month >= MONTHS[9]
+    fold_in_chunks(tmp_path, customers_df, revenue[late],
+                   [revenue[~late & (month >= MONTHS[4])], revenue[month < MONTHS[4]]])
+
+
+def test_concentration_skips_zero_and_empty_months(tmp_path):
+    revenue, customers_df = generate_ledger(movements=False)
+    month = revenue['date'].dt.to_period('M')
+    ledger = tmp_path / 'revenue.csv'
+    write_rows(ledger, revenue[month <= ZERO_MONTH], header=True)
+    state, _ = update_state(str(ledger), customers_df, tmp_path / 'state')
+
+    summary = state_concentration(state)
+    assert summary['month'] == str(ZERO_MONTH - 1)
+    zero = next(row for row in summary['monthly'] if row['month'] == str(ZERO_MONTH))
+    assert zero['mrr'] == 0 and zero['top_1_share'] is None
+
+    save_state(state, tmp_path / 'state')
+    write_rows(ledger, revenue[month > ZERO_MONTH], header=False)
+    state, _ = update_state(str(ledger), customers_df, tmp_path / 'state')
+    summary = state_concentration(state)
+    gap = next(row for row in summary['monthly'] if row['month'] == str(GAP_MONTH))
+    assert gap['customers'] == 0 and gap['gini'] is None
+    assert verify_state(state, str(ledger), customers_df) == []